@@ -0,0 +1,327 @@
+"""
+Banc de charge de l'interface Streamlit: N sessions simultanées simulées.
+
+Chaque utilisateur simulé parcourt le flux réel de `main()` sans navigateur
+(streamlit.testing.v1.AppTest): téléversement de classeurs synthétiques,
+validation (onglet 1), choix des classes, salles et matières (onglet 2),
+répartition (onglet 3) et génération du PDF (onglet 4).
+
+Mesures: latence de chaque réexécution (percentiles), durée du placement et de
+`generer_pdf`, temps CPU du processus et mémoire résidente par session.
+
+Usage::
+
+    python banc_charge.py --utilisateurs 8 --classes 6 --etudiants 45 --salles Amphitheatre AS1 ISE3 --rapport rapport_charge.json
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+CHEMIN_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TresBon_code3.py")
+TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# --- Classeurs synthétiques ---
+def _classeur(feuilles):
+    """Octets d'un classeur .xlsx: {feuille: [ligne d'en-tête, lignes...]}."""
+    from openpyxl import Workbook
+    classeur = Workbook(write_only=True)
+    for nom, lignes in feuilles.items():
+        feuille = classeur.create_sheet(nom)
+        for ligne in lignes:
+            feuille.append(ligne)
+    tampon = io.BytesIO()
+    classeur.save(tampon)
+    return tampon.getvalue()
+
+
+def classeurs_synthetiques(nb_classes, etudiants_par_classe, salles, variante=0):
+    """
+    Classeurs des matières, des étudiants et des salles au format attendu par l'interface.
+
+    Args:
+        nb_classes (int): Nombre de classes (une feuille par classe).
+        etudiants_par_classe (int): Effectif de chaque classe.
+        salles (list): Noms de salles de STRUCTURES_SALLES.
+        variante (int): Change les noms des étudiants (classeurs distincts par utilisateur).
+
+    Returns:
+        dict: "matieres", "etudiants", "salles" -> octets .xlsx
+    """
+    classes = [f"CLASSE{k + 1}" for k in range(nb_classes)]
+    return {
+        "matieres": _classeur({classe: [["Matiere"]] + [[f"Epreuve {classe} {m + 1}"] for m in range(3)]
+                               for classe in classes}),
+        "etudiants": _classeur({classe: [["nom", "prenom"]] + [[f"NOM{variante}_{k}_{i}", f"Prenom{i}"]
+                                                            for i in range(etudiants_par_classe)]
+                                for k, classe in enumerate(classes)}),
+        "salles": _classeur({"Salles": [["Nom"]] + [[salle] for salle in salles]}),
+    }
+
+
+# --- Mesures du processus ---
+def rss_octets():
+    """Mémoire résidente actuelle du processus (pic depuis le démarrage hors Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def temps_cpu():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+class EchantillonneurMemoire(threading.Thread):
+    """Relève la mémoire résidente à intervalle régulier pour en garder le pic."""
+
+    def __init__(self, intervalle=0.05):
+        super().__init__(daemon=True)
+        self.intervalle = intervalle
+        self.pic = rss_octets()
+        self.arret = threading.Event()
+
+    def run(self):
+        while not self.arret.wait(self.intervalle):
+            self.pic = max(self.pic, rss_octets())
+
+
+def percentiles(valeurs):
+    """Percentiles (rang le plus proche), minimum, moyenne et maximum d'une série."""
+    if not valeurs:
+        return {"nombre": 0}
+    triees = sorted(valeurs)
+
+    def rang(p):
+        return triees[max(0, math.ceil(p * len(triees) / 100) - 1)]  # Plus petite valeur couvrant p % de la série
+
+    return {"nombre": len(triees), "min": round(triees[0], 4), "moyenne": round(sum(triees) / len(triees), 4),
+            "p50": round(rang(50), 4), "p90": round(rang(90), 4), "p95": round(rang(95), 4),
+            "p99": round(rang(99), 4), "max": round(triees[-1], 4)}
+
+
+# --- Utilisateur simulé ---
+def partager_cache_script():
+    """
+    Un seul cache de bytecode du script pour toutes les sessions, comme le serveur.
+
+    AppTest recompile le script à chaque réexécution, ce que le serveur ne fait
+    pas, et les compilations simultanées de Python 3.11 dans plusieurs threads
+    peuvent échouer ("AST constructor recursion depth mismatch").
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import app_test, local_script_runner
+    cache = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: cache
+
+
+def _bouton(at, prefixe):
+    return next(bouton for bouton in at.button if bouton.label.startswith(prefixe))
+
+
+def simuler_session(index, classeurs, salles, reflexion=0.0, delai=600):
+    """
+    Parcourt les quatre onglets de l'application comme un utilisateur.
+
+    Returns:
+        dict: Latences des réexécutions (s), durées de placement et de PDF, erreurs
+        et l'objet AppTest (gardé vivant pour mesurer la mémoire des sessions).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    session = {"utilisateur": index, "reexecutions": [], "etapes": {}, "erreur": None}
+
+    def executer(etape):
+        if reflexion:
+            time.sleep(reflexion)
+        debut = time.perf_counter()
+        at.run()
+        duree = time.perf_counter() - debut
+        session["reexecutions"].append(duree)
+        session["etapes"][etape] = session["etapes"].get(etape, 0.0) + duree
+        if at.exception:
+            raise RuntimeError(f"{etape}: {at.exception[0].value}")
+        erreurs = [element.value for element in at.error]
+        if erreurs:
+            raise RuntimeError(f"{etape}: {erreurs[0]}")
+
+    at = AppTest.from_file(CHEMIN_APP, default_timeout=delai)
+    session["app"] = at
+    try:
+        executer("ouverture")
+
+        # Onglet 1: téléversement et validation (noms distincts: fichiers temporaires par utilisateur)
+        at.date_input[0].set_value(date(2026, 1, 5) + timedelta(days=index))  # PDF distinct par utilisateur
+        for cle in ("matieres", "etudiants", "salles"):
+            at.file_uploader(key=f"{cle}_uploader").set_value((f"{cle}_u{index}.xlsx", classeurs[cle], TYPE_XLSX))
+        executer("televersement")
+        _bouton(at, "🔍").click()
+        executer("validation_fichiers")
+
+        # Onglet 2: classes, salles et matières
+        classes = [option for option in at.selectbox(key="classe_add_select").options if option]
+        for classe in classes:
+            at.selectbox(key="classe_add_select").set_value(classe)
+            executer("choix_classes")
+            at.button(key="btn_add").click()
+            executer("choix_classes")
+        at.multiselect[0].set_value(salles)
+        executer("choix_salles")
+        _bouton(at, "✅ Valider la Configuration").click()
+        executer("validation_configuration")
+
+        # Onglet 3: répartition
+        _bouton(at, "🚀").click()
+        executer("repartition")
+        session["placement"] = at.session_state["duree_placement"]
+
+        # Onglet 4: PDF
+        _bouton(at, "🏫").click()
+        executer("pdf")
+        session["pdf"] = at.session_state["duree_pdf"]
+    except Exception as e:
+        session["erreur"] = f"{type(e).__name__}: {e}"
+        session["trace"] = traceback.format_exc()
+    return session
+
+
+# --- Campagne ---
+def lancer_campagne(utilisateurs, nb_classes, etudiants, salles, montee=0.0, reflexion=0.0,
+                    meme_classeur=False, delai=600):
+    """
+    Lance `utilisateurs` sessions simultanées après une session de chauffe.
+
+    Returns:
+        dict: Rapport (paramètres, latences, CPU, mémoire, sessions).
+    """
+    import streamlit
+
+    partager_cache_script()
+    # Session de chauffe: imports (pandas, numpy, reportlab...) et caches hors mesures
+    chauffe = simuler_session(-1, classeurs_synthetiques(nb_classes, etudiants, salles, variante=-1), salles,
+                              delai=delai)
+    if chauffe["erreur"]:
+        raise RuntimeError(f"Échec de la session de chauffe: {chauffe['erreur']}\n{chauffe.get('trace', '')}")
+    del chauffe
+
+    jeux = [classeurs_synthetiques(nb_classes, etudiants, salles, variante=0 if meme_classeur else i)
+            for i in range(utilisateurs)]
+
+    rss_base = rss_octets()
+    echantillonneur = EchantillonneurMemoire()
+    echantillonneur.start()
+    cpu_debut, debut = temps_cpu(), time.perf_counter()
+
+    def lancer(i):
+        time.sleep(i * montee)
+        return simuler_session(i, jeux[i], salles, reflexion, delai)
+
+    with ThreadPoolExecutor(max_workers=utilisateurs) as pool:
+        sessions = list(pool.map(lancer, range(utilisateurs)))
+
+    duree = time.perf_counter() - debut
+    cpu = temps_cpu() - cpu_debut
+    rss_fin = rss_octets()  # Toutes les sessions sont encore en mémoire (AppTest gardés)
+    echantillonneur.arret.set()
+    echantillonneur.join()
+
+    reexecutions = [d for session in sessions for d in session["reexecutions"]]
+    etapes = sorted({etape for session in sessions for etape in session["etapes"]})
+    rapport = {
+        "parametres": {"utilisateurs": utilisateurs, "classes": nb_classes, "etudiants_par_classe": etudiants,
+                       "salles": salles, "montee_s": montee, "reflexion_s": reflexion,
+                       "meme_classeur": meme_classeur},
+        "machine": {"processeurs": os.cpu_count(), "python": platform.python_version(),
+                    "streamlit": streamlit.__version__, "systeme": platform.platform()},
+        "duree_totale_s": round(duree, 3),
+        "reexecution_s": percentiles(reexecutions),
+        "etape_s": {etape: percentiles([s["etapes"][etape] for s in sessions if etape in s["etapes"]])
+                    for etape in etapes},
+        "placement_s": percentiles([s["placement"] for s in sessions if "placement" in s]),
+        "pdf_s": percentiles([s["pdf"] for s in sessions if "pdf" in s]),
+        "cpu": {"secondes": round(cpu, 3), "coeurs_moyens": round(cpu / duree, 2) if duree else None,
+                "par_session_s": round(cpu / utilisateurs, 3)},
+        "memoire": {"rss_base_mo": round(rss_base / 2**20, 1), "rss_fin_mo": round(rss_fin / 2**20, 1),
+                    "rss_pic_mo": round(echantillonneur.pic / 2**20, 1),
+                    "par_session_mo": round((rss_fin - rss_base) / 2**20 / utilisateurs, 2)},
+        "echecs": [{"utilisateur": s["utilisateur"], "erreur": s["erreur"]} for s in sessions if s["erreur"]],
+        "sessions": [{"utilisateur": s["utilisateur"], "reexecutions": len(s["reexecutions"]),
+                      "duree_s": round(sum(s["reexecutions"]), 3), "placement_s": s.get("placement"),
+                      "pdf_s": s.get("pdf"), "erreur": s["erreur"]} for s in sessions],
+    }
+    return rapport
+
+
+def resume_texte(rapport):
+    """Résumé lisible d'un rapport de charge."""
+    r, p = rapport["reexecution_s"], rapport["parametres"]
+    lignes = [
+        f"{p['utilisateurs']} session(s), {p['classes']} classe(s) x {p['etudiants_par_classe']} étudiants, "
+        f"salles {', '.join(p['salles'])} - {rapport['duree_totale_s']} s",
+        f"Réexécutions ({r.get('nombre', 0)}): p50 {r.get('p50')} s, p90 {r.get('p90')} s, "
+        f"p99 {r.get('p99')} s, max {r.get('max')} s",
+        f"Placement: p50 {rapport['placement_s'].get('p50')} s, max {rapport['placement_s'].get('max')} s",
+        f"PDF: p50 {rapport['pdf_s'].get('p50')} s, max {rapport['pdf_s'].get('max')} s",
+        f"CPU: {rapport['cpu']['secondes']} s ({rapport['cpu']['coeurs_moyens']} coeur(s) en moyenne, "
+        f"{rapport['cpu']['par_session_s']} s par session)",
+        f"Mémoire: base {rapport['memoire']['rss_base_mo']} Mo, pic {rapport['memoire']['rss_pic_mo']} Mo, "
+        f"{rapport['memoire']['par_session_mo']} Mo par session",
+    ]
+    for etape, stats in rapport["etape_s"].items():
+        lignes.append(f"  {etape}: p50 {stats['p50']} s, max {stats['max']} s")
+    for echec in rapport["echecs"]:
+        lignes.append(f"❌ Utilisateur {echec['utilisateur']}: {echec['erreur']}")
+    return "\n".join(lignes)
+
+
+def main():
+    parseur = argparse.ArgumentParser(description="Banc de charge de l'interface de répartition (sessions simulées)")
+    parseur.add_argument("--utilisateurs", type=int, default=4, help="Sessions simultanées")
+    parseur.add_argument("--classes", type=int, default=4, help="Classes par classeur synthétique")
+    parseur.add_argument("--etudiants", type=int, default=50, help="Étudiants par classe")
+    parseur.add_argument("--salles", nargs="+", default=["Amphitheatre", "AS2"], help="Salles de STRUCTURES_SALLES")
+    parseur.add_argument("--montee", type=float, default=0.0, help="Écart entre deux démarrages de session (s)")
+    parseur.add_argument("--reflexion", type=float, default=0.0, help="Pause avant chaque action (s)")
+    parseur.add_argument("--meme-classeur", action="store_true", help="Même classeur d'étudiants pour toutes les sessions")
+    parseur.add_argument("--delai", type=float, default=600, help="Délai maximal d'une réexécution (s)")
+    parseur.add_argument("--rapport", default="rapport_charge.json", help="Fichier JSON du rapport")
+    arguments = parseur.parse_args()
+
+    sys.path.insert(0, os.path.dirname(CHEMIN_APP))
+    from repartition import STRUCTURES_SALLES, compiler_structure
+    inconnues = [salle for salle in arguments.salles if salle not in STRUCTURES_SALLES]
+    if inconnues:
+        parseur.error(f"Salles sans structure définie: {', '.join(inconnues)}")
+    capacite = sum(compiler_structure(STRUCTURES_SALLES[salle]).capacite() for salle in arguments.salles)
+    if arguments.classes * arguments.etudiants > capacite:
+        parseur.error(f"{arguments.classes * arguments.etudiants} étudiants pour {capacite} places: ajoutez des salles")
+
+    chemin_rapport = os.path.abspath(arguments.rapport)
+    # Fichiers temporaires et PDF des sessions écrits dans un dossier de travail jetable
+    dossier = tempfile.mkdtemp(prefix="banc_charge_")
+    os.chdir(dossier)
+
+    rapport = lancer_campagne(arguments.utilisateurs, arguments.classes, arguments.etudiants, arguments.salles,
+                              arguments.montee, arguments.reflexion, arguments.meme_classeur, arguments.delai)
+    with open(chemin_rapport, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2)
+    print(resume_texte(rapport))
+    print(f"Rapport écrit dans {chemin_rapport} (dossier de travail: {dossier})")
+    return 1 if rapport["echecs"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
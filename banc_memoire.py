@@ -0,0 +1,308 @@
+"""
+Banc mémoire: allocations par phase du flux de répartition, comparées à des budgets.
+
+Chaque charge synthétique (de plus en plus grande) parcourt les phases de
+l'interface, dans un seul processus suivi par tracemalloc:
+
+- ``chargement``: validation des trois classeurs et lecture des colonnes
+  (pandas, caches par empreinte);
+- ``placement``: construction des `Salle` et `MoteurPlacement.executer_tout`;
+- ``session``: poignée `PlanCompact` gardée dans l'état de session, une fois
+  le moteur et les salles libérés;
+- ``pdf``: reconstruction des salles et `generer_pdf` (fusion PyPDF2 comprise).
+
+Pour chaque phase: pic d'allocation au-dessus du niveau d'entrée, mémoire
+retenue à la sortie et principaux sites d'allocation retenue. Le rapport JSON
+(clés triées, valeurs arrondies) se compare d'une version à l'autre avec
+``diff`` ou ``--reference``; les dépassements de ``budgets_memoire.json`` font
+échouer la commande.
+
+tracemalloc ne voit que les allocations de Python et de numpy: les tampons
+Arrow des chaînes pandas sont hors mesure, d'où la mémoire résidente relevée
+à la fin de chaque charge.
+
+Usage::
+
+    python banc_memoire.py --rapport rapport_memoire.json
+    python banc_memoire.py --reference ancien_rapport.json
+    python banc_memoire.py --enregistrer-budgets   # après une baisse voulue ou une nouvelle phase
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from banc_charge import classeurs_synthetiques, rss_octets
+
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+FICHIER_BUDGETS = os.path.join(DOSSIER, "budgets_memoire.json")
+# Charges de référence: (classes, étudiants par classe); salles choisies par recommander_salles
+CHARGES = {
+    "petite": (3, 40),
+    "moyenne": (6, 50),
+    "concours": (10, 55),
+}
+MARGE_BUDGETS = 1.25  # Budgets enregistrés = mesure x marge
+BUDGET_MIN_KO = 64  # Les petites phases varient de quelques Ko d'une exécution à l'autre
+MO = 2 ** 20
+
+
+# --- Flux mesuré ---
+def _pipeline(classeurs, phase):
+    """
+    Exécute le flux de l'interface sur des classeurs, phase par phase.
+
+    Args:
+        classeurs (dict): "matieres", "etudiants", "salles" -> octets .xlsx
+        phase: Gestionnaire de contexte `phase(nom)` qui encadre chaque étape.
+    """
+    from repartition import STRUCTURES_SALLES, MoteurPlacement, PlanCompact, Salle, recommander_salles
+    from repartition.chargement import colonnes_classeur
+    from repartition.export_pdf import generer_pdf
+    from repartition.validation import valider_classeurs
+
+    with phase("chargement"):
+        rapports = valider_classeurs(classeurs["matieres"], classeurs["etudiants"], classeurs["salles"])
+        erreurs = [e for rapport in list(rapports.values())[:3] for e in rapport.erreurs]
+        if erreurs:
+            raise RuntimeError(f"Classeurs synthétiques invalides: {erreurs}")
+        etudiants = colonnes_classeur(classeurs["etudiants"])
+        matieres_par_classe = {classe: matieres[0] for classe, matieres in colonnes_classeur(classeurs["matieres"]).items()}
+
+    effectifs = {matieres_par_classe[classe]: len(noms) for classe, noms in etudiants.items()}
+    recommandation = recommander_salles(rapports["salles"].contenu["reconnues"], effectifs)
+    if recommandation is None:
+        raise RuntimeError(f"Pas assez de places pour {sum(effectifs.values())} étudiants")
+
+    with phase("placement"):
+        salles = [Salle(nom, STRUCTURES_SALLES[nom]) for nom in recommandation["salles"]]
+        moteur = MoteurPlacement(salles, {classe: list(noms) for classe, noms in etudiants.items()},
+                                 matieres_par_classe, graine=0)
+        moteur.executer_tout()
+
+    with phase("session"):
+        plan = PlanCompact(moteur.salles, moteur.non_places)
+        del moteur, salles
+
+    with phase("pdf"):
+        generer_pdf(plan.salles(), "S1", "05/01/2026", "08:00", "11:00", matieres_par_classe, "banc_memoire.pdf")
+    os.remove("banc_memoire.pdf")
+    return plan
+
+
+def _site(statistique):
+    cadre = statistique.traceback[0]
+    fichier = os.path.relpath(cadre.filename, DOSSIER) if cadre.filename.startswith(DOSSIER) else cadre.filename
+    for repere in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+        if repere in fichier:
+            fichier = fichier.split(repere, 1)[1]
+            break
+    return f"{fichier}:{cadre.lineno}"
+
+
+class SuiviPhases:
+    """
+    Mesure tracemalloc de chaque phase: pic au-dessus du niveau d'entrée,
+    mémoire retenue à la sortie (après collecte) et sites retenus.
+    """
+
+    def __init__(self, nb_sites=10):
+        self.nb_sites = nb_sites
+        self.mesures = {}
+
+    def __call__(self, nom):
+        return _Phase(self, nom)
+
+
+class _Phase:
+    def __init__(self, suivi, nom):
+        self.suivi = suivi
+        self.nom = nom
+
+    def __enter__(self):
+        gc.collect()
+        self.avant = tracemalloc.take_snapshot() if self.suivi.nb_sites else None
+        self.niveau, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        self.debut = time.perf_counter()
+
+    def __exit__(self, type_exception, exception, trace):
+        if type_exception is not None:
+            return False
+        duree = time.perf_counter() - self.debut
+        _, pic = tracemalloc.get_traced_memory()
+        gc.collect()
+        actuel, _ = tracemalloc.get_traced_memory()
+        mesure = {"pic_ko": round((pic - self.niveau) / 1024), "retenu_ko": round((actuel - self.niveau) / 1024),
+                  "duree_s": round(duree, 3), "sites": []}
+        if self.avant is not None:
+            ecarts = tracemalloc.take_snapshot().compare_to(self.avant, "lineno")
+            ecarts = sorted((e for e in ecarts if e.size_diff > 0), key=lambda e: -e.size_diff)
+            mesure["sites"] = [{"site": _site(e), "retenu_ko": round(e.size_diff / 1024, 1), "blocs": e.count_diff}
+                               for e in ecarts[:self.suivi.nb_sites]]
+        self.suivi.mesures[self.nom] = mesure
+        return False
+
+
+class _sans_suivi:
+    """Phase non mesurée (exécution de chauffe)."""
+
+    def __init__(self, nom):
+        pass
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exception):
+        return False
+
+
+# --- Campagne ---
+def mesurer_charges(charges, nb_sites=10, cadres=1):
+    """
+    Mesure les phases sur chaque charge, de la plus petite à la plus grande.
+
+    Une exécution de chauffe hors suivi charge d'abord les modules (pandas,
+    reportlab...) pour que les imports ne comptent dans aucune phase.
+
+    Args:
+        charges (dict): Nom -> (classes, étudiants par classe).
+        nb_sites (int): Sites d'allocation retenus par phase (0: aucun).
+        cadres (int): Profondeur des piles enregistrées par tracemalloc.
+
+    Returns:
+        dict: Nom de charge -> {"etudiants", "salles", "phases": {phase: mesure}, "rss_mo"}
+    """
+    from repartition import STRUCTURES_SALLES
+    tous = list(STRUCTURES_SALLES)
+    _pipeline(classeurs_synthetiques(2, 10, tous, variante=-1), _sans_suivi)
+
+    resultats = {}
+    tracemalloc.start(cadres)
+    try:
+        for nom, (nb_classes, etudiants) in charges.items():
+            classeurs = classeurs_synthetiques(nb_classes, etudiants, tous)
+            suivi = SuiviPhases(nb_sites)
+            plan = _pipeline(classeurs, suivi)
+            resultats[nom] = {"classes": nb_classes, "etudiants": nb_classes * etudiants,
+                              "salles": plan.noms_salles(), "phases": suivi.mesures,
+                              "rss_mo": round(rss_octets() / MO, 1)}
+            del plan, classeurs
+    finally:
+        tracemalloc.stop()
+    return resultats
+
+
+# --- Budgets et comparaisons ---
+def comparer_budgets(resultats, budgets):
+    """
+    Phases dont le pic ou la mémoire retenue dépasse son budget.
+
+    Returns:
+        list: (charge, phase, mesure, valeur en Ko, budget en Ko); les charges
+        et phases sans budget ne sont pas vérifiées.
+    """
+    depassements = []
+    for charge, resultat in resultats.items():
+        for phase, mesure in resultat["phases"].items():
+            budget = budgets.get(charge, {}).get(phase, {})
+            for cle in ("pic_ko", "retenu_ko"):
+                if cle in budget and mesure[cle] > budget[cle]:
+                    depassements.append((charge, phase, cle, mesure[cle], budget[cle]))
+    return depassements
+
+
+def budgets_mesures(resultats, marge=MARGE_BUDGETS):
+    """Budgets tirés des mesures avec une marge (au moins BUDGET_MIN_KO par valeur)."""
+    return {charge: {phase: {cle: max(BUDGET_MIN_KO, round(mesure[cle] * marge)) for cle in ("pic_ko", "retenu_ko")}
+                     for phase, mesure in resultat["phases"].items()}
+            for charge, resultat in resultats.items()}
+
+
+def ecarts_reference(resultats, reference):
+    """Lignes d'écart (Ko) par rapport aux charges d'un rapport précédent."""
+    lignes = []
+    for charge, resultat in resultats.items():
+        ancien = reference.get("charges", {}).get(charge)
+        if ancien is None:
+            continue
+        for phase, mesure in resultat["phases"].items():
+            precedent = ancien["phases"].get(phase)
+            if precedent is None:
+                continue
+            lignes.append(f"  {charge}/{phase}: pic {mesure['pic_ko'] - precedent['pic_ko']:+d} Ko, "
+                          f"retenu {mesure['retenu_ko'] - precedent['retenu_ko']:+d} Ko")
+    return lignes
+
+
+def resume_texte(rapport):
+    """Résumé lisible d'un rapport mémoire."""
+    lignes = []
+    for charge, resultat in rapport["charges"].items():
+        lignes.append(f"{charge}: {resultat['etudiants']} étudiants, salles {', '.join(resultat['salles'])} "
+                      f"(RSS {resultat['rss_mo']} Mo)")
+        for phase, mesure in resultat["phases"].items():
+            site = f" - {mesure['sites'][0]['site']}" if mesure["sites"] else ""
+            lignes.append(f"  {phase}: pic {mesure['pic_ko']} Ko, retenu {mesure['retenu_ko']} Ko, "
+                          f"{mesure['duree_s']} s{site}")
+    for charge, phase, cle, valeur, budget in rapport["depassements"]:
+        lignes.append(f"❌ {charge}/{phase}: {cle} {valeur} > budget {budget}")
+    return "\n".join(lignes)
+
+
+def main():
+    parseur = argparse.ArgumentParser(description="Banc mémoire du flux de répartition (tracemalloc, budgets)")
+    parseur.add_argument("--charges", nargs="+", choices=list(CHARGES), default=list(CHARGES),
+                         help="Charges synthétiques à mesurer")
+    parseur.add_argument("--sites", type=int, default=10, help="Sites d'allocation retenus listés par phase")
+    parseur.add_argument("--cadres", type=int, default=1, help="Profondeur des piles tracemalloc")
+    parseur.add_argument("--budgets", default=FICHIER_BUDGETS, help="Fichier JSON des budgets")
+    parseur.add_argument("--enregistrer-budgets", action="store_true",
+                         help=f"Réécrit les budgets des charges mesurées (mesures x {MARGE_BUDGETS})")
+    parseur.add_argument("--reference", help="Rapport précédent à comparer")
+    parseur.add_argument("--rapport", default="rapport_memoire.json", help="Fichier JSON du rapport")
+    arguments = parseur.parse_args()
+
+    sys.path.insert(0, DOSSIER)
+    chemin_rapport = os.path.abspath(arguments.rapport)
+    reference = None
+    if arguments.reference:
+        with open(arguments.reference, encoding="utf-8") as f:
+            reference = json.load(f)
+    budgets = {}
+    if os.path.exists(arguments.budgets):
+        with open(arguments.budgets, encoding="utf-8") as f:
+            budgets = json.load(f)
+
+    # Fichiers temporaires du PDF écrits dans un dossier de travail jetable
+    os.chdir(tempfile.mkdtemp(prefix="banc_memoire_"))
+    resultats = mesurer_charges({nom: CHARGES[nom] for nom in arguments.charges}, arguments.sites, arguments.cadres)
+
+    if arguments.enregistrer_budgets:
+        budgets.update(budgets_mesures(resultats))
+        with open(arguments.budgets, "w", encoding="utf-8") as f:
+            json.dump(budgets, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+    rapport = {
+        "machine": {"python": platform.python_version(), "systeme": platform.platform()},
+        "charges": resultats,
+        "depassements": comparer_budgets(resultats, budgets),
+    }
+    with open(chemin_rapport, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    print(resume_texte(rapport))
+    if reference is not None:
+        print(f"Écarts avec {arguments.reference}:")
+        print("\n".join(ecarts_reference(resultats, reference)))
+    print(f"Rapport écrit dans {chemin_rapport}")
+    return 1 if rapport["depassements"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+Moteur de répartition des étudiants dans les salles d'examen.
+
+Le paquet n'importe que la bibliothèque standard: l'audit (numpy), la lecture
+des classeurs (pandas) et les exports PDF, Excel et HTML (reportlab, PyPDF2,
+openpyxl) sont dans des sous-modules chargés à la demande.
+"""
+from .capacite import capacite_sans_conflit, recommander_salles, relachements_minimaux
+from .couleurs import COULEURS_EPREUVES, couleurs_par_epreuve
+from .modeles import FICHIER_MODELES, BibliothequeModeles, bibliotheque_modeles, couverture_conflits, rechercher_modele
+from .moteur import MODES_REMPLISSAGE, EvenementPlacement, MoteurPlacement, comparer_remplissages
+from .plan import PlanCompact, registres_partages
+from .plan_binaire import EcrivainPlanBinaire, PlanBinaire
+from .profils import nombre_conflits, resoudre_profils
+from .salles import STRUCTURES_SALLES, Registre, Salle
+from .topologie import ORDRE_RANGEES, TopologieSalle, compiler_structure, normaliser_structure, signature_structure
+from .voisinage import REGLE_PAR_DEFAUT, REGLES_VOISINAGE, compiler_regle
+
+__all__ = [
+    "BibliothequeModeles",
+    "COULEURS_EPREUVES",
+    "EcrivainPlanBinaire",
+    "EvenementPlacement",
+    "FICHIER_MODELES",
+    "MODES_REMPLISSAGE",
+    "MoteurPlacement",
+    "ORDRE_RANGEES",
+    "PlanBinaire",
+    "PlanCompact",
+    "REGLES_VOISINAGE",
+    "REGLE_PAR_DEFAUT",
+    "Registre",
+    "STRUCTURES_SALLES",
+    "Salle",
+    "TopologieSalle",
+    "bibliotheque_modeles",
+    "capacite_sans_conflit",
+    "compiler_regle",
+    "comparer_remplissages",
+    "compiler_structure",
+    "couleurs_par_epreuve",
+    "couverture_conflits",
+    "nombre_conflits",
+    "normaliser_structure",
+    "rechercher_modele",
+    "recommander_salles",
+    "registres_partages",
+    "relachements_minimaux",
+    "resoudre_profils",
+    "signature_structure",
+]
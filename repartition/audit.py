@@ -0,0 +1,244 @@
+"""Audit vectorisé des plans de placement (numpy)."""
+from functools import lru_cache
+
+import numpy as np
+
+# --- Audit vectorisé des plans de placement ---
+TYPES_ARETES = ['horizontal', 'vertical', 'diagonale', 'inter_rangees']
+
+
+@lru_cache(maxsize=None)
+def _aretes_tableaux(topologie):
+    """Arêtes d'une topologie sous forme de tableaux numpy (origine, extrémité, type)."""
+    if not topologie.aretes:
+        vide = np.zeros(0, dtype=np.int32)
+        return vide, vide, np.zeros(0, dtype=np.int8)
+    origines, extremites, types = zip(*topologie.aretes)
+    return (np.array(origines, dtype=np.int32), np.array(extremites, dtype=np.int32),
+            np.array([TYPES_ARETES.index(t) for t in types], dtype=np.int8))
+
+
+class RapportAudit:
+    """
+    Résultat de l'audit d'un plan: tous les voisinages de même matière, au sens
+    de `Salle.place_valide`, avec les effectifs et densités par salle.
+    """
+
+    def __init__(self, salles, codes, salle_de_place, debuts, origines, extremites, types, conflits):
+        self._salles = salles
+        self._codes = codes
+        self._debuts = debuts
+        self._origines = origines[conflits]
+        self._extremites = extremites[conflits]
+        self._types = types[conflits]
+        salle_des_conflits = salle_de_place[self._origines]
+
+        nb_salles = len(salles)
+        self.total_places = int(len(codes))
+        self.total_occupees = int(np.count_nonzero(codes >= 0))
+        self.total_conflits = int(len(self._origines))
+        self.conflits_par_type = {t: int(n) for t, n in zip(
+            TYPES_ARETES, np.bincount(self._types, minlength=len(TYPES_ARETES)))}
+
+        occupees = np.bincount(salle_de_place[codes >= 0], minlength=nb_salles)
+        conflits_salle = np.bincount(salle_des_conflits, minlength=nb_salles)
+        en_conflit = np.zeros(len(codes), dtype=bool)
+        en_conflit[self._origines] = True
+        en_conflit[self._extremites] = True
+        self._en_conflit = en_conflit
+        places_en_conflit = np.bincount(salle_de_place[en_conflit], minlength=nb_salles)
+
+        # Effectifs par (salle, matière) en une seule passe
+        nb_matieres = int(codes.max()) + 1 if len(codes) and codes.max() >= 0 else 0
+        occupe = codes >= 0
+        effectifs = np.bincount(salle_de_place[occupe] * max(nb_matieres, 1) + codes[occupe],
+                                minlength=nb_salles * max(nb_matieres, 1)).reshape(nb_salles, max(nb_matieres, 1))
+
+        self.par_salle = []
+        for k, salle in enumerate(salles):
+            capacite = salle.capacite_totale()
+            self.par_salle.append({
+                "salle": salle.nom,
+                "capacite": capacite,
+                "occupees": int(occupees[k]),
+                "densite": (int(occupees[k]) / capacite) if capacite else 0.0,
+                "conflits": int(conflits_salle[k]),
+                "places_en_conflit": int(places_en_conflit[k]),
+                "conflits_par_place": (int(conflits_salle[k]) / int(occupees[k])) if occupees[k] else 0.0,
+                "effectifs": {salle.registre.matieres[m]: int(effectifs[k, m])
+                              for m in range(nb_matieres) if effectifs[k, m] > 0},
+            })
+
+    def places_en_conflit(self, salle):
+        """Ensemble des (rangée, ligne, colonne) d'une salle ayant un voisin de même matière."""
+        k = self._salles.index(salle)
+        debut = self._debuts[k]
+        indices = np.flatnonzero(self._en_conflit[debut:debut + salle.capacite_totale()])
+        return {salle.topologie.places[i] for i in indices}
+
+    def violations(self):
+        """Itère sur chaque voisinage de même matière, sous forme de dictionnaires."""
+        for origine, extremite, type_arete in zip(self._origines, self._extremites, self._types):
+            k = int(np.searchsorted(self._debuts, origine, side='right')) - 1
+            salle = self._salles[k]
+            i, j = int(origine - self._debuts[k]), int(extremite - self._debuts[k])
+            yield {
+                "salle": salle.nom,
+                "type": TYPES_ARETES[type_arete],
+                "matiere": salle.registre.matieres[self._codes[origine]],
+                "place_1": salle.topologie.places[i],
+                "place_2": salle.topologie.places[j],
+            }
+
+    def resume(self):
+        """Résumé sérialisable de l'audit."""
+        return {
+            "total_places": self.total_places,
+            "total_occupees": self.total_occupees,
+            "total_conflits": self.total_conflits,
+            "conflits_par_type": self.conflits_par_type,
+            "par_salle": self.par_salle,
+        }
+
+
+def auditer_plan(salles):
+    """
+    Audite un plan terminé en une seule passe vectorisée sur toutes les salles.
+
+    Args:
+        salles (list): Objets Salle du plan.
+
+    Returns:
+        RapportAudit: Voisinages de même matière (horizontaux, verticaux, entre
+        rangées), effectifs par matière et densités par salle.
+    """
+    if not salles:
+        vide = np.zeros(0, dtype=np.int32)
+        return RapportAudit([], np.zeros(0, dtype=np.int16), vide, vide, vide, vide,
+                            np.zeros(0, dtype=np.int8), np.zeros(0, dtype=bool))
+
+    capacites = np.array([salle.capacite_totale() for salle in salles], dtype=np.int64)
+    debuts = np.concatenate(([0], np.cumsum(capacites)[:-1]))
+    codes = np.concatenate([np.frombuffer(salle.codes, dtype=np.int16) for salle in salles])
+    salle_de_place = np.repeat(np.arange(len(salles)), capacites)
+
+    aretes = [_aretes_tableaux(salle.topologie) for salle in salles]
+    origines = np.concatenate([a[0] + d for a, d in zip(aretes, debuts)])
+    extremites = np.concatenate([a[1] + d for a, d in zip(aretes, debuts)])
+    types = np.concatenate([a[2] for a in aretes])
+
+    codes_origine = codes[origines]
+    conflits = (codes_origine >= 0) & (codes_origine == codes[extremites])
+    return RapportAudit(salles, codes, salle_de_place, debuts, origines, extremites, types, conflits)
+
+
+# --- Évaluation par lots de plans candidats ---
+class ScoresPlans:
+    """
+    Scores d'un lot de plans candidats pour une même salle (un élément par plan).
+
+    Attributes:
+        conflits (ndarray): Voisinages de même matière.
+        conflits_par_type (ndarray): Voisinages par type d'arête (colonnes dans l'ordre de TYPES_ARETES).
+        places_en_conflit (ndarray): Places ayant au moins un voisin de même matière.
+        occupees (ndarray): Places occupées.
+        densite (ndarray): Places occupées / capacité.
+        derniere_place (ndarray): Numéro de la dernière place occupée (-1 si vide); plus il
+            est petit, plus le plan est compact dans l'ordre de remplissage du moteur.
+        effectifs (ndarray): Étudiants par matière, forme (plans, matières).
+        ecart_effectifs (ndarray | None): Somme des écarts aux effectifs demandés, si fournis.
+    """
+    __slots__ = ("conflits", "conflits_par_type", "places_en_conflit", "occupees", "densite",
+                 "derniere_place", "effectifs", "ecart_effectifs")
+
+    def __len__(self):
+        return len(self.conflits)
+
+    def classement(self):
+        """
+        Indices des plans du meilleur au moins bon: écart aux effectifs, voisinages,
+        places en conflit, puis compacité.
+        """
+        cles = [self.derniere_place, self.places_en_conflit, self.conflits]
+        if self.ecart_effectifs is not None:
+            cles.append(self.ecart_effectifs)
+        return np.lexsort(cles)
+
+    def resume(self, k):
+        """Scores du plan d'indice k, sérialisables."""
+        return {
+            "conflits": int(self.conflits[k]),
+            "conflits_par_type": {t: int(n) for t, n in zip(TYPES_ARETES, self.conflits_par_type[k])},
+            "places_en_conflit": int(self.places_en_conflit[k]),
+            "occupees": int(self.occupees[k]),
+            "densite": float(self.densite[k]),
+            "derniere_place": int(self.derniere_place[k]),
+            "effectifs": [int(n) for n in self.effectifs[k]],
+        }
+
+
+def evaluer_plans(topologie, candidats, effectifs=None):
+    """
+    Évalue en un seul calcul vectorisé un lot de plans candidats d'une salle.
+
+    Les voisinages sont ceux de `Salle.place_valide` (arêtes de la topologie,
+    selon sa règle): remplace les parcours place par place lors d'un multi-départ,
+    d'une recherche locale ou du choix d'un gabarit.
+
+    Args:
+        topologie (TopologieSalle): Salle compilée (voir `compiler_structure`).
+        candidats (array_like): Codes de matière par place, forme (plans, places)
+            ou (places,) pour un seul plan, entiers; -1 pour une place vide. Par exemple
+            `np.frombuffer(salle.codes, dtype=np.int16)` ou les gabarits de
+            `rechercher_modele`.
+        effectifs (sequence, optional): Étudiants attendus par code de matière,
+            pour mesurer l'écart de chaque plan à la demande.
+
+    Returns:
+        ScoresPlans: Un score par plan.
+
+    Raises:
+        ValueError: Si le nombre de places ne correspond pas à la salle ou si
+            les codes ne sont pas entiers.
+    """
+    codes = np.asarray(candidats)
+    if codes.dtype.kind not in "iu":
+        raise ValueError(f"Codes de matière entiers attendus, pas {codes.dtype}")
+    if codes.ndim == 1:
+        codes = codes[np.newaxis, :]
+    nb_plans, nb_places = codes.shape
+    if nb_places != topologie.capacite():
+        raise ValueError(f"{nb_places} places par plan pour une salle de {topologie.capacite()} places")
+    origines, extremites, types = _aretes_tableaux(topologie)
+
+    codes_origine = codes[:, origines]
+    conflits = (codes_origine >= 0) & (codes_origine == codes[:, extremites])  # (plans, arêtes)
+    occupe = codes >= 0
+
+    scores = ScoresPlans()
+    scores.conflits = np.count_nonzero(conflits, axis=1)
+    # Par type et par place: comptage sur les seules arêtes en conflit (plan, arête)
+    plans_conflit, aretes_conflit = np.nonzero(conflits)
+    nb_types = len(TYPES_ARETES)
+    scores.conflits_par_type = np.bincount(plans_conflit * nb_types + types[aretes_conflit],
+                                           minlength=nb_plans * nb_types).reshape(nb_plans, nb_types)
+    en_conflit = np.zeros(codes.shape, dtype=bool)
+    en_conflit[plans_conflit, origines[aretes_conflit]] = True
+    en_conflit[plans_conflit, extremites[aretes_conflit]] = True
+    scores.places_en_conflit = np.count_nonzero(en_conflit, axis=1)
+    scores.occupees = np.count_nonzero(occupe, axis=1)
+    scores.densite = scores.occupees / nb_places if nb_places else np.zeros(nb_plans)
+    scores.derniere_place = np.where(occupe.any(axis=1), nb_places - 1 - np.argmax(occupe[:, ::-1], axis=1), -1)
+
+    # Effectifs par (plan, matière) en une seule passe
+    nb_matieres = max(int(codes.max(initial=-1)) + 1, len(effectifs) if effectifs is not None else 0)
+    lignes = np.broadcast_to(np.arange(nb_plans)[:, np.newaxis], codes.shape)
+    scores.effectifs = np.bincount(lignes[occupe] * max(nb_matieres, 1) + codes[occupe],
+                                   minlength=nb_plans * max(nb_matieres, 1)).reshape(nb_plans, max(nb_matieres, 1))
+    scores.effectifs = scores.effectifs[:, :nb_matieres]
+    scores.ecart_effectifs = None
+    if effectifs is not None:
+        attendus = np.zeros(nb_matieres, dtype=np.int64)
+        attendus[:len(effectifs)] = effectifs
+        scores.ecart_effectifs = np.abs(scores.effectifs - attendus).sum(axis=1)
+    return scores
@@ -0,0 +1,143 @@
+"""Modèle analytique de capacité sous contrainte d'adjacence."""
+from functools import lru_cache
+
+from .salles import STRUCTURES_SALLES
+from .topologie import compiler_structure
+from .voisinage import compiler_regle
+
+
+# --- Modèle analytique de capacité sous contrainte d'adjacence ---
+def capacite_sans_conflit(structure, nb_matieres=1, regle=None):
+    """
+    Nombre maximal d'étudiants plaçables sans voisin de même matière.
+
+    Args:
+        structure (dict): Structure de salle (voir STRUCTURES_SALLES).
+        nb_matieres (int): Nombre de matières différentes à placer.
+        regle: Règle de voisinage (voir REGLES_VOISINAGE), orthogonale par défaut.
+
+    Returns:
+        int: Capacité sous contrainte. Avec une seule matière, c'est le stable
+        maximum; avec deux matières ou plus, toute la salle si le graphe est
+        biparti (une matière par couleur).
+    """
+    topologie = compiler_structure(structure, regle)
+    if nb_matieres <= 0:
+        return 0
+    if nb_matieres == 1:
+        return topologie.max_une_matiere()
+    if topologie.coloration_biparti() is not None:
+        return topologie.capacite()
+    return min(topologie.capacite(), nb_matieres * topologie.max_une_matiere())
+
+
+def relachements_minimaux(noms_salles, effectifs_par_matiere, regle=None):
+    """
+    Minorant du nombre de placements avec contraintes relâchées.
+
+    Quelle que soit la répartition entre les salles, une matière de n étudiants
+    ne peut en placer sans voisin de même matière que la somme des stables
+    maximums des salles: au moins n - somme d'entre eux seront relâchés.
+
+    Args:
+        noms_salles (list): Noms des salles choisies (clés de STRUCTURES_SALLES).
+        effectifs_par_matiere (dict): Matière -> nombre d'étudiants.
+        regle: Règle de voisinage (voir REGLES_VOISINAGE), orthogonale par défaut.
+
+    Returns:
+        int: Nombre minimal de relâchements inévitables.
+    """
+    structures = [STRUCTURES_SALLES[nom] for nom in noms_salles if nom in STRUCTURES_SALLES]
+    places = sum(compiler_structure(s).capacite() for s in structures)
+    stable_total = sum(capacite_sans_conflit(s, 1, regle) for s in structures)
+    relachements = sum(max(0, n - stable_total) for n in effectifs_par_matiere.values())
+    # Les étudiants sans place du tout ne sont pas des relâchements
+    surplus = max(0, sum(effectifs_par_matiere.values()) - places)
+    return max(0, relachements - surplus)
+
+
+# --- Recommandation d'un ensemble minimal de salles ---
+def recommander_salles(noms_salles, effectifs_par_matiere, regle=None, nb_salles=None):
+    """
+    Plus petit ensemble de salles du catalogue qui accueille tous les étudiants.
+
+    Objectifs, dans l'ordre: le moins de salles possible, puis le moins de
+    relâchements inévitables (au sens de `relachements_minimaux`), puis le
+    moins de places vides. La recherche est un sac à dos exact sur les types
+    de salles (capacité, stable maximum), mémoïsé.
+
+    Args:
+        noms_salles (iterable): Salles disponibles (clés de STRUCTURES_SALLES).
+        effectifs_par_matiere (dict): Matière -> nombre d'étudiants.
+        regle: Règle de voisinage (voir REGLES_VOISINAGE), orthogonale par défaut.
+        nb_salles (int): Nombre de salles imposé (None: le minimum possible).
+
+    Returns:
+        dict: "salles" (par capacité décroissante), "capacite", "relachements"
+        et "places_libres", ou None si les salles ne suffisent pas.
+    """
+    noms = tuple(dict.fromkeys(nom for nom in noms_salles if nom in STRUCTURES_SALLES))
+    effectifs = tuple(sorted(effectifs_par_matiere.items()))
+    return _recommander(noms, effectifs, regle if regle is None or isinstance(regle, str) else compiler_regle(regle),
+                        nb_salles)
+
+
+@lru_cache(maxsize=256)
+def _recommander(noms, effectifs, regle, nb_salles):
+    total = sum(n for _, n in effectifs)
+    # Salles regroupées par type (capacité, stable maximum): les salles identiques sont interchangeables
+    types = {}
+    for nom in noms:
+        structure = STRUCTURES_SALLES[nom]
+        cle = (compiler_structure(structure).capacite(), capacite_sans_conflit(structure, 1, regle))
+        types.setdefault(cle, []).append(nom)
+    types = sorted(types.items(), key=lambda t: t[0], reverse=True)
+    capacites = sorted((c for (c, _), salles in types for _ in salles), reverse=True)
+
+    if nb_salles is None:
+        cumul = 0
+        for nb_salles, capacite in enumerate(capacites, 1):
+            cumul += capacite
+            if cumul >= total:
+                break
+        else:
+            return None
+    if nb_salles > len(capacites) or sum(capacites[:nb_salles]) < total:
+        return None
+
+    def relachements(stable_total):
+        return sum(max(0, n - stable_total) for _, n in effectifs)
+
+    @lru_cache(maxsize=None)
+    def meilleur(i, k, besoin, besoin_stable):
+        """
+        Meilleur choix de k salles parmi les types i.. couvrant `besoin` places:
+        ((stable utile, -capacité), nombre de salles pris par type). Au-delà de
+        `besoin_stable` (la plus grande matière), le stable ne réduit plus les relâchements.
+        """
+        if k == 0:
+            return ((0, 0), ()) if besoin <= 0 else None
+        if i == len(types):
+            return None
+        (capacite, stable), salles = types[i]
+        resultat = None
+        for j in range(min(len(salles), k), -1, -1):
+            utile = min(j * stable, besoin_stable)
+            suite = meilleur(i + 1, k - j, max(0, besoin - j * capacite), besoin_stable - utile)
+            if suite is None:
+                continue
+            (stable_suite, capacite_suite), choix = suite
+            candidat = ((stable_suite + utile, capacite_suite - j * capacite), (j,) + choix)
+            # Stable utile maximal (moins de relâchements), puis capacité minimale (moins de places vides)
+            if resultat is None or candidat[0] > resultat[0]:
+                resultat = candidat
+        return resultat
+
+    (stable_utile, moins_capacite), choix = meilleur(0, nb_salles, total, max((n for _, n in effectifs), default=0))
+    salles = [nom for ((_, _), noms_type), j in zip(types, choix) for nom in noms_type[:j]]
+    return {
+        "salles": salles,
+        "capacite": -moins_capacite,
+        "relachements": relachements(stable_utile),
+        "places_libres": -moins_capacite - total,
+    }
@@ -0,0 +1,289 @@
+"""
+Mode multi-centres: chaque centre d'examen est résolu dans son propre processus.
+
+Les salles sont groupées par centre (colonne « centre » du classeur des
+salles) et chaque étudiant est affecté à un centre par la colonne « centre »
+de sa feuille dans le classeur des étudiants. Un processus du pool traite un
+centre de bout en bout: placement de ses étudiants dans ses seules salles,
+PDF et plan binaire du centre. Le classeur des étudiants n'est lu qu'une fois,
+par le processus principal: chaque processus ne reçoit que les étudiants de
+son centre. Les sorties sont ensuite fusionnées en un PDF (un signet par
+centre) et un plan binaire globaux. Les centres les plus grands partent en
+premier: la durée totale suit celle du plus grand centre, et non la somme des
+centres.
+
+Lancement::
+
+    python -m repartition.centres --etudiants etudiants.xlsx --matieres matieres.xlsx \\
+        --salles salles.xlsx --dossier sortie --travailleurs 4 --matiere ISE1=Statistique
+
+Une classe qui a plusieurs épreuves dans le classeur des matières doit être
+associée à l'une d'elles par --matiere CLASSE=EPREUVE.
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from .salles import STRUCTURES_SALLES, Salle
+
+SANS_CENTRE = ""  # Centre des étudiants (ou des salles) sans valeur dans la colonne « centre »
+
+# --- Étudiants par centre (cache du processus) ---
+_repartitions = OrderedDict()  # empreinte -> {centre: {classe: [noms]}}
+TAILLE_CACHE = 4
+
+
+def etudiants_par_centre(classeur):
+    """
+    Étudiants de chaque centre, classe par classe.
+
+    Le nom est la première colonne de chaque feuille (comme pour le placement
+    habituel), le centre la première colonne dont l'en-tête contient « centre »;
+    sans cette colonne, les étudiants de la feuille sont SANS_CENTRE.
+
+    Args:
+        classeur: Chemin, contenu (bytes) ou fichier téléversé.
+
+    Returns:
+        dict: Centre -> {classe: liste des noms}, dans l'ordre du classeur.
+    """
+    from .chargement import empreinte_classeur, lire_classeur
+    donnees, empreinte = empreinte_classeur(classeur)
+    repartition = _repartitions.get(empreinte)
+    if repartition is not None:
+        return repartition
+    repartition = {}
+    for classe, df in lire_classeur(donnees).items():
+        if not len(df.columns):
+            continue
+        df = df.dropna(subset=[df.columns[0]])
+        colonne = next((col for col in df.columns[1:] if "centre" in str(col).lower()), None)
+        centres = (df[colonne].fillna(SANS_CENTRE).astype(str).str.strip() if colonne is not None
+                   else [SANS_CENTRE] * len(df))
+        for nom, centre in zip(df.iloc[:, 0].tolist(), centres):
+            repartition.setdefault(centre, {}).setdefault(classe, []).append(nom)
+    _repartitions[empreinte] = repartition
+    while len(_repartitions) > TAILLE_CACHE:
+        _repartitions.popitem(last=False)
+    return repartition
+
+
+def nom_fichier(centre):
+    """Nom de fichier sûr pour un centre."""
+    return re.sub(r"[^\w.-]+", "_", centre).strip("_") or "centre"
+
+
+# --- Traitement d'un centre (dans un processus du pool) ---
+def traiter_centre(travail):
+    """
+    Place et exporte un centre.
+
+    Args:
+        travail (dict): "centre", "etudiants" (classe -> noms des étudiants du centre),
+            "salles" (noms), "matieres_par_classe", "dossier", et les options "regle",
+            "remplissage", "modeles", "graine", "pdf" (dict semestre/date/heure_debut/
+            heure_fin/compact, ou None).
+
+    Returns:
+        dict: "centre", "etudiants", "places", "non_places", "relachees", "salles",
+        "salles_utilisees", "plan" et "pdf" (chemins ou None), "couverture" (le PDF
+        commence par la page de couverture), "durees" (s) par étape et
+        "avertissements" (échecs d'enregistrement des modèles).
+    """
+    from .moteur import MoteurPlacement
+    from .plan_binaire import EcrivainPlanBinaire
+
+    centre = travail["centre"]
+    matieres_par_classe = travail["matieres_par_classe"]
+    etudiants = travail["etudiants"]
+    durees = {}
+    debut = time.perf_counter()
+    salles = sorted((Salle(nom, STRUCTURES_SALLES[nom], regle=travail.get("regle"))
+                     for nom in travail["salles"] if nom in STRUCTURES_SALLES),
+                    key=lambda salle: salle.capacite_totale(), reverse=True)
+    bibliotheque = None
+    if travail.get("modeles", True):
+        from .modeles import bibliotheque_modeles
+        bibliotheque = bibliotheque_modeles()
+    moteur = MoteurPlacement(salles, etudiants, {classe: matieres_par_classe[classe] for classe in etudiants},
+                             graine=travail.get("graine"), bibliotheque=bibliotheque,
+                             remplissage=travail.get("remplissage", "sequentiel"))
+    echecs_avant = bibliotheque.echecs_sauvegarde if bibliotheque else 0
+    moteur.executer_tout()
+    avertissements = []
+    if bibliotheque and bibliotheque.echecs_sauvegarde > echecs_avant:
+        avertissements.append(bibliotheque.erreur_sauvegarde)
+    durees["placement"] = time.perf_counter() - debut
+
+    base = os.path.join(travail["dossier"], nom_fichier(centre))
+    debut = time.perf_counter()
+    with EcrivainPlanBinaire(base + ".rpb") as ecrivain:
+        ecrivain.ajouter_moteur(moteur, centre)
+    chemin_pdf, couverture = None, False
+    options = travail.get("pdf")
+    if options is not None and any(salle.nombre_etudiants() for salle in salles):
+        from .export_pdf import generer_pdf
+        chemin_pdf = base + ".pdf"
+        resultat_pdf = generer_pdf(salles, options.get("semestre", ""), options.get("date", ""),
+                                   options.get("heure_debut", ""), options.get("heure_fin", ""),
+                                   matieres_par_classe, chemin_pdf, compact=options.get("compact", True))
+        couverture = resultat_pdf["couverture"]
+    durees["export"] = time.perf_counter() - debut
+
+    return {
+        "centre": centre,
+        "etudiants": sum(len(noms) for noms in etudiants.values()),
+        "places": sum(salle.nombre_etudiants() for salle in salles),
+        "non_places": moteur.non_places_noms(),
+        "relachees": sum(salle.placements_avec_contraintes_relachees for salle in salles),
+        "salles": len(salles),
+        "salles_utilisees": sum(1 for salle in salles if salle.nombre_etudiants()),
+        "plan": base + ".rpb",
+        "pdf": chemin_pdf,
+        "couverture": couverture,
+        "durees": durees,
+        "avertissements": avertissements,
+    }
+
+
+# --- Répartition de tous les centres ---
+def _fusionner_pdf(resultats, destination):
+    """PDF global: les PDF des centres bout à bout (une seule couverture), un signet par centre."""
+    from PyPDF2 import PdfReader, PdfWriter
+    writer = PdfWriter()
+    couverture = False
+    for resultat in resultats:
+        if resultat["pdf"] is None:
+            continue
+        pages_avant = len(writer.pages)
+        premiere = 1 if couverture and resultat["couverture"] else 0
+        couverture = couverture or resultat["couverture"]
+        writer.append(resultat["pdf"], pages=(premiere, len(PdfReader(resultat["pdf"]).pages)), import_outline=False)
+        writer.add_outline_item(resultat["centre"] or "Sans centre", pages_avant)
+    with open(destination, "wb") as f:
+        writer.write(f)
+
+
+def repartir_centres(classeur_etudiants, salles_par_centre, matieres_par_classe, dossier, regle=None,
+                     remplissage="sequentiel", modeles=True, graine=None, pdf=None, travailleurs=None):
+    """
+    Répartit les étudiants de chaque centre dans les salles du centre, un processus par centre.
+
+    Args:
+        classeur_etudiants: Chemin ou contenu (bytes) du classeur des étudiants (colonne « centre »).
+        salles_par_centre (dict): Centre -> noms des salles (STRUCTURES_SALLES) du centre.
+        matieres_par_classe (dict): Classe -> épreuve; les classes absentes ne sont pas placées.
+        dossier (str): Dossier des sorties (créé au besoin): un .rpb et un .pdf par centre,
+            plus `plan_global.rpb` et `plan_global.pdf`.
+        regle, remplissage, modeles, graine: Comme pour `MoteurPlacement`.
+        pdf (dict): Options du PDF (semestre, date, heure_debut, heure_fin, compact); None pour ne pas en générer.
+        travailleurs (int): Processus du pool (nombre de cœurs par défaut).
+
+    Returns:
+        dict: "centres" (résultats de `traiter_centre`, dans l'ordre de `salles_par_centre`),
+        "plan" et "pdf" globaux, "sans_salle" (centre -> étudiants d'un centre sans salle),
+        "chargement" (s, lecture et découpage du classeur) et "duree" (s, fusion comprise).
+    """
+    from .plan_binaire import fusionner_plans_binaires
+
+    debut = time.perf_counter()
+    os.makedirs(dossier, exist_ok=True)
+    # Classeur lu et découpé une seule fois: chaque processus ne reçoit que son centre
+    repartition = etudiants_par_centre(classeur_etudiants)
+    chargement = time.perf_counter() - debut
+    # Plus grands centres d'abord (en places): le dernier centre lancé est un petit centre
+    centres = sorted(salles_par_centre, key=lambda centre: -sum(
+        Salle(nom, STRUCTURES_SALLES[nom]).capacite_totale() for nom in salles_par_centre[centre]
+        if nom in STRUCTURES_SALLES))
+    travaux = [{"centre": centre, "salles": list(salles_par_centre[centre]), "matieres_par_classe": matieres_par_classe,
+                "etudiants": {classe: noms for classe, noms in repartition.get(centre, {}).items()
+                              if classe in matieres_par_classe},
+                "dossier": dossier, "regle": regle, "remplissage": remplissage, "modeles": modeles, "graine": graine,
+                "pdf": pdf} for centre in centres]
+
+    travailleurs = max(1, min(travailleurs or os.cpu_count() or 1, len(travaux)))
+    # forkserver, comme le service: les processus ne copient pas les threads de l'appelant
+    with ProcessPoolExecutor(max_workers=travailleurs, mp_context=multiprocessing.get_context("forkserver")) as pool:
+        par_centre = {resultat["centre"]: resultat for resultat in pool.map(traiter_centre, travaux)}
+    resultats = [par_centre[centre] for centre in salles_par_centre]
+
+    chemin_plan = os.path.join(dossier, "plan_global.rpb")
+    fusionner_plans_binaires([resultat["plan"] for resultat in resultats], chemin_plan)
+    chemin_pdf = None
+    if pdf is not None and any(resultat["pdf"] for resultat in resultats):
+        chemin_pdf = os.path.join(dossier, "plan_global.pdf")
+        _fusionner_pdf(resultats, chemin_pdf)
+
+    return {
+        "centres": resultats,
+        "plan": chemin_plan,
+        "pdf": chemin_pdf,
+        "sans_salle": {centre: sum(len(noms) for noms in classes.values()) for centre, classes in repartition.items()
+                       if centre not in salles_par_centre},
+        "chargement": chargement,
+        "duree": time.perf_counter() - debut,
+    }
+
+
+def main():
+    parseur = argparse.ArgumentParser(description="Répartition multi-centres (un processus par centre)")
+    parseur.add_argument("--etudiants", required=True, help="Classeur des étudiants (une feuille par classe, colonne « centre »)")
+    parseur.add_argument("--matieres", required=True, help="Classeur des matières (une feuille par classe)")
+    parseur.add_argument("--salles", required=True, help="Classeur des salles (colonnes nom et centre)")
+    parseur.add_argument("--dossier", default="centres", help="Dossier des sorties")
+    parseur.add_argument("--travailleurs", type=int, default=None, help="Processus (nombre de CPU par défaut)")
+    parseur.add_argument("--regle", default=None, help="Règle de voisinage (REGLES_VOISINAGE)")
+    parseur.add_argument("--entrelace", action="store_true", help="Remplissage entrelacé des classes")
+    parseur.add_argument("--sans-pdf", action="store_true", help="Ne génère que les plans binaires")
+    parseur.add_argument("--semestre", default="")
+    parseur.add_argument("--date", default="")
+    parseur.add_argument("--heure-debut", default="")
+    parseur.add_argument("--heure-fin", default="")
+    parseur.add_argument("--matiere", action="append", default=[], metavar="CLASSE=EPREUVE",
+                         help="Épreuve d'une classe qui en a plusieurs (répétable)")
+    arguments = parseur.parse_args()
+
+    from .chargement import colonnes_classeur
+    from .validation import valider_salles
+    rapport_salles = valider_salles(arguments.salles)
+    salles_par_centre = rapport_salles.contenu["centres"] or {SANS_CENTRE: rapport_salles.contenu["reconnues"]}
+    choix = dict(option.split("=", 1) for option in arguments.matiere if "=" in option)
+    matieres_par_classe = {}
+    for classe, matieres in colonnes_classeur(arguments.matieres).items():
+        epreuves = list(dict.fromkeys(str(m) for m in matieres))
+        if classe in choix:
+            if choix[classe] not in epreuves:
+                parseur.error(f"épreuve '{choix[classe]}' absente de la feuille {classe} ({', '.join(epreuves)})")
+            matieres_par_classe[classe] = choix[classe]
+        elif len(epreuves) == 1:
+            matieres_par_classe[classe] = epreuves[0]
+        elif epreuves:
+            # Pas de choix implicite: la première épreuve n'est pas forcément celle de la session
+            parseur.error(f"la classe {classe} a plusieurs épreuves ({', '.join(epreuves)}): "
+                          f"préciser --matiere {classe}=EPREUVE")
+    for classe in sorted(set(choix) - set(matieres_par_classe)):
+        print(f"⚠️ --matiere {classe}: classe absente du classeur des matières")
+    pdf = None if arguments.sans_pdf else {"semestre": arguments.semestre, "date": arguments.date,
+                                            "heure_debut": arguments.heure_debut, "heure_fin": arguments.heure_fin}
+    resultat = repartir_centres(arguments.etudiants, salles_par_centre, matieres_par_classe, arguments.dossier,
+                                regle=arguments.regle, remplissage="entrelace" if arguments.entrelace else "sequentiel",
+                                pdf=pdf, travailleurs=arguments.travailleurs)
+
+    for centre in resultat["centres"]:
+        durees = ", ".join(f"{etape} {duree:.2f} s" for etape, duree in centre["durees"].items())
+        print(f"{centre['centre'] or 'Sans centre'}: {centre['places']}/{centre['etudiants']} placés, "
+              f"{centre['relachees']} relâché(s), {centre['salles_utilisees']}/{centre['salles']} salle(s) ({durees})")
+        for message in centre["avertissements"]:
+            print(f"⚠️ {message}")
+    for centre, n in resultat["sans_salle"].items():
+        print(f"⚠️ {n} étudiant(s) du centre '{centre or 'sans centre'}' sans salle dans ce centre")
+    print(f"Plan global: {resultat['plan']}" + (f", PDF global: {resultat['pdf']}" if resultat["pdf"] else ""))
+    print(f"Durée totale: {resultat['duree']:.2f} s (lecture du classeur {resultat['chargement']:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
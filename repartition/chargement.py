@@ -0,0 +1,180 @@
+"""
+Lecture des classeurs Excel (matières, étudiants, salles).
+
+pandas n'est importé qu'à la première lecture d'un classeur, pour que le
+moteur et l'interface démarrent sans le charger. Les colonnes lues sont
+publiées en mémoire partagée (`memoire_partagee`): les autres processus de la
+machine qui reçoivent le même classeur s'y attachent au lieu de le relire.
+"""
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from .memoire_partagee import attacher_colonnes, publier_colonnes
+
+# Contenu des classeurs déjà lus, partagé entre sessions par empreinte du fichier
+TAILLE_CACHE_CLASSEURS = 16
+_classeurs = OrderedDict()  # empreinte -> {feuille: valeurs de la première colonne} (tuples ou ColonnesPartagees)
+_contenus = OrderedDict()   # empreinte -> octets d'un classeur téléversé (une copie pour toutes les sessions)
+_verrou = threading.Lock()
+
+
+def _pandas():
+    import pandas as pd
+    return pd
+
+
+# --- Lecture des classeurs ---
+def ouvrir_classeur(fichier):
+    """
+    Ouvre un classeur Excel sans lire ses feuilles.
+
+    Args:
+        fichier: Chemin ou fichier téléversé
+
+    Returns:
+        pandas.ExcelFile: Classeur ouvert (attribut sheet_names)
+    """
+    return _pandas().ExcelFile(fichier)
+
+
+def lire_feuille(fichier, feuille=0):
+    """
+    Lit une feuille d'un classeur Excel.
+
+    Args:
+        fichier: Chemin, fichier téléversé ou classeur déjà ouvert
+        feuille: Nom ou indice de la feuille (première feuille par défaut)
+
+    Returns:
+        pandas.DataFrame: Contenu de la feuille
+    """
+    return _pandas().read_excel(fichier, sheet_name=feuille)
+
+
+def premiere_colonne(fichier, feuille=0):
+    """
+    Valeurs non vides de la première colonne d'une feuille.
+
+    C'est le format attendu pour les noms d'étudiants (une feuille par classe)
+    comme pour les épreuves (une feuille par classe dans le fichier des matières).
+
+    Args:
+        fichier: Chemin, fichier téléversé ou classeur déjà ouvert
+        feuille: Nom ou indice de la feuille
+
+    Returns:
+        list: Valeurs de la première colonne, dans l'ordre du fichier
+    """
+    df = lire_feuille(fichier, feuille)
+    if df.empty or len(df.columns) == 0:
+        return []
+    return df.iloc[:, 0].dropna().tolist()
+
+
+def _octets(fichier):
+    if isinstance(fichier, bytes):
+        return fichier
+    if isinstance(fichier, str):
+        with open(fichier, "rb") as f:
+            return f.read()
+    return fichier.getvalue()
+
+
+def empreinte_classeur(fichier):
+    """Contenu (octets) et empreinte SHA-256 d'un classeur."""
+    donnees = _octets(fichier)
+    return donnees, hashlib.sha256(donnees).hexdigest()
+
+
+def garder_contenu(fichier):
+    """
+    Garde le contenu d'un classeur dans le cache partagé par empreinte.
+
+    Les sessions qui téléversent le même fichier partagent une seule copie des
+    octets; elles ne gardent que l'empreinte (voir `contenu_classeur`).
+
+    Args:
+        fichier: Chemin, contenu (bytes) ou fichier téléversé
+
+    Returns:
+        tuple: (octets partagés, empreinte SHA-256)
+    """
+    donnees, empreinte = empreinte_classeur(fichier)
+    with _verrou:
+        donnees = _contenus.setdefault(empreinte, donnees)
+        _contenus.move_to_end(empreinte)
+        while len(_contenus) > TAILLE_CACHE_CLASSEURS:
+            _contenus.popitem(last=False)
+    return donnees, empreinte
+
+
+def contenu_classeur(empreinte):
+    """Octets d'un classeur gardé par `garder_contenu`, None s'il a été évincé du cache."""
+    with _verrou:
+        donnees = _contenus.get(empreinte)
+        if donnees is not None:
+            _contenus.move_to_end(empreinte)
+        return donnees
+
+
+def lire_classeur(donnees):
+    """
+    Lit toutes les feuilles d'un classeur en une seule ouverture.
+
+    Args:
+        donnees (bytes): Contenu du classeur
+
+    Returns:
+        dict: Nom de feuille -> pandas.DataFrame, dans l'ordre du classeur
+    """
+    return {str(nom): df for nom, df in _pandas().read_excel(io.BytesIO(donnees), sheet_name=None).items()}
+
+
+def _garder(empreinte, colonnes):
+    with _verrou:
+        _classeurs[empreinte] = colonnes
+        while len(_classeurs) > TAILLE_CACHE_CLASSEURS:
+            _classeurs.popitem(last=False)  # Une vue partagée évincée détache le processus du segment
+    return colonnes
+
+
+def memoriser_colonnes(empreinte, feuilles):
+    """
+    Met en cache (et publie en mémoire partagée) la première colonne des feuilles d'un classeur déjà lu.
+
+    Returns:
+        Mapping: Nom de feuille -> séquence immuable des valeurs non vides de la première colonne
+    """
+    colonnes = {nom: (tuple(df.iloc[:, 0].dropna().tolist()) if len(df.columns) else ())
+                for nom, df in feuilles.items()}
+    return _garder(empreinte, publier_colonnes(empreinte, colonnes) or colonnes)
+
+
+def colonnes_classeur(fichier):
+    """
+    Première colonne (valeurs non vides) de chaque feuille d'un classeur.
+
+    Le classeur est lu en une passe et son contenu est mis en cache par
+    empreinte SHA-256: les sessions qui téléversent le même fichier et les
+    réexécutions de l'interface ne le relisent pas, ni les autres processus
+    de la machine (mémoire partagée). Le résultat est immuable (séquences),
+    il ne doit pas être modifié.
+
+    Args:
+        fichier: Chemin, contenu (bytes) ou fichier téléversé
+
+    Returns:
+        Mapping: Nom de feuille -> séquence des valeurs, dans l'ordre du classeur
+    """
+    donnees, empreinte = empreinte_classeur(fichier)
+    with _verrou:
+        colonnes = _classeurs.get(empreinte)
+        if colonnes is not None:
+            _classeurs.move_to_end(empreinte)
+            return colonnes
+    colonnes = attacher_colonnes(empreinte)
+    if colonnes is not None:
+        return _garder(empreinte, colonnes)
+    return memoriser_colonnes(empreinte, lire_classeur(donnees))
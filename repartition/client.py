@@ -0,0 +1,90 @@
+"""Client du service HTTP local de placement (bibliothèque standard uniquement)."""
+import base64
+import json
+import time
+import urllib.error
+import urllib.request
+
+from .chargement import _octets
+
+
+class ErreurService(RuntimeError):
+    """Erreur renvoyée par le service ou travail en échec."""
+
+
+class ClientService:
+    """Soumet des travaux au service (`python -m repartition.service`) et récupère leurs résultats."""
+
+    def __init__(self, url, delai=30):
+        """
+        Args:
+            url (str): Adresse du service, par exemple "http://127.0.0.1:8765".
+            delai (float): Délai maximal d'une requête HTTP (secondes).
+        """
+        self.url = url.rstrip("/")
+        self.delai = delai
+
+    def _requete(self, chemin, donnees=None):
+        corps = None if donnees is None else json.dumps(donnees).encode("utf-8")
+        requete = urllib.request.Request(self.url + chemin, data=corps,
+                                         headers={"Content-Type": "application/json"} if corps else {})
+        try:
+            with urllib.request.urlopen(requete, timeout=self.delai) as reponse:
+                contenu = reponse.read()
+                type_contenu = reponse.headers.get("Content-Type", "")
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("erreur", e.reason)
+            except ValueError:
+                message = e.reason
+            raise ErreurService(f"{e.code}: {message}") from None
+        return json.loads(contenu) if type_contenu.startswith("application/json") else contenu
+
+    def soumettre(self, demande, classeur_etudiants=None):
+        """
+        Soumet un travail.
+
+        Args:
+            demande (dict): Travail (voir `repartition.service`).
+            classeur_etudiants: Classeur des étudiants (octets, chemin ou fichier
+                téléversé), transmis encodé en base64 à la place de "etudiants".
+
+        Returns:
+            str: Identifiant du travail.
+        """
+        if classeur_etudiants is not None:
+            demande = dict(demande, classeur_etudiants=base64.b64encode(_octets(classeur_etudiants)).decode("ascii"))
+        return self._requete("/jobs", demande)["id"]
+
+    def etat(self, id_travail):
+        return self._requete(f"/jobs/{id_travail}")
+
+    def attendre(self, id_travail, delai_max=None, intervalle=0.1):
+        """
+        Attend la fin d'un travail.
+
+        Returns:
+            dict: Description du travail terminé (plan, résumé, durées).
+
+        Raises:
+            ErreurService: Si le travail échoue ou dépasse `delai_max` secondes.
+        """
+        limite = None if delai_max is None else time.monotonic() + delai_max
+        while True:
+            travail = self.etat(id_travail)
+            if travail["etat"] == "termine":
+                return travail
+            if travail["etat"] == "echec":
+                raise ErreurService(travail.get("erreur", "Travail en échec"))
+            if limite is not None and time.monotonic() > limite:
+                raise ErreurService(f"Travail {id_travail} non terminé après {delai_max} s")
+            time.sleep(intervalle)
+            intervalle = min(intervalle * 1.5, 1.0)
+
+    def pdf(self, id_travail):
+        """Octets du PDF d'un travail de type "pdf" terminé."""
+        return self._requete(f"/jobs/{id_travail}/pdf")
+
+    def statistiques(self):
+        """Profondeur de la file et durées des travaux (`GET /stats`)."""
+        return self._requete("/stats")
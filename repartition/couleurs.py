@@ -0,0 +1,13 @@
+"""Couleurs associées aux épreuves (PDF, classeur Excel, site HTML)."""
+
+# Couleurs pour différencier les épreuves (rouge, bleu, vert, orange, violet, marron, rose, gris, ...)
+COULEURS_EPREUVES = [
+    "#FF0000", "#0000FF", "#008000", "#FFA500", "#800080", "#A52A2A", "#FFC0CB", "#808080",
+    "#CC3399", "#33CC33", "#9966CC"
+]
+
+
+def couleurs_par_epreuve(matieres_par_classe):
+    """Associe à chaque épreuve sa couleur hexadécimale, dans un ordre stable (PDF, classeur, site)."""
+    epreuves_uniques = sorted(set(matieres_par_classe.values()), key=str)
+    return {epreuve: COULEURS_EPREUVES[i % len(COULEURS_EPREUVES)] for i, epreuve in enumerate(epreuves_uniques)}
@@ -0,0 +1,115 @@
+"""Export du classeur d'émargement et des plans de salles (openpyxl, écriture en flux)."""
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from .couleurs import couleurs_par_epreuve
+
+# --- Export du classeur d'émargement et des plans de salles ---
+def exporter_classeur(salles, matieres_par_classe, date_epreuve, heure_debut, heure_fin, destination):
+    """
+    Écrit un classeur Excel avec une feuille par salle: liste d'émargement triée
+    par nom puis plan des places coloré par matière (même grille que le PDF).
+
+    Le classeur est produit en mode écriture seule d'openpyxl: les lignes sont
+    envoyées au fur et à mesure, la mémoire reste constante quel que soit le
+    nombre de places.
+
+    Args:
+        salles (list): Objets Salle du plan.
+        matieres_par_classe (dict): Classe -> épreuve (pour les couleurs).
+        date_epreuve, heure_debut, heure_fin (str): Informations d'en-tête.
+        destination: Chemin du fichier ou objet fichier binaire (ex: io.BytesIO).
+
+    Returns:
+        La destination, une fois le classeur écrit.
+    """
+    classeur = Workbook(write_only=True)
+    gras = Font(bold=True)
+    titre = Font(bold=True, size=14)
+    gris = PatternFill(fill_type="solid", fgColor="D3D3D3")
+    centre = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    remplissages = {epreuve: PatternFill(fill_type="solid", fgColor=couleur.lstrip("#"))
+                    for epreuve, couleur in couleurs_par_epreuve(matieres_par_classe).items()}
+    texte_blanc = Font(color="FFFFFF", size=9)
+    hors_service = PatternFill(fill_type="solid", fgColor="808080")
+
+    def cellule(feuille, valeur, police=None, fond=None, alignement=None):
+        c = WriteOnlyCell(feuille, value=valeur)
+        if police:
+            c.font = police
+        if fond:
+            c.fill = fond
+        if alignement:
+            c.alignment = alignement
+        return c
+
+    noms_feuilles = set()
+    for salle in salles:
+        if salle.nombre_etudiants() == 0:
+            continue
+        registre = salle.registre
+        topologie = salle.topologie
+
+        # Nom de feuille Excel: 31 caractères max, sans caractères interdits, unique
+        nom_feuille = "".join("_" if ch in '[]:*?/\\' else ch for ch in salle.nom)[:31]
+        base, suffixe = nom_feuille, 2
+        while nom_feuille in noms_feuilles:
+            nom_feuille = f"{base[:28]}_{suffixe}"
+            suffixe += 1
+        noms_feuilles.add(nom_feuille)
+        feuille = classeur.create_sheet(nom_feuille)
+
+        # Largeurs de colonnes (à fixer avant toute ligne en mode écriture seule)
+        largeur_plan = max((cols for _, cols in topologie.dimensions.values()), default=0)
+        largeurs = {1: 6, 2: 30, 3: 14, 4: 14, 5: 14, 6: 14, 7: 14, 8: 24}
+        for col in range(2, largeur_plan + 2):
+            largeurs[col] = max(largeurs.get(col, 0), 14)
+        for col, largeur in largeurs.items():
+            feuille.column_dimensions[get_column_letter(col)].width = largeur
+
+        # --- Liste d'émargement triée par nom ---
+        feuille.append([cellule(feuille, f"Salle {salle.nom} - Liste d'émargement", titre)])
+        feuille.append([f"{date_epreuve}    {heure_debut} - {heure_fin}",
+                        None, f"{salle.nombre_etudiants()}/{salle.capacite_totale()} places"])
+        feuille.append([])
+        feuille.append([cellule(feuille, entete, gras, gris) for entete in
+                        ["N°", "Nom et prénom", "Classe", "Matière", "Rangée", "Ligne", "Colonne", "Signature"]])
+        places_occupees = sorted((i for i in range(topologie.capacite()) if salle.occupants[i] >= 0),
+                                 key=lambda i: registre.nom(salle.occupants[i]).casefold())
+        for numero, i in enumerate(places_occupees, 1):
+            id_etudiant = salle.occupants[i]
+            rangee, li, ci = topologie.places[i]
+            feuille.append([numero, registre.nom(id_etudiant), registre.classe(id_etudiant),
+                            registre.matiere(id_etudiant), rangee.capitalize(), li + 1, ci + 1, None])
+
+        # --- Plan de la salle (même grille que le PDF) ---
+        feuille.append([])
+        feuille.append([cellule(feuille, f"Plan de la salle {salle.nom}", titre)])
+        for rangee in topologie.rangees:
+            lignes, cols = topologie.dimensions[rangee]
+            if lignes == 0 or cols == 0:
+                continue
+            feuille.append([])
+            feuille.append([cellule(feuille, f"Rangée {rangee}", gras)])
+            feuille.append([None] + [cellule(feuille, f"{ci + 1:02d}", gras, gris, centre) for ci in range(cols)])
+            for li, masque_ligne in enumerate(topologie.masques[rangee]):
+                ligne = [cellule(feuille, f"{li + 1:02d}", gras, gris, centre)]
+                for ci, utilisable in enumerate(masque_ligne):
+                    if not utilisable:
+                        ligne.append(cellule(feuille, "✕", texte_blanc, hors_service, centre))
+                        continue
+                    id_etudiant = salle.occupants[topologie.index[(rangee, li, ci)]]
+                    if id_etudiant < 0:
+                        ligne.append(cellule(feuille, "", alignement=centre))
+                    else:
+                        matiere = registre.matiere(id_etudiant)
+                        ligne.append(cellule(feuille, registre.nom(id_etudiant), texte_blanc,
+                                             remplissages.get(matiere), centre))
+                feuille.append(ligne)
+
+    if not noms_feuilles:
+        classeur.create_sheet("Répartition").append(["Aucun étudiant placé"])
+    classeur.save(destination)
+    return destination
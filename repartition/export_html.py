@@ -0,0 +1,272 @@
+"""Publication d'un site HTML statique des plans de salles."""
+import hashlib
+import html
+import json
+import os
+import string
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from .audit import auditer_plan
+from .couleurs import couleurs_par_epreuve
+
+# --- Publication d'un site HTML statique des plans de salles ---
+GABARIT_PAGE_HTML = string.Template("""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$titre</title>
+<link rel="stylesheet" href="${racine}style.css">
+</head>
+<body>
+<header><a href="${racine}index.html">Plans des salles</a> &middot; $sous_titre</header>
+<main>
+$contenu
+</main>
+</body>
+</html>
+""")
+
+GABARIT_RANGEE_HTML = string.Template("""<h2>$titre</h2>
+<table class="grille">
+<thead><tr><th></th>$entetes</tr></thead>
+<tbody>
+$lignes
+</tbody>
+</table>
+""")
+
+GABARIT_INDEX_HTML = string.Template("""<h1>$titre</h1>
+<p>$sous_titre</p>
+<section class="recherche">
+<label for="q">Retrouver sa place :</label>
+<input id="q" type="search" placeholder="Nom de l'étudiant" autocomplete="off">
+<ul id="resultats"></ul>
+</section>
+<h2>Salles</h2>
+<table class="liste">
+<thead><tr><th>Salle</th><th>Étudiants</th><th>Capacité</th><th>Matières</th></tr></thead>
+<tbody>
+$lignes
+</tbody>
+</table>
+<script src="recherche.js"></script>
+""")
+
+STYLE_SITE_CSS = """body{font-family:"Times New Roman",serif;margin:0;color:#222}
+header{background:#1e3d59;color:#fff;padding:10px 20px}header a{color:#fff;font-weight:bold}
+main{padding:10px 20px}table{border-collapse:collapse;margin-bottom:20px}
+th,td{border:1px solid #444;text-align:center;padding:4px}
+.grille td{width:7em;height:3em;font-size:12px;color:#fff}.grille th{background:#d3d3d3}
+.grille td.vide{background:#fff}.grille td.hs{background:#808080}.grille td.conflit{outline:3px solid #d00000;outline-offset:-3px}
+.grille td:target{box-shadow:0 0 0 4px #000 inset}
+.legende span{display:inline-block;padding:4px 10px;margin:2px;color:#fff}
+.liste td{text-align:left}.recherche input{font-size:16px;padding:4px;width:20em}
+"""
+
+SCRIPT_RECHERCHE_JS = """(function(){
+  function normaliser(t){return t.normalize('NFD').replace(/[\\u0300-\\u036f]/g,'').toLowerCase().trim();}
+  function fragment(t){var c=normaliser(t).charAt(0);return /[a-z0-9]/.test(c)?c:'_';}
+  var cache={}, q=document.getElementById('q'), res=document.getElementById('resultats');
+  function afficher(entrees, texte){
+    res.innerHTML='';
+    entrees.filter(function(e){return normaliser(e.n).indexOf(texte)!==-1;}).slice(0,50).forEach(function(e){
+      var li=document.createElement('li'), a=document.createElement('a');
+      a.href='salles/'+e.p+'.html#'+e.a;
+      a.textContent=e.n+' — salle '+e.s+', rangée '+e.r+', ligne '+e.l+', colonne '+e.c+' ('+e.m+')';
+      li.appendChild(a);res.appendChild(li);
+    });
+  }
+  q.addEventListener('input',function(){
+    var texte=normaliser(q.value);
+    if(texte.length<2){res.innerHTML='';return;}
+    var f=fragment(texte);
+    if(cache[f]){afficher(cache[f],texte);return;}
+    fetch('recherche/'+f+'.json').then(function(r){return r.ok?r.json():[];}).then(function(d){cache[f]=d;afficher(d,normaliser(q.value));});
+  });
+})();
+"""
+
+
+def _fragment_recherche(texte):
+    """Fragment du fichier de recherche: première lettre (sans accent) d'un mot."""
+    lettre = unicodedata.normalize("NFD", texte).encode("ascii", "ignore").decode().lower()[:1]
+    return lettre if lettre.isalnum() else "_"
+
+
+def _slug(nom):
+    """Nom de fichier sûr pour une salle."""
+    texte = unicodedata.normalize("NFD", str(nom)).encode("ascii", "ignore").decode()
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in texte) or "salle"
+
+
+def _donnees_salle(salle, couleurs_hex, places_en_conflit):
+    """
+    Extrait d'une salle les données nécessaires au rendu, sous forme simple (sérialisable).
+
+    Dans les grilles, None désigne une place vide et False une place hors service.
+    """
+    topologie = salle.topologie
+    registre = salle.registre
+    rangees = []
+    for rangee in topologie.rangees:
+        lignes, cols = topologie.dimensions[rangee]
+        if lignes == 0 or cols == 0:
+            continue
+        grille = []
+        for li, masque_ligne in enumerate(topologie.masques[rangee]):
+            ligne = []
+            for ci, utilisable in enumerate(masque_ligne):
+                if not utilisable:
+                    ligne.append(False)  # Place hors service
+                    continue
+                id_etudiant = salle.occupants[topologie.index[(rangee, li, ci)]]
+                if id_etudiant < 0:
+                    ligne.append(None)
+                else:
+                    matiere = registre.matiere(id_etudiant)
+                    ligne.append((registre.nom(id_etudiant), matiere, couleurs_hex.get(matiere, "#808080"),
+                                  (rangee, li, ci) in places_en_conflit))
+            grille.append(ligne)
+        rangees.append((rangee, grille))
+    return {"nom": salle.nom, "slug": _slug(salle.nom), "occupees": salle.nombre_etudiants(),
+            "capacite": salle.capacite_totale(), "rangees": rangees}
+
+
+def _rendre_page_salle(donnees, sous_titre):
+    """Rend la page HTML d'une salle (mêmes grilles que `_dessiner_rangee_grille`)."""
+    titres = {'gauche': 'Rangée de gauche', 'milieu': 'Rangée centrale', 'droite': 'Rangée de droite'}
+    blocs = [f"<h1>Salle : {html.escape(donnees['nom'])}</h1>",
+             f"<p>Capacité: {donnees['capacite']} places &middot; Occupée: {donnees['occupees']} étudiants</p>"]
+    for rangee, grille in donnees["rangees"]:
+        entetes = "".join(f"<th>{ci + 1:02d}</th>" for ci in range(max(len(ligne) for ligne in grille)))
+        lignes = []
+        for li, ligne in enumerate(grille):
+            cellules = []
+            for ci, place in enumerate(ligne):
+                if place is False:
+                    cellules.append('<td class="hs" title="Place hors service"></td>')
+                elif place is None:
+                    cellules.append('<td class="vide"></td>')
+                else:
+                    nom, matiere, couleur, conflit = place
+                    classe = ' class="conflit"' if conflit else ""
+                    cellules.append(f'<td id="p-{rangee}-{li + 1}-{ci + 1}"{classe} style="background:{couleur}" '
+                                    f'title="{html.escape(matiere)}">{html.escape(nom)}</td>')
+            lignes.append(f"<tr><th>{li + 1:02d}</th>{''.join(cellules)}</tr>")
+        blocs.append(GABARIT_RANGEE_HTML.substitute(titre=titres.get(rangee, rangee), entetes=entetes,
+                                                    lignes="\n".join(lignes)))
+    return GABARIT_PAGE_HTML.substitute(titre=html.escape(f"Salle {donnees['nom']}"), racine="../",
+                                        sous_titre=html.escape(sous_titre), contenu="\n".join(blocs))
+
+
+def _ecrire_si_modifie(chemin, contenu, empreinte_precedente):
+    """
+    Écrit le fichier seulement si son contenu a changé.
+
+    Returns:
+        tuple: (empreinte du contenu, True si le fichier a été écrit).
+    """
+    donnees = contenu.encode("utf-8")
+    empreinte = hashlib.sha256(donnees).hexdigest()
+    if empreinte == empreinte_precedente and os.path.exists(chemin):
+        return empreinte, False
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    with open(chemin, "wb") as f:
+        f.write(donnees)
+    return empreinte, True
+
+
+def publier_site(salles, matieres_par_classe, date_epreuve, heure_debut, heure_fin, dossier, titre="Plans des salles d'examen", nb_taches=None):
+    """
+    Génère un site HTML statique à partir d'un plan: une page par salle, une page
+    d'index et des fichiers de recherche par étudiant fragmentés par initiale.
+
+    Les pages des salles sont rendues en parallèle et seules celles dont le
+    contenu a changé depuis la dernière publication sont réécrites.
+
+    Args:
+        salles (list): Objets Salle du plan.
+        matieres_par_classe (dict): Classe -> épreuve (pour les couleurs).
+        date_epreuve, heure_debut, heure_fin (str): Informations d'en-tête.
+        dossier (str): Dossier de destination (servable par tout serveur statique).
+        titre (str): Titre du site.
+        nb_taches (int): Nombre de tâches de rendu simultanées.
+
+    Returns:
+        dict: Nombre de fichiers écrits et inchangés.
+    """
+    sous_titre = f"{date_epreuve} · {heure_debut} - {heure_fin}"
+    couleurs_hex = couleurs_par_epreuve(matieres_par_classe)
+    audit = auditer_plan(salles)
+    salles_occupees = [salle for salle in salles if salle.nombre_etudiants() > 0]
+
+    chemin_manifeste = os.path.join(dossier, ".manifeste.json")
+    try:
+        with open(chemin_manifeste, encoding="utf-8") as f:
+            precedent = json.load(f)
+    except (OSError, ValueError):
+        precedent = {}
+    manifeste = {}
+    ecrits = 0
+
+    def publier_salle(salle):
+        donnees = _donnees_salle(salle, couleurs_hex, audit.places_en_conflit(salle))
+        chemin = os.path.join("salles", f"{donnees['slug']}.html")
+        empreinte, ecrit = _ecrire_si_modifie(os.path.join(dossier, chemin),
+                                              _rendre_page_salle(donnees, sous_titre), precedent.get(chemin))
+        return donnees, chemin, empreinte, ecrit
+
+    with ThreadPoolExecutor(max_workers=nb_taches) as executeur:
+        resultats = list(executeur.map(publier_salle, salles_occupees))
+    pages = []
+    for donnees, chemin, empreinte, ecrit in resultats:
+        pages.append(donnees)
+        manifeste[chemin] = empreinte
+        ecrits += ecrit
+
+    # Fichiers de recherche: chaque étudiant est indexé sous l'initiale de chacun de ses mots
+    fragments = {}
+    for donnees in pages:
+        for rangee, grille in donnees["rangees"]:
+            for li, ligne in enumerate(grille):
+                for ci, place in enumerate(ligne):
+                    if not place:
+                        continue
+                    nom, matiere = place[0], place[1]
+                    entree = {"n": nom, "s": donnees["nom"], "p": donnees["slug"], "a": f"p-{rangee}-{li + 1}-{ci + 1}",
+                              "r": rangee, "l": li + 1, "c": ci + 1, "m": matiere}
+                    for fragment in {_fragment_recherche(mot) for mot in str(nom).split()}:
+                        fragments.setdefault(fragment, []).append(entree)
+
+    lignes_index = "\n".join(
+        f'<tr><td><a href="salles/{d["slug"]}.html">{html.escape(d["nom"])}</a></td><td>{d["occupees"]}</td>'
+        f'<td>{d["capacite"]}</td><td>{html.escape(", ".join(f"{m}: {n}" for m, n in stats["effectifs"].items()))}</td></tr>'
+        for d, stats in zip(pages, (s for s in audit.par_salle if s["occupees"] > 0))
+    )
+    legende = "".join(f'<span style="background:{c}">{html.escape(str(e))}</span>' for e, c in couleurs_hex.items())
+    index = GABARIT_PAGE_HTML.substitute(
+        titre=html.escape(titre), racine="", sous_titre=html.escape(sous_titre),
+        contenu=GABARIT_INDEX_HTML.substitute(titre=html.escape(titre), sous_titre=html.escape(sous_titre),
+                                              lignes=lignes_index) + f'<p class="legende">{legende}</p>'
+    )
+    fichiers = {"index.html": index, "style.css": STYLE_SITE_CSS, "recherche.js": SCRIPT_RECHERCHE_JS}
+    for fragment, entrees in fragments.items():
+        fichiers[os.path.join("recherche", f"{fragment}.json")] = json.dumps(entrees, ensure_ascii=False)
+    for chemin, contenu in fichiers.items():
+        manifeste[chemin], ecrit = _ecrire_si_modifie(os.path.join(dossier, chemin), contenu, precedent.get(chemin))
+        ecrits += ecrit
+
+    # Suppression des pages et fragments qui n'existent plus dans ce plan
+    for chemin in set(precedent) - set(manifeste):
+        try:
+            os.remove(os.path.join(dossier, chemin))
+        except OSError:
+            pass
+
+    with open(chemin_manifeste, "w", encoding="utf-8") as f:
+        json.dump(manifeste, f)
+    return {"ecrits": ecrits, "inchanges": len(manifeste) - ecrits}
+
+# Fonction de réinitialisation de la session
@@ -0,0 +1,614 @@
+"""Génération du PDF avec layout visuel des salles (reportlab, PyPDF2)."""
+import io
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.colors import HexColor, red
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from PyPDF2 import PdfWriter  # Pour fusionner avec la première page existante
+
+from .audit import auditer_plan
+from .couleurs import couleurs_par_epreuve
+
+# Réglage global de reportlab lu à l'écriture du fichier: partagé par les exports simultanés
+_verrou_flux = threading.Lock()
+
+
+# --- Fonctions utilitaires pour le dessin PDF ---
+def _police_grasse(font_name):
+    """Variante grasse d'une police (la police elle-même si aucune n'est connue)."""
+    grasse = {"TimesNewRoman": "TimesNewRoman-Bold", "Times-Roman": "Times-Bold"}.get(font_name, font_name)
+    if grasse in pdfmetrics.standardFonts or grasse in pdfmetrics.getRegisteredFontNames():
+        return grasse
+    return font_name
+
+
+def _police_embarquee():
+    """
+    Enregistre Times New Roman (times.ttf, et timesbd.ttf pour le gras) auprès de reportlab.
+
+    reportlab n'embarque d'une police TrueType que le sous-ensemble des glyphes
+    utilisés, en Unicode: les noms hors de l'alphabet latin-1 s'affichent.
+
+    Returns:
+        str | None: Nom de la police, None si le fichier est introuvable.
+    """
+    if "TimesNewRoman" not in pdfmetrics.getRegisteredFontNames():
+        try:
+            pdfmetrics.registerFont(TTFont('TimesNewRoman', 'times.ttf'))
+        except Exception:
+            return None
+        try:
+            pdfmetrics.registerFont(TTFont('TimesNewRoman-Bold', 'timesbd.ttf'))
+        except Exception:
+            pass  # Ignorer si la police bold n'est pas disponible
+    return "TimesNewRoman"
+
+
+def _lignes_nom(nom_etudiant, largeur_cellule):
+    """
+    Texte d'une place: une ligne, ou prénom et nom sur deux lignes si la cellule est assez large.
+
+    Returns:
+        list: (décalage vertical depuis le centre de la cellule, texte)
+    """
+    nom_court = nom_etudiant[:18] if nom_etudiant else ""  # Augmenter à 18 caractères max
+    parties_nom = nom_court.split(' ')
+    if len(parties_nom) == 1 or largeur_cellule < 2.2 * cm:
+        # Afficher sur une seule ligne si une seule partie ou cellule encore trop petite
+        return [(-2, nom_court[:15])]  # Centrer verticalement avec plus d'espace
+    # Si deux parties (prénom nom), les afficher sur deux lignes (prénom en haut)
+    return [(4, parties_nom[0][:10]), (-6, parties_nom[1][:10])]
+
+
+def _dessiner_rangee_grille(canvas, x_pos, y_pos, rangee, largeur_cellule, hauteur_cellule, 
+                           couleur_par_epreuve, font_name="Helvetica", padding=0.1*cm, places_en_conflit=None,
+                           masque=None):
+    """
+    Dessine une rangée de sièges comme une grille visuelle dans le PDF.
+    
+    Args:
+        canvas: Canvas ReportLab où dessiner
+        x_pos, y_pos: Position de départ (haut gauche)
+        rangee: Liste de listes représentant la rangée et ses places
+        largeur_cellule, hauteur_cellule: Dimensions des cellules
+        couleur_par_epreuve: Dictionnaire associant chaque épreuve à une couleur
+        font_name: Nom de la police à utiliser
+        padding: Espacement interne dans les cellules
+        places_en_conflit: Ensemble de (ligne, colonne) à encadrer en rouge (voisin de même matière)
+        masque: Lignes de booléens (False pour une place hors service), voir `TopologieSalle.masques`
+    
+    Returns:
+        y_final: Position Y après la grille (pour continuer le dessin après)
+    """    # Numéros de colonnes - optimisés pour plus de colonnes
+    canvas.setFont(_police_grasse(font_name), 10)  # Police plus grande
+    for col_idx in range(max((len(ligne) for ligne in rangee), default=0)):
+        canvas.setFillColor(colors.lightgrey)
+        canvas.rect(x_pos + (col_idx * largeur_cellule), y_pos, largeur_cellule, hauteur_cellule, fill=1, stroke=1)
+        canvas.setFillColor(colors.black)
+        canvas.drawCentredString(
+            x_pos + (col_idx * largeur_cellule) + (largeur_cellule / 2),
+            y_pos + (hauteur_cellule / 2) - 1,  # Centrer mieux
+            f"{col_idx+1:02d}"
+        )
+    
+    # Dessiner les lignes avec leurs places
+    y_current = y_pos - hauteur_cellule
+    
+    for ligne_idx, ligne in enumerate(rangee):
+        # Numéro de ligne (première colonne) - optimisé
+        canvas.setFillColor(colors.lightgrey)
+        canvas.rect(x_pos - hauteur_cellule, y_current, hauteur_cellule, hauteur_cellule, fill=1, stroke=1)
+        canvas.setFillColor(colors.black)
+        canvas.setFont(_police_grasse(font_name), 10)  # Police cohérente plus grande
+        canvas.drawCentredString(
+            x_pos - (hauteur_cellule / 2),
+            y_current + (hauteur_cellule / 2) - 1,  # Centrer mieux
+            f"{ligne_idx+1:02d}"
+        )
+        
+        # Dessiner chaque place
+        for col_idx, place in enumerate(ligne):
+            x_cell = x_pos + (col_idx * largeur_cellule)
+            
+            # Place hors service: cellule grise barrée, sans texte
+            if masque is not None and not masque[ligne_idx][col_idx]:
+                canvas.setFillColor(colors.grey)
+                canvas.rect(x_cell, y_current, largeur_cellule, hauteur_cellule, fill=1, stroke=1)
+                canvas.line(x_cell, y_current, x_cell + largeur_cellule, y_current + hauteur_cellule)
+                continue
+            
+            # Dessiner la cellule
+            if place:  # Cellule occupée
+                nom_etudiant, matiere = place
+                couleur = couleur_par_epreuve.get(matiere, colors.white)
+                canvas.setFillColor(couleur)
+            else:
+                canvas.setFillColor(colors.white)
+            
+            # Rectangle de la place
+            canvas.rect(x_cell, y_current, largeur_cellule, hauteur_cellule, fill=1, stroke=1)
+            
+            # Encadré rouge si la place a un voisin de même matière (audit)
+            if places_en_conflit and (ligne_idx, col_idx) in places_en_conflit:
+                canvas.saveState()
+                canvas.setStrokeColor(red)
+                canvas.setLineWidth(2)
+                canvas.rect(x_cell + 1, y_current + 1, largeur_cellule - 2, hauteur_cellule - 2, fill=0, stroke=1)
+                canvas.restoreState()
+            
+            # Texte de la place (nom de l'étudiant)
+            if place:
+                nom_etudiant, _ = place
+                canvas.setFillColor(colors.white)  # Texte blanc sur fond coloré
+                canvas.setFont(font_name, 8)  # Police plus grande pour s'adapter aux cellules plus grandes
+
+                # Diviser le nom pour l'affichage optimisé dans des cellules plus grandes
+                for decalage, texte in _lignes_nom(nom_etudiant, largeur_cellule):
+                    canvas.drawCentredString(
+                        x_cell + (largeur_cellule / 2),
+                        y_current + (hauteur_cellule / 2) + decalage,
+                        texte
+                    )
+        
+        y_current -= hauteur_cellule
+    
+    return y_current  # Retourner la position Y finale
+
+def _dessiner_porte(canvas, x, y, largeur=2*cm, hauteur=1.5*cm, font_name="Helvetica"):
+    """
+    Dessine une représentation réaliste d'une porte dans le PDF.
+    
+    Args:
+        canvas: Canvas ReportLab où dessiner
+        x, y: Position de départ (bas gauche)
+        largeur, hauteur: Dimensions de la porte
+        font_name: Nom de la police à utiliser
+    """
+    # Dessin du cadre de la porte (rectangle extérieur)
+    canvas.setStrokeColor(colors.black)
+    canvas.setFillColor(colors.lightgrey)
+    canvas.rect(x, y, largeur, hauteur, fill=1, stroke=1)
+    
+    # Dessin de la porte elle-même (rectangle intérieur)
+    door_inset = 0.1 * cm
+    canvas.setFillColor(colors.darkgrey)
+    canvas.rect(x + door_inset, y + door_inset, 
+               largeur - (2 * door_inset), hauteur - (2 * door_inset), fill=1, stroke=0)
+    
+    # Panneau de la porte (lignes de détail)
+    panel_inset = 0.3 * cm
+    canvas.setStrokeColor(colors.black)
+    canvas.setLineWidth(0.5)
+    canvas.rect(x + panel_inset, y + panel_inset,
+               largeur - (2 * panel_inset), hauteur - (2 * panel_inset), fill=0, stroke=1)
+    
+    # Poignée de porte
+    canvas.setFillColor(colors.black)
+    canvas.circle(x + largeur - (0.5 * cm), y + (hauteur / 2), 0.1 * cm, fill=1, stroke=0)
+    
+    # Trait pour la poignée
+    canvas.setLineWidth(1)
+    canvas.line(x + largeur - (0.7 * cm), y + (hauteur / 2),
+               x + largeur - (0.4 * cm), y + (hauteur / 2))
+    
+    # Étiquette pour la porte
+    canvas.setFont(_police_grasse(font_name), 9)
+    canvas.setFillColor(colors.black)
+    canvas.drawCentredString(x + (largeur / 2), y - 0.3 * cm, "PORTE PRINCIPALE")
+
+# --- Dessin compact: formulaires partagés et chemins groupés ---
+def _formulaire_grille(canvas, longueurs, largeur_cellule, hauteur_cellule, font_name):
+    """
+    Squelette d'une grille (en-têtes numérotés et bordures de toutes les
+    cellules), dessiné une seule fois par géométrie comme formulaire (XObject)
+    réutilisé par toutes les pages.
+
+    Le formulaire a pour origine le coin bas gauche de la cellule d'en-tête de
+    la première colonne, comme `x_pos, y_pos` dans `_dessiner_rangee_grille`.
+
+    Args:
+        longueurs (tuple): Nombre de places de chaque ligne.
+
+    Returns:
+        str: Nom du formulaire, pour `canvas.doForm`.
+    """
+    nb_colonnes = max(longueurs, default=0)
+    forme = f"{len(longueurs)}x{nb_colonnes}" if len(set(longueurs)) <= 1 else f"{zlib.crc32(repr(longueurs).encode()):08x}"
+    nom = f"grille_{forme}_{largeur_cellule:.1f}x{hauteur_cellule:.1f}_{font_name}"
+    if canvas.hasForm(nom):
+        return nom
+    canvas.beginForm(nom, -hauteur_cellule - 1, -len(longueurs) * hauteur_cellule - 1,
+                     nb_colonnes * largeur_cellule + 1, hauteur_cellule + 1)
+    entetes = canvas.beginPath()
+    for col_idx in range(nb_colonnes):
+        entetes.rect(col_idx * largeur_cellule, 0, largeur_cellule, hauteur_cellule)
+    for ligne_idx in range(len(longueurs)):
+        entetes.rect(-hauteur_cellule, -(ligne_idx + 1) * hauteur_cellule, hauteur_cellule, hauteur_cellule)
+    canvas.setFillColor(colors.lightgrey)
+    canvas.drawPath(entetes, fill=1, stroke=1)
+    bordures = canvas.beginPath()
+    for ligne_idx, longueur in enumerate(longueurs):
+        for col_idx in range(longueur):
+            bordures.rect(col_idx * largeur_cellule, -(ligne_idx + 1) * hauteur_cellule, largeur_cellule, hauteur_cellule)
+    canvas.drawPath(bordures, fill=0, stroke=1)
+
+    police = _police_grasse(font_name)
+    texte = canvas.beginText()
+    texte.setFont(police, 10)
+    texte.setFillColor(colors.black)
+    for col_idx in range(nb_colonnes):
+        numero = f"{col_idx+1:02d}"
+        texte.setTextOrigin(round(col_idx * largeur_cellule + (largeur_cellule - pdfmetrics.stringWidth(numero, police, 10)) / 2, 1),
+                            round(hauteur_cellule / 2 - 1, 1))
+        texte.textOut(numero)
+    for ligne_idx in range(len(longueurs)):
+        numero = f"{ligne_idx+1:02d}"
+        texte.setTextOrigin(round(-(hauteur_cellule + pdfmetrics.stringWidth(numero, police, 10)) / 2, 1),
+                            round(-(ligne_idx + 1) * hauteur_cellule + hauteur_cellule / 2 - 1, 1))
+        texte.textOut(numero)
+    canvas.drawText(texte)
+    canvas.endForm()
+    return nom
+
+
+def _dessiner_rangee_grille_compacte(canvas, x_pos, y_pos, rangee, largeur_cellule, hauteur_cellule,
+                                     couleur_par_epreuve, font_name="Helvetica", places_en_conflit=None,
+                                     masque=None):
+    """
+    Même rendu que `_dessiner_rangee_grille`, avec un flux PDF réduit.
+
+    Le squelette de la grille est partagé (`_formulaire_grille`); les fonds
+    sont tracés en unités de cellule, un chemin par couleur; les encadrés
+    rouges forment un seul chemin et tous les noms un seul objet texte, en
+    coordonnées relatives à la grille arrondies au dixième de point.
+
+    Returns:
+        y_final: Position Y après la grille (pour continuer le dessin après)
+    """
+    fonds = {}  # couleur -> chemin des cellules de cette couleur (unités de cellule)
+    barres, encadres = canvas.beginPath(), canvas.beginPath()
+    nb_barres = nb_encadres = 0
+    noms = canvas.beginText()
+    noms.setFont(font_name, 8)
+    for ligne_idx, ligne in enumerate(rangee):
+        y_cell = -(ligne_idx + 1) * hauteur_cellule
+        for col_idx, place in enumerate(ligne):
+            x_cell = col_idx * largeur_cellule
+            if masque is not None and not masque[ligne_idx][col_idx]:
+                couleur = colors.grey
+                barres.moveTo(round(x_cell, 1), round(y_cell, 1))
+                barres.lineTo(round(x_cell + largeur_cellule, 1), round(y_cell + hauteur_cellule, 1))
+                nb_barres += 1
+            else:
+                couleur = couleur_par_epreuve.get(place[1], colors.white) if place else colors.white
+            if couleur not in fonds:
+                fonds[couleur] = canvas.beginPath()
+            fonds[couleur].rect(col_idx, -(ligne_idx + 1), 1, 1)
+            if couleur is colors.grey:
+                continue
+            if places_en_conflit and (ligne_idx, col_idx) in places_en_conflit:
+                encadres.rect(round(x_cell + 1, 1), round(y_cell + 1, 1),
+                              round(largeur_cellule - 2, 1), round(hauteur_cellule - 2, 1))
+                nb_encadres += 1
+            if place:
+                for decalage, texte in _lignes_nom(place[0], largeur_cellule):
+                    if texte:
+                        noms.setTextOrigin(round(x_cell + (largeur_cellule - pdfmetrics.stringWidth(texte, font_name, 8)) / 2, 1),
+                                           round(y_cell + (hauteur_cellule / 2) + decalage, 1))
+                        noms.textOut(texte)
+
+    canvas.saveState()
+    canvas.translate(x_pos, y_pos)
+    canvas.saveState()
+    canvas.scale(largeur_cellule, hauteur_cellule)
+    for couleur, chemin in fonds.items():
+        canvas.setFillColor(couleur)
+        canvas.drawPath(chemin, fill=1, stroke=0)
+    canvas.restoreState()
+    canvas.doForm(_formulaire_grille(canvas, tuple(len(ligne) for ligne in rangee),
+                                     largeur_cellule, hauteur_cellule, font_name))
+    if nb_barres:  # Un chemin vide ne se trace pas
+        canvas.drawPath(barres, fill=0, stroke=1)
+    if nb_encadres:
+        canvas.setStrokeColor(red)
+        canvas.setLineWidth(2)
+        canvas.drawPath(encadres, fill=0, stroke=1)
+    canvas.setFillColor(colors.white)  # Texte blanc sur fond coloré
+    canvas.drawText(noms)
+    canvas.restoreState()
+    return y_pos - len(rangee) * hauteur_cellule - hauteur_cellule
+
+
+def _dessiner_porte_compacte(canvas, x, y, largeur=2*cm, hauteur=1.5*cm, font_name="Helvetica"):
+    """Porte de `_dessiner_porte`, dessinée une fois comme formulaire puis réutilisée sur chaque page."""
+    nom = f"porte_{largeur:.1f}x{hauteur:.1f}_{font_name}"
+    if not canvas.hasForm(nom):
+        canvas.beginForm(nom, -largeur, -hauteur, 2 * largeur, hauteur)
+        _dessiner_porte(canvas, 0, 0, largeur, hauteur, font_name)
+        canvas.endForm()
+    canvas.saveState()
+    canvas.translate(x, y)
+    canvas.doForm(nom)
+    canvas.restoreState()
+
+
+@contextmanager
+def _flux(binaires):
+    """
+    Écriture du canevas avec ou sans la surcouche ASCII85 des flux compressés.
+
+    Les flux binaires (mode compact) sont 25 % plus petits. Le réglage de
+    reportlab est global: les écritures sont sérialisées pour qu'un export
+    standard ne soit jamais écrit avec le réglage d'un export compact
+    simultané (et inversement).
+    """
+    with _verrou_flux:
+        ascii85 = rl_config.useA85
+        rl_config.useA85 = 0 if binaires else ascii85
+        try:
+            yield
+        finally:
+            rl_config.useA85 = ascii85
+
+
+# --- Génération du PDF avec layout visuel des salles ---
+def generer_pdf(salles, semestre, date_epreuve, heure_debut, heure_fin, matieres_par_classe, chemin_pdf="repartition_examens.pdf",
+                compact=False):
+    """
+    Génère un PDF avec un layout visuel des salles d'examen montrant l'arrangement des sièges.
+    Chaque salle utilisée aura sa propre page avec un tableau représentant la disposition physique.
+    Inclut la première page du fichier '20250130_Répartition_S1N.pdf' comme page de couverture.
+
+    En mode compact (fichiers archivés, envoyés et ouverts sur téléphone), le
+    rendu est le même mais le fichier est bien plus petit: flux de contenu
+    compressés en binaire (la police reste embarquée en sous-ensemble), en-têtes de
+    grille et porte partagés entre les pages (formulaires), cellules groupées
+    par couleur et noms regroupés en un objet texte par grille.
+
+    Returns:
+        dict: "pages" (nombre de pages, couverture comprise), "octets" (taille du fichier)
+        et "couverture" (vrai si la page de couverture a été incluse).
+    """
+    # Pages de layout générées en mémoire, puis fusionnées avec la couverture
+    tampon_pages = io.BytesIO()
+    
+    # Times New Roman embarquée (sous-ensemble des glyphes utilisés); à défaut, une police standard
+    # des lecteurs PDF (alphabet latin-1 seulement)
+    font_name = _police_embarquee() or ("Times-Roman" if compact else "Helvetica")
+
+    # Initialisation du canevas PDF pour les pages de layout
+    page_size = landscape(A4)  # Utilisation du format paysage pour plus d'espace horizontal
+    c = canvas.Canvas(tampon_pages, pagesize=page_size, pageCompression=1 if compact else None,
+                      initialFontName=font_name if compact else None)
+    largeur, hauteur = page_size  # En paysage: largeur = 29.7cm, hauteur = 21cm
+    marge_gauche = 1.5 * cm  # Réduire les marges pour plus d'espace
+    marge_droite = 1.5 * cm
+    marge_haut = hauteur - 1.5 * cm  # Réduire la marge haute
+    taille_titre = 16
+    taille_texte = 10
+    dessiner_rangee = _dessiner_rangee_grille_compacte if compact else _dessiner_rangee_grille
+    dessiner_porte = _dessiner_porte_compacte if compact else _dessiner_porte
+
+    # --- Page de légende des couleurs par matière (seconde page après la couverture) ---
+    # Titre centré pour la légende
+    c.setFont(_police_grasse(font_name), taille_titre)
+    c.drawCentredString(largeur / 2, marge_haut, f"LÉGENDE DES MATIÈRES - {semestre}")
+    c.setFont(font_name, 12)
+    c.drawCentredString(largeur / 2, marge_haut - 1 * cm, f"Date: {date_epreuve} | {heure_debut} - {heure_fin}")
+    
+    # --- Légende des couleurs par matière ---
+    c.setFont(_police_grasse(font_name), 14)
+    c.drawCentredString(largeur / 2, marge_haut - 2 * cm, "Légende des couleurs par matière:")
+    
+    # Obtenir les matières uniques pour la légende
+    couleur_par_epreuve = {epreuve: HexColor(couleur) for epreuve, couleur in couleurs_par_epreuve(matieres_par_classe).items()}
+    epreuves_uniques = list(couleur_par_epreuve)
+    
+    # Calculer la mise en page de la légende - optimisée pour le mode paysage
+    # Nombre de colonnes pour la légende
+    nb_colonnes = 3  # Plus de colonnes en mode paysage
+    nb_epreuves = len(epreuves_uniques)
+    items_par_colonne = (nb_epreuves + (nb_colonnes - 1)) // nb_colonnes  # Arrondi au supérieur
+    
+    # Dessiner les rectangles de couleur avec leur nom de matière
+    y_pos = marge_haut - 3.5 * cm  # Position plus haute car moins d'éléments sur la page
+    starting_y_pos = y_pos
+    
+    for i, epreuve in enumerate(epreuves_uniques):
+        # Calculer la position X, Y pour une mise en page multi-colonnes
+        colonne = i // items_par_colonne
+        position_dans_colonne = i % items_par_colonne
+        
+        x_pos = marge_gauche + colonne * (largeur / 3)  # Diviser l'espace horizontal en 3 colonnes
+        y_pos = starting_y_pos - (position_dans_colonne * 0.8 * cm)
+        
+        couleur = couleur_par_epreuve[epreuve]
+        
+        # Rectangle de couleur - plus grand en mode paysage
+        c.setFillColor(couleur)
+        c.rect(x_pos, y_pos, 1.5 * cm, 0.8 * cm, fill=1, stroke=0)
+        
+        # Nom de l'épreuve - police plus grande et en gras pour meilleure lisibilité
+        c.setFillColor(colors.black)
+        c.setFont(_police_grasse(font_name), 14)  # Police plus grande et gras
+        c.drawString(x_pos + 2 * cm, y_pos + 0.3 * cm, f"{epreuve}")
+    
+    # Texte explicatif en bas de la page de légende
+    c.setFont(font_name, 10)
+    c.drawCentredString(largeur / 2, 3 * cm, "Les couleurs ci-dessus sont utilisées pour identifier les matières dans les plans de salles.")
+    c.drawCentredString(largeur / 2, 2.5 * cm, "Chaque étudiant est placé de façon à éviter que deux étudiants de la même matière soient côte à côte.")
+    
+    c.showPage()
+
+    # Audit du plan pour signaler les voisinages de même matière
+    audit = auditer_plan(salles)
+
+    # --- Pages pour chaque salle avec layout visuel ---
+    for salle in salles:
+        if salle.nombre_etudiants() == 0:
+            continue  # Ignorer les salles vides
+            
+        # En-tête de la page pour la salle
+        c.setFont(_police_grasse(font_name), taille_titre + 2)  # Taille augmentée et gras
+        c.drawCentredString(largeur / 2, marge_haut, f"Salle : {salle.nom}")
+        
+        # Informations sur la salle
+        c.setFont(font_name, 12)
+        capacite_totale = salle.capacite_totale()
+        etudiants_places = salle.nombre_etudiants()
+        c.drawString(marge_gauche, marge_haut - 1.5 * cm, f"Capacité: {capacite_totale} places")
+        c.drawString(marge_gauche + 6 * cm, marge_haut - 1.5 * cm, f"Occupée: {etudiants_places} étudiants")
+        c.drawString(marge_gauche + 12 * cm, marge_haut - 1.5 * cm, f"Taux: {(etudiants_places/capacite_totale)*100:.1f}%")
+        conflits_salle = audit.places_en_conflit(salle)
+        if conflits_salle:
+            c.drawString(marge_gauche + 18 * cm, marge_haut - 1.5 * cm, f"Places à surveiller (encadrées): {len(conflits_salle)}")
+
+        y_current = marge_haut - 2.5 * cm  # Commencer plus haut pour plus d'espace pour les tableaux
+        
+        # Créer le layout visuel pour chaque rangée
+        rangee_titles = {'gauche': 'Rangée de gauche', 'milieu': 'Rangée centrale', 'droite': 'Rangée de droite'}
+        
+        # Préparer les couleurs pour les épreuves
+        couleur_par_epreuve = {epreuve: HexColor(couleur) for epreuve, couleur in couleurs_par_epreuve(matieres_par_classe).items()}
+        
+        # Préparer les rangées à afficher
+        rangees_a_afficher = []
+        for rangee_nom in salle.topologie.rangees:
+            rangee = salle.grille(rangee_nom)
+            if rangee and not all(len(ligne) == 0 for ligne in rangee):
+                rangees_a_afficher.append((rangee_nom, rangee))
+        
+        # Traiter les rangées en essayant de maximiser l'utilisation de l'espace
+        i = 0
+        while i < len(rangees_a_afficher):
+            # Calculer l'espace disponible sur la page actuelle
+            espace_disponible_page = y_current - 5 * cm  # Garder 5cm en bas pour la date et la porte
+            
+            # Essayer d'ajouter autant de rangées que possible sur cette page
+            rangees_pour_cette_page = []
+            espace_utilise = 0
+            
+            for j in range(i, len(rangees_a_afficher)):
+                rangee_nom, rangee = rangees_a_afficher[j]
+                
+                # Calculer les dimensions pour cette rangée
+                max_cols = max(len(ligne) for ligne in rangee) if rangee else 0
+                if max_cols == 0:
+                    continue
+                
+                # Calculer la largeur des cellules pour s'adapter à la page paysage
+                espace_disponible_largeur = largeur - 6*cm  # 6cm de marges totales
+                largeur_cellule = min(2.8, espace_disponible_largeur / max_cols) * cm  # Augmenter la taille max des cellules
+                hauteur_cellule = 1.2 * cm  # Augmenter la hauteur des cellules
+                
+                # Calculer l'espace nécessaire pour cette rangée (plus d'espace)
+                hauteur_rangee_titre = 1.8 * cm  # Augmenter l'espace du titre
+                hauteur_grille = hauteur_cellule * (len(rangee) + 1)  # +1 pour l'en-tête des colonnes
+                hauteur_rangee_totale = hauteur_rangee_titre + hauteur_grille + 1.5 * cm  # Augmenter l'espacement
+                
+                # Vérifier si on peut ajouter cette rangée à la page actuelle
+                if espace_utilise + hauteur_rangee_totale <= espace_disponible_page:
+                    rangees_pour_cette_page.append((j, rangee_nom, rangee, largeur_cellule, hauteur_cellule, hauteur_rangee_totale))
+                    espace_utilise += hauteur_rangee_totale
+                else:
+                    # Cette rangée ne rentre pas, arrêter l'ajout pour cette page
+                    break
+            
+            # Si aucune rangée ne peut être ajoutée (cas d'une rangée trop grande), forcer l'ajout d'au moins une
+            if not rangees_pour_cette_page and i < len(rangees_a_afficher):
+                rangee_nom, rangee = rangees_a_afficher[i]
+                max_cols = max(len(ligne) for ligne in rangee) if rangee else 0
+                if max_cols > 0:
+                    espace_disponible_largeur = largeur - 6*cm
+                    largeur_cellule = min(2.5, espace_disponible_largeur / max_cols) * cm  # Cellules plus grandes même en cas de force
+                    hauteur_cellule = 1.0 * cm  # Hauteur plus grande même en cas de force
+                    hauteur_rangee_titre = 1.8 * cm
+                    hauteur_grille = hauteur_cellule * (len(rangee) + 1)
+                    hauteur_rangee_totale = hauteur_rangee_titre + hauteur_grille + 1.5 * cm
+                    rangees_pour_cette_page.append((i, rangee_nom, rangee, largeur_cellule, hauteur_cellule, hauteur_rangee_totale))
+            
+            # Dessiner toutes les rangées pour cette page
+            for idx, rangee_nom, rangee, largeur_cellule, hauteur_cellule, hauteur_rangee_totale in rangees_pour_cette_page:
+                # Afficher le titre de la rangée
+                c.setFont(_police_grasse(font_name), 16)  # Police plus grande pour le titre
+                c.drawString(marge_gauche, y_current, rangee_titles.get(rangee_nom, f"Rangée {rangee_nom}"))
+                y_current -= 1.8 * cm  # Espacement augmenté entre titre et tableau
+                
+                # Dessiner la grille de la rangée
+                x_pos_start = marge_gauche + 1.0 * cm  # Réduire le décalage
+                y_final = dessiner_rangee(
+                    c, x_pos_start, y_current, rangee, largeur_cellule, hauteur_cellule, 
+                    couleur_par_epreuve, font_name,
+                    places_en_conflit={(li, ci) for r, li, ci in conflits_salle if r == rangee_nom},
+                    masque=salle.topologie.masques[rangee_nom]
+                )
+                
+                # Mettre à jour la position Y pour la prochaine rangée (espacement augmenté)
+                y_current = y_final - 1.5 * cm
+            
+            # Passer aux rangées suivantes (celles qui n'ont pas été traitées sur cette page)
+            i += len(rangees_pour_cette_page)
+            
+            # Si toutes les rangées de cette page ont été traitées et qu'il en reste d'autres
+            if i < len(rangees_a_afficher):
+                # Vérifier s'il faut une nouvelle page pour les rangées suivantes (critère plus restrictif)
+                espace_restant = y_current - 5 * cm
+                if espace_restant < 6 * cm:  # Seulement si moins de 6cm restants (au lieu de 8cm)
+                    c.showPage()
+                    c.setFont(_police_grasse(font_name), taille_titre + 2)
+                    c.drawCentredString(largeur / 2, marge_haut, f"Salle : {salle.nom} (suite)")
+                    y_current = marge_haut - 2.5 * cm
+        
+        # Date et heure en bas de page
+        c.setFillColor(colors.black)
+        c.setFont(font_name, taille_texte)
+        c.drawString(marge_gauche, 2 * cm, f"{date_epreuve}    {heure_debut} - {heure_fin}")
+        
+        # Utiliser la fonction utilitaire pour dessiner une porte réaliste
+        dessiner_porte(c, largeur - 4 * cm, 2.7 * cm, 2 * cm, 1.5 * cm, font_name)
+        
+        c.showPage()
+
+    # Finaliser les pages de layout
+    with _flux(binaires=compact):
+        c.save()
+    tampon_pages.seek(0)
+    
+    # Fusionner les PDFs: 
+    # 1. La première page du fichier "20250130_Répartition_S1N.pdf" comme couverture
+    # 2. Les pages de layout générées
+    
+    writer = PdfWriter()
+    
+    # 1. Ajouter la première page du fichier couverture
+    cover_pdf_path = "20250130_Répartition_S1N.pdf"
+    
+    if os.path.exists(cover_pdf_path):
+        try:
+            writer.append(cover_pdf_path, pages=(0, 1))  # Uniquement la première page
+            if compact and len(writer.pages):
+                writer.pages[0].compress_content_streams()
+        except Exception as e:
+            print(f"Erreur lors de l'accès au fichier de couverture: {e}")
+            # En cas d'erreur, continuer sans la page de couverture
+    else:
+        print(f"Fichier de couverture '{cover_pdf_path}' non trouvé.")
+    
+    avec_couverture = len(writer.pages) > 0
+    
+    # 2. Ajouter les pages de layout générées
+    writer.append(tampon_pages)
+    
+    # Sauvegarder le PDF final
+    with open(chemin_pdf, "wb") as f:
+        writer.write(f)
+    return {"pages": len(writer.pages), "octets": os.path.getsize(chemin_pdf), "couverture": avec_couverture}
@@ -0,0 +1,311 @@
+"""
+Colonnes de classeurs en mémoire partagée, communes aux processus d'une machine.
+
+Plusieurs serveurs Streamlit, le pool du service et celui des scénarios lisent
+souvent le même classeur d'étudiants. Le premier processus qui le lit publie
+ses colonnes dans un segment `multiprocessing.shared_memory` nommé d'après
+l'empreinte du contenu; les suivants s'y attachent sans relire le classeur ni
+copier le segment: chaque valeur n'est décodée qu'à la lecture.
+
+Format du segment (entiers petit-boutistes)::
+
+    "RPC1" | lecteurs (u32) | valeurs N (u32) | taille de l'index J (u32)
+    index JSON [[feuille, début, fin], ...] (J octets)
+    décalages (N + 1 x u64) | types (N octets: s, i, f, b) | textes UTF-8
+
+Le compteur de lecteurs, modifié sous un verrou de fichier, compte les
+`ColonnesPartagees` ouvertes dans tous les processus: le dernier qui se
+détache supprime le segment. Un processus tué sans se détacher laisse le
+segment en place (jusqu'au redémarrage ou `supprimer_segment`). Sans
+`fcntl` (Windows), le système libère lui-même le segment au dernier
+détachement et le verrou n'est que local au processus.
+
+Désactivable avec REPARTITION_MEMOIRE_PARTAGEE=0.
+"""
+import json
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory, util
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# --- Paramètres ---
+ACTIVE = os.environ.get("REPARTITION_MEMOIRE_PARTAGEE", "1") != "0"
+PREFIXE = "repartition_"
+MAGIQUE = b"RPC1"
+ENTETE = struct.Struct("<4sIII")
+FICHIER_VERROU = os.path.join(tempfile.gettempdir(), "repartition_memoire.lock")
+_verrou_local = threading.RLock()
+_tenu = threading.local()  # Profondeur du verrou machine dans le thread (détachement pendant une publication)
+
+
+def nom_segment(empreinte):
+    """Nom du segment d'un classeur (court: 31 caractères au plus sous macOS)."""
+    return PREFIXE + empreinte[:18]
+
+
+@contextmanager
+def _verrou_machine():
+    """Verrou commun à tous les processus de la machine (et aux threads du processus), réentrant."""
+    with _verrou_local:
+        profondeur = getattr(_tenu, "profondeur", 0)
+        if fcntl is None or profondeur:
+            _tenu.profondeur = profondeur + 1
+            try:
+                yield
+            finally:
+                _tenu.profondeur = profondeur
+            return
+        with open(FICHIER_VERROU, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            _tenu.profondeur = 1
+            try:
+                yield
+            finally:
+                _tenu.profondeur = 0
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _ouvrir(nom, taille=0):
+    """
+    Ouvre (taille nulle) ou crée un segment, sans le confier au suivi de `multiprocessing`.
+
+    Le suivi supprimerait le segment à la sortie de chaque processus qui l'a
+    ouvert; sa durée de vie dépend ici du compteur de lecteurs.
+    """
+    segment = shared_memory.SharedMemory(nom, create=taille > 0, size=taille)
+    if fcntl is not None:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _supprimer(segment):
+    """Supprime un segment ouvert par `_ouvrir` (`unlink` le retire aussi du suivi)."""
+    if fcntl is not None:
+        resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+def _lecteurs(segment, increment):
+    """Ajoute `increment` au compteur de lecteurs du segment et retourne la nouvelle valeur."""
+    magique, lecteurs, n, j = ENTETE.unpack_from(segment.buf)
+    lecteurs = max(0, lecteurs + increment)
+    ENTETE.pack_into(segment.buf, 0, magique, lecteurs, n, j)
+    return lecteurs
+
+
+def _detacher(segment, vue):
+    with _verrou_machine():
+        vue.release()
+        reste = _lecteurs(segment, -1)
+        segment.close()
+        if reste == 0 and fcntl is not None:
+            try:
+                _supprimer(segment)
+            except FileNotFoundError:
+                pass
+
+
+# --- Encodage des valeurs ---
+def _encoder(valeur):
+    if isinstance(valeur, str):
+        return b"s", valeur.encode("utf-8")
+    if isinstance(valeur, bool):
+        return b"b", b"1" if valeur else b""
+    if isinstance(valeur, int):
+        return b"i", str(valeur).encode("ascii")
+    if isinstance(valeur, float):
+        return b"f", repr(valeur).encode("ascii")
+    return b"s", str(valeur).encode("utf-8")  # Dates, etc.: libellé, comme l'affiche le moteur
+
+
+def _decoder(type_valeur, octets):
+    if type_valeur == ord("s"):
+        return octets.decode("utf-8")
+    if type_valeur == ord("i"):
+        return int(octets)
+    if type_valeur == ord("f"):
+        return float(octets)
+    return bool(octets)
+
+
+# --- Lecture sans copie ---
+class ColonnePartagee(Sequence):
+    """Valeurs d'une feuille, décodées à la demande depuis le segment."""
+    __slots__ = ("_parent", "_debut", "_fin")
+
+    def __init__(self, parent, debut, fin):
+        self._parent, self._debut, self._fin = parent, debut, fin
+
+    def __len__(self):
+        return self._fin - self._debut
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return tuple(self[i] for i in range(*position.indices(len(self))))
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self._parent._valeur(self._debut + position)
+
+    def __iter__(self):
+        valeur = self._parent._valeur
+        return (valeur(i) for i in range(self._debut, self._fin))
+
+    def __eq__(self, autre):
+        return isinstance(autre, (ColonnePartagee, tuple, list)) and len(self) == len(autre) and \
+            all(a == b for a, b in zip(self, autre))
+
+    def __repr__(self):
+        return f"ColonnePartagee({len(self)} valeurs)"
+
+
+class ColonnesPartagees(Mapping):
+    """
+    Feuille -> `ColonnePartagee` d'un classeur publié en mémoire partagée.
+
+    L'objet compte pour un lecteur du segment jusqu'à sa destruction.
+    """
+
+    def __init__(self, segment):
+        self.nom = segment.name
+        self._vue = segment.buf.cast("B")
+        _, _, n, j = ENTETE.unpack_from(self._vue)
+        debut = ENTETE.size
+        index = json.loads(bytes(self._vue[debut:debut + j]))
+        debut += j
+        self._decalages = self._vue[debut:debut + 8 * (n + 1)].cast("Q")
+        debut += 8 * (n + 1)
+        self._types = self._vue[debut:debut + n]
+        self._textes = debut + n
+        self._feuilles = {feuille: (a, b) for feuille, a, b in index}
+        # Détachement à la destruction, ou à la sortie du processus (y compris d'un processus
+        # de pool, qui se termine sans les gestionnaires atexit)
+        util.Finalize(self, _fermer, args=(segment, (self._decalages, self._types, self._vue)), exitpriority=0)
+
+    def _valeur(self, i):
+        a, b = self._decalages[i], self._decalages[i + 1]
+        return _decoder(self._types[i], bytes(self._vue[self._textes + a:self._textes + b]))
+
+    def __getitem__(self, feuille):
+        return ColonnePartagee(self, *self._feuilles[feuille])
+
+    def __iter__(self):
+        return iter(self._feuilles)
+
+    def __len__(self):
+        return len(self._feuilles)
+
+    def taille(self):
+        """Taille du segment en octets."""
+        return len(self._vue)
+
+
+def _fermer(segment, vues):
+    decalages, types, vue = vues
+    decalages.release()
+    types.release()
+    _detacher(segment, vue)
+
+
+# --- Publication et rattachement ---
+def _serialiser(colonnes):
+    index, types, textes, decalages = [], bytearray(), bytearray(), array("Q", [0])
+    for feuille, valeurs in colonnes.items():
+        debut = len(types)
+        for valeur in valeurs:
+            type_valeur, octets = _encoder(valeur)
+            types += type_valeur
+            textes += octets
+            decalages.append(len(textes))
+        index.append([feuille, debut, len(types)])
+    entete_index = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    return len(types), entete_index, decalages.tobytes(), bytes(types), bytes(textes)
+
+
+def _attacher(nom):
+    """Ouvre un segment existant et complet en comptant un lecteur (sous le verrou machine)."""
+    try:
+        segment = _ouvrir(nom)
+    except FileNotFoundError:
+        return None
+    if len(segment.buf) < ENTETE.size or bytes(segment.buf[:4]) != MAGIQUE:
+        segment.close()  # Segment étranger ou abandonné en cours d'écriture
+        return None
+    _lecteurs(segment, +1)
+    return ColonnesPartagees(segment)
+
+
+def attacher_colonnes(empreinte):
+    """
+    Colonnes d'un classeur déjà publié par un processus de la machine.
+
+    Returns:
+        ColonnesPartagees | None: None si le classeur n'est pas publié (ou si
+        la mémoire partagée est désactivée ou indisponible).
+    """
+    if not ACTIVE:
+        return None
+    try:
+        with _verrou_machine():
+            return _attacher(nom_segment(empreinte))
+    except OSError:
+        return None
+
+
+def publier_colonnes(empreinte, colonnes):
+    """
+    Publie les colonnes d'un classeur (ou s'attache à la publication existante).
+
+    Args:
+        empreinte (str): Empreinte SHA-256 du classeur.
+        colonnes (dict): Feuille -> valeurs de la première colonne.
+
+    Returns:
+        ColonnesPartagees | None: Vue partagée des colonnes, None si la mémoire
+        partagée est désactivée ou indisponible.
+    """
+    if not ACTIVE:
+        return None
+    nom = nom_segment(empreinte)
+    n, entete_index, decalages, types, textes = _serialiser(colonnes)
+    taille = ENTETE.size + len(entete_index) + len(decalages) + len(types) + len(textes)
+    try:
+        with _verrou_machine():
+            partagees = _attacher(nom)
+            if partagees is not None:
+                return partagees
+            try:
+                segment = _ouvrir(nom, taille)
+            except FileExistsError:  # Segment incomplet d'un processus tué: remplacé
+                supprimer_segment(empreinte)
+                segment = _ouvrir(nom, taille)
+            position = ENTETE.size
+            for bloc in (entete_index, decalages, types, textes):
+                segment.buf[position:position + len(bloc)] = bloc
+                position += len(bloc)
+            # L'en-tête (et le nombre magique) en dernier: le segment n'est visible qu'une fois complet
+            ENTETE.pack_into(segment.buf, 0, MAGIQUE, 1, n, len(entete_index))
+            return ColonnesPartagees(segment)
+    except OSError:
+        return None
+
+
+def supprimer_segment(empreinte):
+    """Supprime le segment d'un classeur, quels que soient ses lecteurs (nettoyage après incident)."""
+    try:
+        segment = _ouvrir(nom_segment(empreinte))
+    except FileNotFoundError:
+        return False
+    segment.close()
+    _supprimer(segment)
+    return True
@@ -0,0 +1,232 @@
+"""Bibliothèque persistante de modèles de placement par (structure, effectifs)."""
+import json
+import os
+import uuid
+
+from .profils import resoudre_profils
+from .topologie import compiler_structure, signature_structure
+from .voisinage import REGLE_PAR_DEFAUT, nom_regle, signature_regle
+
+# --- Bibliothèque persistante de modèles de placement ---
+FICHIER_MODELES = os.environ.get("REPARTITION_FICHIER_MODELES", "modeles_placement.json")
+
+
+def rechercher_modele(topologie, effectifs):
+    """
+    Recherche le meilleur gabarit matière → place pour une salle.
+
+    Args:
+        topologie (TopologieSalle): Salle compilée.
+        effectifs (tuple): Nombre d'étudiants par rang de matière (décroissant).
+
+    Returns:
+        list: Pour chaque place, le rang de la matière (0 = la plus nombreuse) ou -1 si vide.
+    """
+    n = topologie.capacite()
+    etiquettes = [-1] * n
+
+    # Construction gloutonne, comme le moteur: première place valide, sinon première place libre
+    for rang, effectif in enumerate(effectifs):
+        for _ in range(effectif):
+            libres = [i for i in range(n) if etiquettes[i] == -1]
+            if not libres:
+                break
+            valide = next((i for i in libres if all(etiquettes[j] != rang for j in topologie.voisins[i])), libres[0])
+            etiquettes[valide] = rang
+
+    # Recherche locale par échanges de deux places (y compris avec une place vide): les échanges
+    # d'une place sont évalués d'un coup par `evaluer_plans` et le meilleur est retenu s'il améliore
+    import numpy as np
+
+    from .audit import evaluer_plans
+
+    rangs_places = np.arange(n)
+
+    def couts(plans):
+        # Un voisinage coûte plus que toute la compacité (places occupées en fin de salle)
+        return evaluer_plans(topologie, plans).conflits * n * n + (plans >= 0) @ rangs_places
+
+    plan = np.array(etiquettes, dtype=np.int64)
+    cout_plan = couts(plan)[0]
+    ameliore = True
+    while ameliore:
+        ameliore = False
+        for i in range(n - 1):
+            autres = np.flatnonzero(plan[i + 1:] != plan[i]) + i + 1
+            if not len(autres):
+                continue
+            candidats = np.repeat(plan[np.newaxis, :], len(autres), axis=0)
+            lignes = np.arange(len(autres))
+            candidats[lignes, i] = plan[autres]
+            candidats[lignes, autres] = plan[i]
+            couts_candidats = couts(candidats)
+            meilleur = int(np.argmin(couts_candidats))
+            if couts_candidats[meilleur] < cout_plan:
+                plan, cout_plan = candidats[meilleur], couts_candidats[meilleur]
+                ameliore = True
+    return plan.tolist()
+
+
+def couverture_conflits(topologie, etiquettes):
+    """
+    Plus petit ensemble de places à considérer comme « relâchées » pour qu'aucune
+    autre place n'ait de voisin de même matière (couverture minimale des conflits).
+
+    Exacte par le théorème de König lorsque le graphe est biparti, gloutonne sinon.
+
+    Returns:
+        set: Numéros des places relâchées.
+    """
+    conflits = [(i, j) for i, j, _ in topologie.aretes if etiquettes[i] >= 0 and etiquettes[i] == etiquettes[j]]
+    couleur = topologie.coloration_biparti()
+    if couleur is None:
+        couverture = set()
+        for i, j in sorted(conflits, key=lambda a: -len(topologie.voisins[a[0]])):
+            if i not in couverture and j not in couverture:
+                couverture.add(i)
+        return couverture
+
+    adjacence = {}
+    for i, j in conflits:
+        gauche, droite = (i, j) if couleur[i] == 0 else (j, i)
+        adjacence.setdefault(gauche, []).append(droite)
+    partenaire = {}  # place de droite -> place de gauche
+
+    def augmenter(g, vus):
+        for d in adjacence[g]:
+            if d not in vus:
+                vus.add(d)
+                if d not in partenaire or augmenter(partenaire[d], vus):
+                    partenaire[d] = g
+                    return True
+        return False
+
+    for g in adjacence:
+        augmenter(g, set())
+
+    # König: Z = sommets atteignables depuis les sommets de gauche non couplés par chemins alternés
+    couples_gauche = set(partenaire.values())
+    pile = [g for g in adjacence if g not in couples_gauche]
+    atteints_gauche, atteints_droite = set(pile), set()
+    while pile:
+        g = pile.pop()
+        for d in adjacence[g]:
+            if d not in atteints_droite:
+                atteints_droite.add(d)
+                suivant = partenaire.get(d)
+                if suivant is not None and suivant not in atteints_gauche:
+                    atteints_gauche.add(suivant)
+                    pile.append(suivant)
+    return (set(adjacence) - atteints_gauche) | atteints_droite
+
+
+class BibliothequeModeles:
+    """
+    Cache persistant des meilleurs modèles de placement par (structure, effectifs).
+
+    Les salles de même forme (ISEL1, ISEL2, ISEL3, ISEECO et AS2 par exemple)
+    partagent la même entrée. La recherche n'est lancée qu'en cas d'absence du
+    modèle; il est alors conservé en mémoire et dans le fichier JSON. Le modèle
+    de la recherche locale sert de départ à la programmation dynamique sur les
+    profils de lignes (`resoudre_profils`), qui l'améliore ou prouve qu'il est
+    optimal.
+    """
+
+    def __init__(self, chemin=FICHIER_MODELES):
+        self.chemin = chemin
+        self.modeles = None
+        self.trouves = 0
+        self.calcules = 0
+        self.echecs_sauvegarde = 0
+        self.erreur_sauvegarde = None  # Message du dernier échec d'enregistrement
+
+    @staticmethod
+    def cle(structure, effectifs, regle=None):
+        """Clé du cache: signature de la structure (et de la règle si elle n'est pas celle par défaut) et effectifs triés par ordre décroissant."""
+        signature = signature_structure(structure)
+        if nom_regle(regle) != REGLE_PAR_DEFAUT:
+            signature += "@" + signature_regle(regle)
+        return f"{signature}|{','.join(str(e) for e in effectifs)}"
+
+    def modele(self, structure, effectifs_par_matiere, regle=None):
+        """
+        Retourne le modèle d'une salle pour des effectifs donnés.
+
+        Args:
+            structure (dict): Structure de la salle.
+            effectifs_par_matiere (dict): Matière (libellé ou code) -> nombre d'étudiants à placer dans la salle.
+            regle: Règle de voisinage de la salle (voir REGLES_VOISINAGE).
+
+        Returns:
+            dict: Matière -> liste ordonnée des places (numéro de place, relâchée)
+            qui lui sont réservées.
+        """
+        if self.modeles is None:
+            self.modeles = self._charger()
+        matieres = sorted(effectifs_par_matiere, key=lambda m: (-effectifs_par_matiere[m], m))
+        effectifs = tuple(effectifs_par_matiere[m] for m in matieres if effectifs_par_matiere[m] > 0)
+        topologie = compiler_structure(structure, regle)
+        cle = self.cle(structure, effectifs, regle)
+
+        modele = self.modeles.get(cle)
+        if modele is None:
+            depart = rechercher_modele(topologie, effectifs)
+            etiquettes, optimal = resoudre_profils(topologie, effectifs, depart)
+            if etiquettes != depart:
+                # Meilleur des deux gabarits, évalués ensemble (la recherche locale à égalité)
+                from .audit import evaluer_plans
+                candidats = [depart, etiquettes]
+                etiquettes = candidats[int(evaluer_plans(topologie, candidats, effectifs).classement()[0])]
+            modele = {"etiquettes": etiquettes, "relachees": sorted(couverture_conflits(topologie, etiquettes)),
+                      "optimal": optimal}
+            self.modeles[cle] = modele
+            self.calcules += 1
+            erreur = self.sauvegarder({cle: modele})
+            if erreur is not None:  # Le modèle reste utilisable en mémoire
+                self.echecs_sauvegarde += 1
+                self.erreur_sauvegarde = erreur
+        else:
+            self.trouves += 1
+
+        relachees = set(modele["relachees"])
+        places = {matiere: [] for matiere in matieres}
+        for i, rang in enumerate(modele["etiquettes"]):
+            if rang >= 0:
+                places[matieres[rang]].append((i, i in relachees))
+        return places
+
+    def _charger(self):
+        try:
+            with open(self.chemin, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def sauvegarder(self, nouveaux):
+        """
+        Fusionne les nouveaux modèles avec le fichier existant (écriture atomique).
+
+        Returns:
+            str | None: Message d'erreur si le fichier n'a pas pu être écrit, None sinon.
+        """
+        try:
+            modeles = self._charger()
+            modeles.update(nouveaux)
+            temp_path = f"{self.chemin}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(modeles, f)
+            os.replace(temp_path, self.chemin)
+        except OSError as e:
+            return f"Impossible d'enregistrer la bibliothèque de modèles: {e}"
+        return None
+
+
+_bibliotheque_modeles = None
+
+
+def bibliotheque_modeles():
+    """Bibliothèque partagée par toutes les sessions du processus."""
+    global _bibliotheque_modeles
+    if _bibliotheque_modeles is None:
+        _bibliotheque_modeles = BibliothequeModeles()
+    return _bibliotheque_modeles
@@ -0,0 +1,338 @@
+"""Moteur de placement incrémental, exposé comme un itérateur reprenable."""
+import random
+import time
+from array import array
+from collections import namedtuple
+
+from .salles import Registre, Salle
+from .voisinage import description_regle
+
+# --- Modes de remplissage ---
+# 'sequentiel': une classe après l'autre (effectif décroissant), chacune remplit les salles dans l'ordre
+# 'entrelace' : toutes les classes mêlées au prorata de leurs effectifs, dans un seul lot
+MODES_REMPLISSAGE = ("sequentiel", "entrelace")
+
+# --- Moteur de placement incrémental (itérateur reprenable) ---
+EvenementPlacement = namedtuple(
+    "EvenementPlacement", ["type", "classe", "etudiant", "matiere", "salle", "places", "total"]
+)
+EvenementPlacement.__doc__ = """
+Événement produit par le moteur de placement.
+
+Types possibles:
+    'classe_debut'    : début du placement d'une classe
+    'place'           : étudiant placé avec contraintes strictes
+    'relache'         : étudiant placé avec contraintes d'adjacence relâchées
+    'salle_pleine'    : la salle vient d'être entièrement remplie
+    'non_place'       : aucune place libre trouvée pour l'étudiant
+    'classe_terminee' : toute la classe a été traitée
+    'echeance'        : l'échéance a été atteinte, le moteur est en pause
+    'termine'         : tous les étudiants ont été traités
+"""
+
+
+class MoteurPlacement:
+    """
+    Moteur de placement exposé sous forme d'itérateur reprenable.
+
+    Le moteur reprend l'heuristique de l'application (classes triées par effectif
+    décroissant, étudiants mélangés, remplissage salle par salle) mais s'exécute
+    pas à pas: `executer()` produit des `EvenementPlacement` et peut être
+    interrompu à tout moment (échéance, arrêt de l'appelant). Le plan partiel
+    renvoyé par `plan()` est toujours valide et le placement reprend exactement
+    là où il s'était arrêté, y compris depuis un point de reprise sérialisé.
+    """
+
+    def __init__(self, salles, etudiants_par_classe, matieres_par_classe, graine=None, bibliotheque=None,
+                 remplissage="sequentiel"):
+        """
+        Args:
+            salles (list): Objets Salle, dans l'ordre de remplissage souhaité.
+            etudiants_par_classe (dict): Classe -> liste des noms d'étudiants.
+            matieres_par_classe (dict): Classe -> épreuve composée par la classe.
+            graine (int): Graine optionnelle pour rendre le mélange reproductible.
+            bibliotheque (BibliothequeModeles): Si fournie, chaque salle vide est remplie
+                d'après le modèle optimal correspondant à sa structure et aux effectifs
+                qu'elle reçoit, au lieu du parcours séquentiel place par place.
+            remplissage (str): Mode de MODES_REMPLISSAGE. En mode 'entrelace', les
+                classes sont placées ensemble (un seul lot, événements 'classe_debut'
+                et 'classe_terminee' compris): chaque salle reçoit plusieurs matières,
+                ce qui évite de remplir une salle d'une seule matière en relâchant les
+                contraintes une place sur deux.
+        """
+        if remplissage not in MODES_REMPLISSAGE:
+            raise ValueError(f"Mode de remplissage inconnu: '{remplissage}'")
+        self.salles = salles
+        self.bibliotheque = bibliotheque
+        self.places_modeles = {}  # Salle -> code de matière -> places réservées restantes
+        rng = random.Random(graine)
+
+        # Toutes les salles du plan partagent le même registre d'étudiants
+        self.registre = Registre()
+        for salle in salles:
+            salle.registre = self.registre
+
+        # Heuristique: classes triées par nombre d'étudiants (décroissant), étudiants mélangés
+        classes_triees = sorted(etudiants_par_classe.keys(),
+                                key=lambda c: len(etudiants_par_classe[c]),
+                                reverse=True)
+        self.ordre = []
+        for classe in classes_triees:
+            ids = self.registre.ajouter_classe(classe, matieres_par_classe[classe], etudiants_par_classe[classe])
+            etudiants = array('i', ids)
+            rng.shuffle(etudiants)
+            self.ordre.append((classe, etudiants))
+        if remplissage == "entrelace" and len(self.ordre) > 1:
+            self.ordre = [(" + ".join(classe for classe, _ in self.ordre), _entrelacer(self.ordre))]
+
+        self.remplissage = remplissage
+        self.premiere_libre = 0  # Les salles précédentes sont pleines (elles ne se vident jamais)
+        self.position = (0, 0)  # (indice de classe, indice d'étudiant dans la classe)
+        self.classe_commencee = False  # 'classe_debut' déjà produit pour la classe courante
+        self.en_attente = None  # Événement 'salle_pleine' pas encore produit: [type, classe, etudiant, matiere, salle]
+        self.non_places = []    # Identifiants des étudiants sans place
+        self.statistiques = {salle.nom: {} for salle in salles}
+        self.total = len(self.registre)
+        self.traites = 0
+
+    def termine(self):
+        """Indique si tous les étudiants ont été traités."""
+        return self.position[0] >= len(self.ordre)
+
+    def plan(self):
+        """Retourne le meilleur plan courant (salles partiellement ou totalement remplies)."""
+        return self.salles
+
+    def executer(self, echeance=None):
+        """
+        Générateur de placement.
+
+        Args:
+            echeance (float): Instant limite (horloge `time.monotonic()`). Lorsque
+                l'échéance est atteinte, un événement 'echeance' est produit et le
+                générateur s'arrête; un nouvel appel reprend le placement.
+
+        Yields:
+            EvenementPlacement: Un événement par étape du placement.
+        """
+        while not self.termine():
+            classe_idx, etu_idx = self.position
+            classe, etudiants = self.ordre[classe_idx]
+            matiere = self.registre.matiere(etudiants[0]) if etudiants else None
+            lot_entrelace = self.remplissage == "entrelace" and len(self.ordre) == 1 and \
+                len(self.registre.classes) > 1
+            if lot_entrelace:
+                matiere = None  # Lot de plusieurs classes: matière et classe données par étudiant
+
+            if self.en_attente is not None:
+                # Appelant arrêté juste après le placement qui a rempli une salle
+                evenement, self.en_attente = self.en_attente, None
+                yield self._evenement(*evenement)
+
+            if not self.classe_commencee:
+                self.classe_commencee = True
+                yield self._evenement("classe_debut", classe, None, matiere, None)
+
+            while etu_idx < len(etudiants):
+                if echeance is not None and time.monotonic() >= echeance:
+                    self.position = (classe_idx, etu_idx)
+                    yield self._evenement("echeance", classe, None, matiere, None)
+                    return
+
+                id_etudiant = etudiants[etu_idx]
+                salle, relache = self._placer(id_etudiant)
+                etu_idx += 1
+                self.traites += 1
+                self.position = (classe_idx, etu_idx)
+                if salle is None:
+                    type_evenement = "non_place"
+                else:
+                    type_evenement = "relache" if relache else "place"
+                classe_etu, matiere_etu = classe, matiere
+                if lot_entrelace:
+                    classe_etu, matiere_etu = self.registre.classe(id_etudiant), self.registre.matiere(id_etudiant)
+                if salle is not None and salle.nombre_places_vides() == 0:
+                    # Conservé dans l'état avant de céder la main: rejoué à la reprise si l'appelant s'arrête ici
+                    self.en_attente = ["salle_pleine", classe_etu, None, matiere_etu, salle.nom]
+                yield self._evenement(type_evenement, classe_etu, self.registre.nom(id_etudiant), matiere_etu,
+                                      salle.nom if salle is not None else None)
+
+                if self.en_attente is not None:
+                    evenement, self.en_attente = self.en_attente, None
+                    yield self._evenement(*evenement)
+
+            self.position = (classe_idx + 1, 0)
+            self.classe_commencee = False
+            yield self._evenement("classe_terminee", classe, None, matiere, None)
+
+        yield self._evenement("termine", None, None, None, None)
+
+    def executer_tout(self, echeance=None):
+        """Exécute le placement jusqu'à la fin (ou l'échéance) et retourne le plan courant."""
+        for _ in self.executer(echeance):
+            pass
+        return self.plan()
+
+    def non_places_noms(self):
+        """Liste des (nom, matière) des étudiants sans place."""
+        return [(self.registre.nom(i), self.registre.matiere(i)) for i in self.non_places]
+
+    def point_de_reprise(self):
+        """
+        Retourne un instantané sérialisable (JSON/pickle) de l'état du moteur.
+
+        Returns:
+            dict: État complet permettant de reprendre avec `MoteurPlacement.reprendre`.
+        """
+        return {
+            "registre": self.registre.etat(),
+            "ordre": [[classe, list(etudiants)] for classe, etudiants in self.ordre],
+            "position": list(self.position),
+            "classe_commencee": self.classe_commencee,
+            "en_attente": self.en_attente,
+            "non_places": list(self.non_places),
+            "statistiques": {nom: dict(stats) for nom, stats in self.statistiques.items()},
+            "traites": self.traites,
+            "remplissage": self.remplissage,
+            "places_modeles": {nom: {str(code): [list(place) for place in places] for code, places in par_matiere.items()}
+                               for nom, par_matiere in self.places_modeles.items()},
+            "salles": [{
+                "nom": salle.nom,
+                "porte": salle.porte,
+                "structure": salle.topologie.description(),
+                "regle": description_regle(salle.topologie.regle),
+                "occupants": list(salle.occupants),
+                "relachees": salle.placements_avec_contraintes_relachees,
+            } for salle in self.salles],
+        }
+
+    @classmethod
+    def reprendre(cls, point, bibliotheque=None):
+        """Reconstruit un moteur à partir d'un point de reprise."""
+        moteur = cls.__new__(cls)
+        moteur.bibliotheque = bibliotheque
+        moteur.registre = Registre.depuis_etat(point["registre"])
+        moteur.places_modeles = {nom: {int(code): [tuple(place) for place in places] for code, places in par_matiere.items()}
+                                 for nom, par_matiere in point.get("places_modeles", {}).items()}
+        moteur.salles = []
+        for donnees in point["salles"]:
+            salle = Salle(donnees["nom"], donnees["structure"], donnees["porte"], moteur.registre,
+                          donnees.get("regle"))
+            for i, id_etudiant in enumerate(donnees["occupants"]):
+                if id_etudiant >= 0:
+                    salle._occuper(i, id_etudiant)
+            salle.placements_avec_contraintes_relachees = donnees["relachees"]
+            moteur.salles.append(salle)
+        moteur.ordre = [(classe, array('i', etudiants)) for classe, etudiants in point["ordre"]]
+        moteur.position = tuple(point["position"])
+        moteur.classe_commencee = point.get("classe_commencee", moteur.position[1] > 0)
+        moteur.en_attente = point.get("en_attente")
+        moteur.non_places = list(point["non_places"])
+        moteur.statistiques = {nom: dict(stats) for nom, stats in point["statistiques"].items()}
+        moteur.total = len(moteur.registre)
+        moteur.traites = point["traites"]
+        moteur.remplissage = point.get("remplissage", "sequentiel")
+        moteur.premiere_libre = 0
+        return moteur
+
+    def _placer(self, id_etudiant):
+        """
+        Essaie de placer un étudiant dans les salles, dans l'ordre.
+
+        Returns:
+            tuple: (salle retenue ou None, placement avec contraintes relâchées).
+        """
+        while self.premiere_libre < len(self.salles) and self.salles[self.premiere_libre].nombre_places_vides() == 0:
+            self.premiere_libre += 1
+        for salle in self.salles[self.premiere_libre:]:
+            relachees_avant = salle.placements_avec_contraintes_relachees
+            if self._placer_dans_salle(salle, id_etudiant):
+                matiere = self.registre.matiere(id_etudiant)
+                stats = self.statistiques[salle.nom]
+                stats[matiere] = stats.get(matiere, 0) + 1
+                return salle, salle.placements_avec_contraintes_relachees > relachees_avant
+        self.non_places.append(id_etudiant)
+        return None, False
+
+    def _placer_dans_salle(self, salle, id_etudiant):
+        """Place l'étudiant dans la salle, par le modèle de la bibliothèque si disponible."""
+        if self.bibliotheque is None or salle.nombre_places_vides() == 0:
+            return salle.placer_etudiant(id_etudiant)
+
+        if salle.nom not in self.places_modeles and salle.nombre_etudiants() == 0:
+            # La salle recevra les prochains étudiants de l'ordre de placement, jusqu'à saturation
+            effectifs = {}
+            for code in self._codes_restants(salle.capacite_totale()):
+                effectifs[code] = effectifs.get(code, 0) + 1
+            self.places_modeles[salle.nom] = self.bibliotheque.modele(salle.structure, effectifs,
+                                                                      salle.topologie.regle)
+
+        places = self.places_modeles.get(salle.nom, {}).get(self.registre.matiere_de[id_etudiant])
+        while places:
+            i, relache = places.pop(0)
+            if salle.placer_etudiant_a(id_etudiant, i, relache):
+                return True
+        return salle.placer_etudiant(id_etudiant)
+
+    def _codes_restants(self, limite):
+        """Codes de matière des `limite` prochains étudiants à placer à partir de la position courante."""
+        classe_idx, etu_idx = self.position
+        restants = []
+        while classe_idx < len(self.ordre) and len(restants) < limite:
+            _, etudiants = self.ordre[classe_idx]
+            restants.extend(self.registre.matiere_de[i] for i in etudiants[etu_idx:etu_idx + limite - len(restants)])
+            classe_idx, etu_idx = classe_idx + 1, 0
+        return restants
+
+    def _evenement(self, type_evenement, classe, etu, matiere, salle):
+        return EvenementPlacement(type_evenement, classe, etu, matiere, salle, self.traites, self.total)
+
+
+def _entrelacer(ordre):
+    """
+    Fusionne les étudiants de plusieurs classes au prorata de leurs effectifs.
+
+    Le k-ième étudiant d'une classe de n étudiants prend le rang (k + 0,5) / n:
+    chaque classe est répartie uniformément sur tout le lot (tourniquet pondéré),
+    à égalité dans l'ordre des classes.
+
+    Args:
+        ordre (list): (classe, identifiants) dans l'ordre de placement séquentiel.
+
+    Returns:
+        array: Identifiants entrelacés.
+    """
+    rangs = []
+    for numero, (_, etudiants) in enumerate(ordre):
+        n = len(etudiants)
+        rangs.extend(((k + 0.5) / n, numero, id_etudiant) for k, id_etudiant in enumerate(etudiants))
+    rangs.sort()
+    return array('i', [id_etudiant for _, _, id_etudiant in rangs])
+
+
+def comparer_remplissages(salles, etudiants_par_classe, matieres_par_classe, graine=None, bibliotheque=None):
+    """
+    Exécute le placement dans chaque mode de remplissage, sur des copies vides des salles.
+
+    Args:
+        salles (list): Salles du plan (seuls nom, structure, porte et règle sont repris).
+        etudiants_par_classe, matieres_par_classe, graine, bibliotheque: Comme pour `MoteurPlacement`.
+
+    Returns:
+        list: Un dict par mode: "mode", "relachees", "non_places", "salles_utilisees" et "duree" (s).
+    """
+    mesures = []
+    for mode in MODES_REMPLISSAGE:
+        copies = [Salle(salle.nom, salle.structure, salle.porte, regle=salle.topologie.regle) for salle in salles]
+        debut = time.perf_counter()
+        moteur = MoteurPlacement(copies, etudiants_par_classe, matieres_par_classe, graine=graine,
+                                 bibliotheque=bibliotheque, remplissage=mode)
+        moteur.executer_tout()
+        mesures.append({
+            "mode": mode,
+            "relachees": sum(salle.placements_avec_contraintes_relachees for salle in copies),
+            "non_places": len(moteur.non_places),
+            "salles_utilisees": sum(1 for salle in copies if salle.nombre_etudiants()),
+            "duree": time.perf_counter() - debut,
+        })
+    return mesures
@@ -0,0 +1,162 @@
+"""Poignée compacte et immuable d'un plan, avec registres partagés entre sessions."""
+import hashlib
+import sys
+import threading
+import weakref
+from array import array
+
+from .salles import Salle
+from .voisinage import description_regle
+
+# --- Registres partagés par empreinte de contenu ---
+# Plusieurs sessions qui répartissent les mêmes classes obtiennent le même registre
+# (mêmes noms, mêmes codes): il n'est gardé qu'une fois, tant qu'un plan le référence.
+_registres = {}   # empreinte -> [registre, nombre de plans qui le référencent]
+_verrou = threading.Lock()  # Les sessions Streamlit tournent dans des threads distincts
+
+
+def empreinte_registre(registre):
+    """Empreinte SHA-256 du contenu d'un registre (noms, matières, classes et codes)."""
+    h = hashlib.sha256()
+    for colonne in (registre.matieres, registre.classes, registre.noms):
+        h.update("\x1f".join(colonne).encode("utf-8"))
+        h.update(b"\x1e")
+    h.update(registre.matiere_de.tobytes())
+    h.update(registre.classe_de.tobytes())
+    return h.hexdigest()
+
+
+def _acquerir_registre(registre):
+    """Retourne l'empreinte et le registre partagé de même contenu, en comptant une référence."""
+    empreinte = empreinte_registre(registre)
+    with _verrou:
+        entree = _registres.setdefault(empreinte, [registre, 0])
+        entree[1] += 1
+        return empreinte, entree[0]
+
+
+def _liberer_registre(empreinte):
+    with _verrou:
+        entree = _registres.get(empreinte)
+        if entree is not None:
+            entree[1] -= 1
+            if entree[1] <= 0:
+                del _registres[empreinte]
+
+
+def registres_partages():
+    """Nombre de registres en cache et de plans qui les référencent (suivi du serveur)."""
+    with _verrou:
+        return {"registres": len(_registres), "references": sum(n for _, n in _registres.values())}
+
+
+def _empreinte_plan(empreinte, donnees_salles, non_places):
+    """Empreinte SHA-256 d'un plan: registre, salles (forme, règle, occupants) et étudiants sans place."""
+    h = hashlib.sha256((empreinte or "").encode("ascii"))
+    for nom, porte, topologie, occupants, relachees in donnees_salles:
+        h.update(repr((nom, porte, topologie.forme, topologie.regle, relachees)).encode("utf-8"))
+        h.update(occupants)
+    h.update(non_places)
+    return h.hexdigest()
+
+
+# --- Poignée de plan ---
+class PlanCompact:
+    """
+    Plan de placement figé, à conserver dans l'état de session.
+
+    Ne contient que des tableaux d'entiers (occupants de chaque place, étudiants
+    sans place) et des références partagées: le registre, mis en commun entre
+    sessions par empreinte de contenu, et les topologies mémoïsées. Le registre
+    est libéré quand plus aucun plan ne le référence (fin de session, nouvelle
+    répartition). Les objets `Salle` sont reconstruits à la demande.
+    `empreinte_plan` identifie le contenu du plan (clé des caches d'affichage).
+    """
+    __slots__ = ("empreinte", "empreinte_plan", "registre", "_salles", "_non_places", "__weakref__")
+
+    def __init__(self, salles, non_places=()):
+        """
+        Args:
+            salles (list): Salles remplies, partageant le même registre.
+            non_places (iterable): Identifiants des étudiants sans place.
+        """
+        registre = salles[0].registre if salles else None
+        if registre is not None:
+            empreinte, registre = _acquerir_registre(registre)
+            weakref.finalize(self, _liberer_registre, empreinte)
+        else:
+            empreinte = None
+        # Occupants en octets (4 par place): immuables et sans objet par place
+        donnees_salles = tuple((salle.nom, salle.porte, salle.topologie, salle.occupants.tobytes(),
+                                salle.placements_avec_contraintes_relachees) for salle in salles)
+        non_places = array('i', non_places).tobytes()
+        object.__setattr__(self, "empreinte", empreinte)
+        object.__setattr__(self, "empreinte_plan", _empreinte_plan(empreinte, donnees_salles, non_places))
+        object.__setattr__(self, "registre", registre)
+        object.__setattr__(self, "_salles", donnees_salles)
+        object.__setattr__(self, "_non_places", non_places)
+
+    def __setattr__(self, nom, valeur):
+        raise AttributeError("PlanCompact est immuable")
+
+    def __len__(self):
+        return len(self._salles)
+
+    def noms_salles(self):
+        return [nom for nom, _, _, _, _ in self._salles]
+
+    def salles(self):
+        """
+        Reconstruit les salles du plan (pour l'affichage, l'audit et les exports).
+
+        Returns:
+            list: Nouveaux objets `Salle`, à ne pas conserver dans la session.
+        """
+        resultat = []
+        for nom, porte, topologie, occupants, relachees in self._salles:
+            salle = Salle(nom, topologie.forme, porte, self.registre, topologie.regle)
+            for i, id_etudiant in enumerate(array('i', occupants)):
+                if id_etudiant >= 0:
+                    salle._occuper(i, id_etudiant)
+            salle.placements_avec_contraintes_relachees = relachees
+            resultat.append(salle)
+        return resultat
+
+    def non_places(self):
+        """Identifiants des étudiants sans place."""
+        return array('i', self._non_places)
+
+    def non_places_noms(self):
+        """Liste des (nom, matière) des étudiants sans place."""
+        return [(self.registre.nom(i), self.registre.matiere(i)) for i in self.non_places()]
+
+    def point_de_reprise(self):
+        """
+        Plan au format de `MoteurPlacement.point_de_reprise` (placement terminé), sérialisable en JSON.
+
+        Returns:
+            dict: État à transmettre au service ou à `MoteurPlacement.reprendre`.
+        """
+        return {
+            "registre": self.registre.etat(),
+            "ordre": [],
+            "position": [0, 0],
+            "non_places": list(self.non_places()),
+            "statistiques": {},
+            "traites": len(self.registre),
+            "salles": [{
+                "nom": nom,
+                "porte": porte,
+                "structure": topologie.description(),
+                "regle": description_regle(topologie.regle),
+                "occupants": list(array('i', occupants)),
+                "relachees": relachees,
+            } for nom, porte, topologie, occupants, relachees in self._salles],
+        }
+
+    def taille_memoire(self):
+        """Octets propres à cette poignée (hors registre et topologies partagés)."""
+        taille = sys.getsizeof(self) + sys.getsizeof(self._salles) + sys.getsizeof(self._non_places)
+        for donnees in self._salles:
+            taille += sys.getsizeof(donnees) + sys.getsizeof(donnees[0]) + sys.getsizeof(donnees[3])
+        return taille
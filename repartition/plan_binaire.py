@@ -0,0 +1,358 @@
+"""
+Format binaire colonnaire des plans, écrit en flux et lu par projection mémoire.
+
+Pour les examens nationaux (centaines de milliers de candidats, nombreux
+centres), le plan n'est ni gardé en objets `Salle` ni relu depuis du JSON:
+`EcrivainPlanBinaire` écrit les salles au fur et à mesure (un centre après
+l'autre, moteur libéré entre deux), `PlanBinaire` projette le fichier avec
+`mmap` et ne lit que les enregistrements demandés.
+
+Organisation du fichier (entiers petit-boutistes)::
+
+    en-tête (ENTETE)            nombres et positions des sections
+    places (PLACE x P)          centre, rangée, salle, ligne, colonne, étudiant, matière
+    salles (SALLE x S)          centre, première place, places, capacité, relâchées
+    catalogue JSON              centres, matières, classes, nom/porte/structure/règle des salles
+    étudiants (u64 x (E + 1))   décalages des noms
+    codes (u16 x 2E)            matière et classe de chaque étudiant
+    noms UTF-8                  noms concaténés
+
+Les étudiants placés sont numérotés dans l'ordre des places (l'étudiant k
+occupe la place k), les étudiants sans place viennent ensuite: la place
+d'un étudiant se lit en O(1).
+"""
+import bisect
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+
+from .salles import Registre, Salle
+from .voisinage import description_regle
+
+# --- Format ---
+MAGIQUE = b"RPB1"
+VERSION = 1
+ENTETE = struct.Struct("<4sHHIII7Q")  # magique, version, réservé, salles, étudiants, places, 7 positions
+PLACE = struct.Struct("<HHIHHIHH")    # centre, rangée, salle, ligne, colonne, étudiant, matière, réservé
+SALLE = struct.Struct("<HHIIII")      # centre, réservé, première place, places, capacité, relâchées
+CODES = struct.Struct("<HH")          # matière, classe
+TAILLE_TAMPON = 1 << 16               # Places écrites par paquets
+
+
+# --- Écriture en flux ---
+class EcrivainPlanBinaire:
+    """
+    Écrit un plan binaire salle par salle.
+
+    Seuls les décalages des noms et les codes des étudiants (12 octets par
+    étudiant) restent en mémoire jusqu'à `fermer`; les places et les noms
+    sont écrits au fil de l'eau.
+
+    Exemple::
+
+        with EcrivainPlanBinaire("plan.rpb") as ecrivain:
+            for centre, moteur in moteurs_par_centre:
+                moteur.executer_tout()
+                ecrivain.ajouter_moteur(moteur, centre)
+    """
+
+    def __init__(self, chemin):
+        """
+        Args:
+            chemin: Chemin du fichier, ou fichier binaire ouvert avec accès direct (BytesIO...), laissé ouvert.
+        """
+        self.chemin = chemin
+        self._externe = hasattr(chemin, "write")
+        self._fichier = chemin if self._externe else open(chemin, "wb")
+        self._fichier.write(b"\0" * ENTETE.size)  # Réécrit à la fermeture
+        self._tampon = bytearray()
+        self._noms = tempfile.TemporaryFile()      # Noms des étudiants placés
+        self._sans_place = tempfile.TemporaryFile()  # Noms des étudiants sans place (ajoutés à la fin)
+        self._decalages, self._decalages_sans_place = array("Q", [0]), array("Q", [0])
+        self._codes, self._codes_sans_place = array("H"), array("H")
+        self._salles = bytearray()
+        self._catalogue_salles = []
+        self._centres, self._matieres, self._classes = {}, {}, {}
+        self.places = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_exc, exc, trace):
+        if type_exc is None:
+            self.fermer()
+        else:
+            self._abandonner()
+
+    @staticmethod
+    def _code(table, valeur):
+        code = table.get(valeur)
+        if code is None:
+            code = table[valeur] = len(table)
+        return code
+
+    def _etudiant(self, nom, classe, matiere, noms, decalages, codes):
+        nom = nom.encode("utf-8")
+        noms.write(nom)
+        decalages.append(decalages[-1] + len(nom))
+        matiere = self._code(self._matieres, matiere)
+        codes.extend((matiere, self._code(self._classes, classe)))
+        return matiere
+
+    def ajouter_salle(self, salle, centre=""):
+        """Écrit les places occupées d'une salle et ses étudiants."""
+        code_centre = self._code(self._centres, centre)
+        numero_salle = len(self._catalogue_salles)
+        topologie = salle.topologie
+        rangees = {rangee: k for k, rangee in enumerate(topologie.rangees)}
+        premiere = self.places
+        for i, id_etudiant in enumerate(salle.occupants):
+            if id_etudiant < 0:
+                continue
+            rangee, ligne, colonne = topologie.places[i]
+            registre = salle.registre
+            matiere = self._etudiant(registre.nom(id_etudiant), registre.classe(id_etudiant),
+                                     registre.matiere(id_etudiant), self._noms, self._decalages, self._codes)
+            self._tampon += PLACE.pack(code_centre, rangees[rangee], numero_salle, ligne, colonne,
+                                       self.places, matiere, 0)
+            self.places += 1
+            if len(self._tampon) >= TAILLE_TAMPON * PLACE.size:
+                self._fichier.write(self._tampon)
+                self._tampon.clear()
+        self._salles += SALLE.pack(code_centre, 0, premiere, self.places - premiere, salle.capacite_totale(),
+                                   salle.placements_avec_contraintes_relachees)
+        self._catalogue_salles.append({"nom": salle.nom, "porte": salle.porte, "structure": topologie.description(),
+                                       "regle": description_regle(topologie.regle)})
+
+    def ajouter_non_places(self, registre, identifiants):
+        """Ajoute des étudiants sans place (numérotés après tous les étudiants placés)."""
+        self.ajouter_sans_place((registre.nom(i), registre.classe(i), registre.matiere(i)) for i in identifiants)
+
+    def ajouter_sans_place(self, etudiants):
+        """Ajoute des étudiants sans place donnés par (nom, classe, matière)."""
+        for nom, classe, matiere in etudiants:
+            self._etudiant(nom, classe, matiere, self._sans_place, self._decalages_sans_place,
+                           self._codes_sans_place)
+
+    def ajouter_moteur(self, moteur, centre=""):
+        """Écrit toutes les salles et les étudiants sans place d'un moteur (ou d'un `PlanCompact`)."""
+        salles = moteur.plan() if hasattr(moteur, "plan") else moteur.salles()
+        for salle in salles:
+            self.ajouter_salle(salle, centre)
+        non_places = moteur.non_places() if callable(moteur.non_places) else moteur.non_places
+        if len(non_places):
+            self.ajouter_non_places(salles[0].registre if salles else moteur.registre, non_places)
+
+    def fermer(self):
+        """Écrit les sections restantes et l'en-tête."""
+        f = self._fichier
+        f.write(self._tampon)
+        positions = [ENTETE.size]
+        positions.append(f.tell())
+        f.write(self._salles)
+        positions.append(f.tell())
+        f.write(json.dumps({
+            "centres": list(self._centres), "matieres": list(self._matieres), "classes": list(self._classes),
+            "salles": self._catalogue_salles,
+        }, ensure_ascii=False).encode("utf-8"))
+        positions.append(f.tell())
+        fin_places = self._decalages[-1]
+        decalages = self._decalages + array("Q", (fin_places + d for d in self._decalages_sans_place[1:]))
+        f.write(decalages.tobytes())
+        positions.append(f.tell())
+        f.write((self._codes + self._codes_sans_place).tobytes())
+        positions.append(f.tell())
+        for noms in (self._noms, self._sans_place):
+            noms.seek(0)
+            shutil.copyfileobj(noms, f)
+            noms.close()
+        positions.append(f.tell())
+        etudiants = len(decalages) - 1
+        f.seek(0)
+        f.write(ENTETE.pack(MAGIQUE, VERSION, 0, len(self._catalogue_salles), etudiants, self.places, *positions))
+        if self._externe:
+            f.seek(0, os.SEEK_END)
+        else:
+            f.close()
+
+    def _abandonner(self):
+        for fichier in (self._noms, self._sans_place):
+            fichier.close()
+        if not self._externe:
+            self._fichier.close()
+            os.remove(self.chemin)
+
+
+# --- Lecture par projection mémoire ---
+class PlanBinaire:
+    """
+    Plan binaire projeté en mémoire: accès direct aux étudiants, aux places et aux salles.
+
+    Seuls l'en-tête et le catalogue (noms et structures des salles) sont lus à
+    l'ouverture; les places, les noms et les codes restent dans le fichier.
+    """
+
+    def __init__(self, chemin):
+        self._fichier = open(chemin, "rb")
+        self._mmap = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        magique, version, _, self.nb_salles, self.nb_etudiants, self.nb_places, *positions = \
+            ENTETE.unpack_from(self._mmap)
+        if magique != MAGIQUE or version != VERSION:
+            self.fermer()
+            raise ValueError(f"{chemin}: pas un plan binaire (version {VERSION})")
+        (self._pos_places, self._pos_salles, self._pos_catalogue, self._pos_decalages,
+         self._pos_codes, self._pos_noms, fin) = positions
+        catalogue = json.loads(self._mmap[self._pos_catalogue:self._pos_decalages])
+        self.centres, self.matieres, self.classes = catalogue["centres"], catalogue["matieres"], catalogue["classes"]
+        self._catalogue_salles = catalogue["salles"]
+        self._numeros = {(info["nom"], self.centres[self._salle(k)[0]]): k
+                         for k, info in enumerate(self._catalogue_salles)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def fermer(self):
+        self._mmap.close()
+        self._fichier.close()
+
+    # Accès élémentaires
+    def _salle(self, k):
+        return SALLE.unpack_from(self._mmap, self._pos_salles + k * SALLE.size)
+
+    def _decalage(self, id_etudiant):
+        return struct.unpack_from("<Q", self._mmap, self._pos_decalages + 8 * id_etudiant)[0]
+
+    def nom(self, id_etudiant):
+        debut = self._pos_noms + self._decalage(id_etudiant)
+        return self._mmap[debut:self._pos_noms + self._decalage(id_etudiant + 1)].decode("utf-8")
+
+    def etudiant(self, id_etudiant):
+        """(nom, classe, matière) d'un étudiant."""
+        matiere, classe = CODES.unpack_from(self._mmap, self._pos_codes + CODES.size * id_etudiant)
+        return self.nom(id_etudiant), self.classes[classe], self.matieres[matiere]
+
+    def place(self, id_etudiant):
+        """
+        Place d'un étudiant.
+
+        Returns:
+            dict | None: "centre", "salle", "rangee", "ligne", "colonne" (numérotées
+            à partir de 0), None pour un étudiant sans place.
+        """
+        if not 0 <= id_etudiant < self.nb_places:
+            return None
+        centre, rangee, salle, ligne, colonne, _, _, _ = PLACE.unpack_from(
+            self._mmap, self._pos_places + PLACE.size * id_etudiant)
+        info = self._catalogue_salles[salle]
+        return {"centre": self.centres[centre], "salle": info["nom"],
+                "rangee": list(info["structure"]["rangees"])[rangee], "ligne": ligne, "colonne": colonne}
+
+    def chercher(self, nom):
+        """Identifiants des étudiants de ce nom (recherche dans le fichier, sans le charger)."""
+        motif = nom.encode("utf-8")
+        trouves = []
+        fin_noms = self._pos_noms + self._decalage(self.nb_etudiants)
+        position = self._mmap.find(motif, self._pos_noms, fin_noms)
+        while position >= 0:
+            decalage = position - self._pos_noms
+            # Étudiant dont le nom commence à ce décalage (recherche dichotomique dans les décalages)
+            id_etudiant = bisect.bisect_right(_Decalages(self), decalage) - 1
+            if self._decalage(id_etudiant) == decalage and self._decalage(id_etudiant + 1) == decalage + len(motif):
+                trouves.append(id_etudiant)
+            position = self._mmap.find(motif, position + 1, fin_noms)
+        return trouves
+
+    # Salles
+    def infos_salles(self):
+        """Résumé des salles: nom, centre, capacité, occupées et relâchées."""
+        infos = []
+        for k, info in enumerate(self._catalogue_salles):
+            centre, _, _, nombre, capacite, relachees = self._salle(k)
+            infos.append({"nom": info["nom"], "centre": self.centres[centre], "capacite": capacite,
+                          "occupees": nombre, "relachees": relachees})
+        return infos
+
+    def salle(self, k):
+        """
+        Reconstruit une salle (et un registre limité à ses étudiants), pour l'affichage ou le PDF.
+
+        Args:
+            k (int | tuple): Numéro de la salle dans le fichier, ou (nom, centre).
+
+        Returns:
+            Salle: Nouvelle salle, les matières gardant les codes du fichier.
+        """
+        if isinstance(k, tuple):
+            k = self._numeros[k]
+        info = self._catalogue_salles[k]
+        _, _, premiere, nombre, _, relachees = self._salle(k)
+        registre = Registre()
+        for matiere in self.matieres:
+            registre.code_matiere(matiere)
+        for classe in self.classes:
+            registre.code_classe(classe)
+        salle = Salle(info["nom"], info["structure"], info["porte"], registre, info["regle"])
+        rangees = salle.topologie.rangees
+        codes = array("H", self._mmap[self._pos_codes + CODES.size * premiere:
+                                      self._pos_codes + CODES.size * (premiere + nombre)])
+        for local, (_, rangee, _, ligne, colonne, id_etudiant, _, _) in enumerate(PLACE.iter_unpack(
+                self._mmap[self._pos_places + PLACE.size * premiere:self._pos_places + PLACE.size * (premiere + nombre)])):
+            registre.noms.append(self.nom(id_etudiant))
+            registre.matiere_de.append(codes[2 * local])
+            registre.classe_de.append(codes[2 * local + 1])
+            salle._occuper(salle.topologie.index[(rangees[rangee], ligne, colonne)], local)
+        salle.placements_avec_contraintes_relachees = relachees
+        return salle
+
+    def salles(self, centre=None):
+        """Salles du plan (d'un centre), reconstruites une à une."""
+        for k in range(self.nb_salles):
+            if centre is None or self.centres[self._salle(k)[0]] == centre:
+                yield self.salle(k)
+
+    def non_places(self):
+        """Identifiants des étudiants sans place."""
+        return range(self.nb_places, self.nb_etudiants)
+
+
+class _Decalages:
+    """Vue séquentielle des décalages des noms, pour `bisect` (sans les charger)."""
+
+    def __init__(self, plan):
+        self._plan = plan
+
+    def __len__(self):
+        return self._plan.nb_etudiants + 1
+
+    def __getitem__(self, i):
+        return self._plan._decalage(i)
+
+
+def fusionner_plans_binaires(chemins, destination):
+    """
+    Fusionne des plans binaires (un par centre, par exemple) en un seul, salle par salle.
+
+    Les centres, salles et étudiants gardent l'ordre des fichiers sources; une
+    seule salle est reconstruite à la fois.
+
+    Returns:
+        dict: "salles", "etudiants" et "places" du plan fusionné.
+    """
+    with EcrivainPlanBinaire(destination) as ecrivain:
+        sans_place = []
+        for chemin in chemins:
+            with PlanBinaire(chemin) as plan:
+                for k, info in enumerate(plan.infos_salles()):
+                    ecrivain.ajouter_salle(plan.salle(k), info["centre"])
+                sans_place.append([plan.etudiant(i) for i in plan.non_places()])
+        for etudiants in sans_place:
+            ecrivain.ajouter_sans_place(etudiants)
+    with PlanBinaire(destination) as plan:
+        return {"salles": plan.nb_salles, "etudiants": plan.nb_etudiants, "places": plan.nb_places}
@@ -0,0 +1,172 @@
+"""Placement exact par programmation dynamique sur les profils de lignes."""
+
+# --- Limites de la résolution exacte ---
+# Au-delà, la preuve est abandonnée (le gabarit de départ est gardé, sans preuve d'optimalité).
+LIMITE_PROFILS = 65_536        # Profils possibles de la fenêtre (étiquettes ^ places de la fenêtre)
+LIMITE_TRANSITIONS = 1_000_000  # Transitions examinées pour une salle (environ une seconde)
+VIDE = -1
+
+
+class _Depassement(Exception):
+    """Espace d'états trop grand pour une résolution exacte."""
+
+
+def nombre_conflits(topologie, etiquettes):
+    """Voisinages de même matière d'un gabarit (étiquettes par place, -1 si vide)."""
+    return sum(1 for i, j, _ in topologie.aretes if etiquettes[i] >= 0 and etiquettes[i] == etiquettes[j])
+
+
+def _resoudre_places(topologie, ordre, etiquettes, stock, budget, borne=None):
+    """
+    Étiquette les places de `ordre` au moindre coût, place par place (profil brisé).
+
+    Les places sont prises ligne par ligne; l'état est le profil des K
+    dernières places étiquetées, K étant le plus grand écart (dans `ordre`)
+    entre deux places voisines, soit une ligne complète pour la règle
+    orthogonale, et le nombre de places déjà attribuées à chaque étiquette.
+    Le coût compte les voisinages de même matière avec les places de la
+    fenêtre et avec les places déjà étiquetées hors de `ordre` (rangée voisine
+    résolue avant), plus un terme de compacité qui repousse les places vides
+    vers la fin. Profil et effectifs sont codés en un seul entier. Avec une
+    borne (séparation et évaluation), les états qui comptent déjà `borne`
+    voisinages ou plus sont abandonnés: les coûts ne font que croître, ils ne
+    peuvent plus faire mieux qu'un gabarit connu.
+
+    Args:
+        topologie (TopologieSalle): Salle compilée.
+        ordre (list): Numéros des places à étiqueter, ligne par ligne.
+        etiquettes (list): Étiquettes des places (None si non attribuée), complétée sur place.
+        stock (dict): Étiquette -> places disponibles (VIDE compris), décrémenté sur place.
+        budget (list): [transitions restantes], décrémenté sur place.
+        borne (int): Voisinages d'un gabarit connu; seuls les gabarits qui en ont moins sont cherchés.
+
+    Returns:
+        bool: Vrai si un gabarit a été trouvé (`etiquettes` et `stock` complétés),
+        faux si aucun ne fait mieux que la borne.
+
+    Raises:
+        _Depassement: Si la fenêtre ou le nombre de transitions dépasse les limites.
+    """
+    n = topologie.capacite()
+    valeurs = [e for e in sorted(stock) if stock[e] > 0]
+    base = len(valeurs) + 1  # Chiffre 0: avant la première place (début de la fenêtre)
+    rang = {i: t for t, i in enumerate(ordre)}
+
+    # Voisins déjà parcourus (poids de leur chiffre dans la fenêtre) et voisins fixés hors de `ordre`
+    ecarts, fixees, fenetre = [], [], 0
+    for t, i in enumerate(ordre):
+        avant, dehors = [], {}
+        for j in topologie.voisins[i]:
+            if j in rang:
+                if rang[j] < t:
+                    avant.append(t - rang[j])
+                    fenetre = max(fenetre, t - rang[j])
+            elif etiquettes[j] is not None and etiquettes[j] >= 0:
+                dehors[etiquettes[j]] = dehors.get(etiquettes[j], 0) + 1
+        ecarts.append([base ** (d - 1) for d in avant])
+        fixees.append(dehors)
+    if len(valeurs) ** fenetre > LIMITE_PROFILS:
+        raise _Depassement()
+    modulo = base ** fenetre
+
+    # Effectifs en base mixte: places de l'étiquette k = (code // poids[k]) % (totaux[k] + 1)
+    totaux = [stock[e] for e in valeurs]
+    poids = [1] * len(valeurs)
+    for k in range(1, len(valeurs)):
+        poids[k] = poids[k - 1] * (totaux[k - 1] + 1)
+    taille_effectifs = poids[-1] * (totaux[-1] + 1) if valeurs else 1
+    penalite = n * n  # Un voisinage coûte plus que toute la compacité
+    cout_max = borne * penalite if borne is not None else None
+
+    etats = {0: 0}  # fenêtre * taille_effectifs + effectifs -> coût
+    retours = []
+    for t, i in enumerate(ordre):
+        budget[0] -= len(etats) * len(valeurs)
+        if budget[0] < 0:
+            raise _Depassement()
+        propres = [fixees[t].get(e, 0) * penalite if e >= 0 else n - i for e in valeurs]
+        suivants, retour = {}, {}
+        for etat, cout_etat in etats.items():
+            vue, effectifs = divmod(etat, taille_effectifs)
+            decalee = vue * base % modulo
+            for k, e in enumerate(valeurs):
+                if effectifs // poids[k] % (totaux[k] + 1) == totaux[k]:
+                    continue
+                chiffre = k + 1
+                cout = cout_etat + propres[k]
+                if e >= 0:
+                    for p in ecarts[t]:
+                        if vue // p % base == chiffre:
+                            cout += penalite
+                    if cout_max is not None and cout >= cout_max:
+                        continue
+                cle = ((decalee + chiffre) % modulo) * taille_effectifs + effectifs + poids[k]
+                if cout < suivants.get(cle, cout + 1):
+                    suivants[cle] = cout
+                    retour[cle] = (etat, k)
+        if not suivants:
+            if borne is not None:
+                return False
+            raise _Depassement()  # Plus de places à étiqueter que de places disponibles
+        retours.append(retour)
+        etats = suivants
+
+    # Reconstruction depuis le meilleur état final
+    cle = min(etats, key=etats.get)
+    for t in range(len(ordre) - 1, -1, -1):
+        cle, k = retours[t][cle]
+        etiquettes[ordre[t]] = valeurs[k]
+        stock[valeurs[k]] -= 1
+    return True
+
+
+def resoudre_profils(topologie, effectifs, depart=None):
+    """
+    Gabarit matière → place minimisant les voisinages de même matière, par
+    programmation dynamique sur les profils de lignes (matrice de transfert).
+
+    La salle est parcourue ligne par ligne, toutes rangées confondues: l'état
+    est le profil de la ligne précédente, places correspondantes des rangées
+    adjacentes comprises. Un gabarit de départ (celui de `rechercher_modele`
+    par exemple) sert de borne: sans voisinage, il est optimal sans calcul;
+    sinon seuls les états qui peuvent faire mieux sont développés, et s'il n'y
+    en a aucun, c'est lui l'optimum. Les salles à rangées de 2 à 4 colonnes
+    sont ainsi prouvées jusqu'à trois matières, sauf quand elles sont presque
+    pleines et que des voisinages sont inévitables: l'espace d'états dépasse
+    alors le budget et l'optimum n'est pas prouvé.
+
+    Args:
+        topologie (TopologieSalle): Salle compilée.
+        effectifs (tuple): Nombre d'étudiants par rang de matière (décroissant),
+            comme pour `rechercher_modele`.
+        depart (list): Gabarit connu pour ces effectifs (rang par place, -1 si vide).
+
+    Returns:
+        tuple | None: (étiquettes, optimal) avec, pour chaque place, le rang de
+        la matière ou -1 si vide, et `optimal` vrai si le gabarit est prouvé
+        optimal (toujours le cas sans voisinage de même matière). Si l'espace
+        d'états est trop grand: `depart` non prouvé, ou None sans départ.
+    """
+    if depart is not None:
+        borne = nombre_conflits(topologie, depart)
+        if borne == 0:
+            return list(depart), True
+    else:
+        borne = None
+
+    n = topologie.capacite()
+    stock, reste = {}, n
+    for rang, effectif in enumerate(effectifs):
+        stock[rang] = min(effectif, reste)  # Au-delà de la capacité, les derniers rangs ne sont pas placés
+        reste -= stock[rang]
+    stock[VIDE] = reste
+
+    # Ligne par ligne sur toute la salle (même numéro de ligne dans toutes les rangées)
+    ordre = sorted(range(n), key=lambda i: (topologie.places[i][1], i))
+    etiquettes = [None] * n
+    try:
+        if not _resoudre_places(topologie, ordre, etiquettes, stock, [LIMITE_TRANSITIONS], borne):
+            return list(depart), True  # Aucun gabarit n'a moins de voisinages que le départ
+    except _Depassement:
+        return (list(depart), False) if depart is not None else None
+    return etiquettes, True
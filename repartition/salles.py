@@ -0,0 +1,266 @@
+"""Catalogue des salles, registre compact des étudiants et classe Salle."""
+import sys
+from array import array
+
+from .topologie import compiler_structure
+
+# --- Définition des structures des salles ---
+# Format historique {rangée: (lignes, colonnes)}. Les grandes salles (N rangées, longueurs
+# de lignes irrégulières, places hors service) utilisent le format généralisé, par exemple:
+#   "Grand-Amphi": {"rangees": {"A": (12, 8), "B": {"longueurs": [6, 7, 8, 8]},
+#                               "C": {"dimensions": (12, 8), "desactivees": [(0, 3)]}},
+#                   "adjacence": [("A", "B"), ("B", "C")]}
+# (voir `normaliser_structure`).
+STRUCTURES_SALLES = {
+    "Amphitheatre": {"gauche": (10, 10), "droite": (10, 10)},
+    "ISE1-MATH": {"gauche": (7, 4), "droite": (5, 4)},
+    "AS1": {"gauche": (5, 4), "droite": (5, 4)},
+    "AS2": {"gauche": (5, 2), "milieu": (5, 2), "droite": (5, 2)},
+    "AS3": {"gauche": (3, 4), "droite": (3, 4)},
+    "ISEL1": {"gauche": (5, 2), "milieu": (5, 2), "droite": (5, 2)},
+    "ISEL2": {"gauche": (5, 2), "milieu": (5, 2), "droite": (5, 2)},
+    "ISEL3": {"gauche": (5, 2), "milieu": (5, 2), "droite": (5, 2)},
+    "ISEECO": {"gauche": (5, 2), "milieu": (5, 2), "droite": (5, 2)},
+    "ISEMATH": {"gauche": (7, 4), "droite": (5, 4)},
+    "ISE3": {"gauche": (6, 4), "droite": (6, 4)},
+    "TSS1": {"gauche": (6, 2), "milieu": (6,2), "droite": (6, 2)}
+}
+
+# --- Registre compact des étudiants ---
+class Registre:
+    """
+    Table unique des étudiants d'une répartition.
+
+    Chaque étudiant est identifié par un entier; son nom est stocké une seule fois
+    et sa matière et sa classe sous forme de codes internés (tableaux compacts).
+    Les salles ne conservent que ces identifiants.
+    """
+    __slots__ = ("noms", "matiere_de", "classe_de", "matieres", "classes", "_codes_matieres", "_codes_classes")
+
+    def __init__(self):
+        self.noms = []
+        self.matiere_de = array('H')
+        self.classe_de = array('H')
+        self.matieres = []   # Code -> libellé de la matière
+        self.classes = []    # Code -> nom de la classe
+        self._codes_matieres = {}
+        self._codes_classes = {}
+
+    def __len__(self):
+        return len(self.noms)
+
+    def code_matiere(self, matiere):
+        """Code interné d'une matière (créé au besoin)."""
+        code = self._codes_matieres.get(matiere)
+        if code is None:
+            code = self._codes_matieres[matiere] = len(self.matieres)
+            self.matieres.append(sys.intern(str(matiere)))
+        return code
+
+    def code_classe(self, classe):
+        """Code interné d'une classe (créé au besoin)."""
+        code = self._codes_classes.get(classe)
+        if code is None:
+            code = self._codes_classes[classe] = len(self.classes)
+            self.classes.append(sys.intern(str(classe)))
+        return code
+
+    def ajouter_classe(self, classe, matiere, noms):
+        """
+        Ajoute tous les étudiants d'une classe.
+
+        Returns:
+            range: Identifiants attribués aux étudiants, dans l'ordre de `noms`.
+        """
+        debut = len(self.noms)
+        self.noms.extend(str(nom) for nom in noms)
+        nb = len(self.noms) - debut
+        self.matiere_de.extend(array('H', [self.code_matiere(matiere)]) * nb)
+        self.classe_de.extend(array('H', [self.code_classe(classe)]) * nb)
+        return range(debut, debut + nb)
+
+    def nom(self, id_etudiant):
+        return self.noms[id_etudiant]
+
+    def matiere(self, id_etudiant):
+        return self.matieres[self.matiere_de[id_etudiant]]
+
+    def classe(self, id_etudiant):
+        return self.classes[self.classe_de[id_etudiant]]
+
+    def etat(self):
+        """Colonnes du registre sous forme sérialisable."""
+        return {"noms": list(self.noms), "matiere_de": list(self.matiere_de), "classe_de": list(self.classe_de),
+                "matieres": list(self.matieres), "classes": list(self.classes)}
+
+    @classmethod
+    def depuis_etat(cls, etat):
+        registre = cls()
+        for matiere in etat["matieres"]:
+            registre.code_matiere(matiere)
+        for classe in etat["classes"]:
+            registre.code_classe(classe)
+        registre.noms = list(etat["noms"])
+        registre.matiere_de = array('H', etat["matiere_de"])
+        registre.classe_de = array('H', etat["classe_de"])
+        return registre
+
+
+# --- Définition de la classe Salle pour gérer les placements ---
+class Salle:
+    __slots__ = ("nom", "porte", "structure", "topologie", "registre", "occupants", "codes",
+                 "occupees", "placements_avec_contraintes_relachees", "nb_codes", "bloquees")
+
+    def __init__(self, nom, structure, porte="gauche", registre=None, regle=None):
+        """
+        Initialisation d'une salle d'examen.
+        Args:
+            nom (str): Nom de la salle (ex: AMPHI, ISE1-MATH).
+            structure (dict): Structure des rangées, au format historique (gauche, milieu, droite avec
+                dimensions (lignes, colonnes)) ou généralisé (voir `normaliser_structure`).
+            porte (str): Position de la porte ("gauche" ou "droite").
+            registre (Registre): Table des étudiants dont les identifiants sont placés dans la salle.
+            regle: Règle de voisinage (nom de REGLES_VOISINAGE, dict ou None pour la règle orthogonale).
+        """
+        self.nom = nom
+        self.porte = porte
+        self.structure = structure
+        self.topologie = compiler_structure(structure, regle)  # Partagée entre les salles de même structure et règle
+        self.registre = registre if registre is not None else Registre()
+        # Une case par place, dans l'ordre de remplissage: identifiant d'étudiant et code de matière (-1 si libre)
+        self.occupants = array('i', [-1]) * self.topologie.capacite()
+        self.codes = array('h', [-1]) * self.topologie.capacite()
+        self.occupees = 0
+        self.placements_avec_contraintes_relachees = 0  # Compteur pour les placements avec contraintes relâchées
+        # Pour chaque place et chaque matière, nombre de voisins occupés par cette matière
+        # (nb_codes compteurs par place): la validité d'une place se lit en O(1)
+        self.nb_codes = 0
+        self.bloquees = array('H')
+
+    def capacite_totale(self):
+        """Calcule la capacité totale de la salle."""
+        return len(self.occupants)
+
+    def nombre_etudiants(self):
+        """Compte le nombre d'étudiants placés."""
+        return self.occupees
+
+    def nombre_places_vides(self):
+        """Calcule le nombre de places vides."""
+        return self.capacite_totale() - self.nombre_etudiants()
+
+    def taux_remplissage(self):
+        """Calcule le taux de remplissage de la salle."""
+        return (self.nombre_etudiants() / self.capacite_totale() * 100) if self.capacite_totale() > 0 else 0
+
+    def place(self, rangée, ligne_idx, col_idx):
+        """Retourne (nom_etudiant, epreuve) pour une place occupée, None sinon."""
+        id_etudiant = self.occupants[self.topologie.index[(rangée, ligne_idx, col_idx)]]
+        if id_etudiant < 0:
+            return None
+        return self.registre.nom(id_etudiant), self.registre.matiere(id_etudiant)
+
+    def grille(self, rangée):
+        """
+        Retourne la rangée sous forme de lignes de places ((nom, epreuve) ou None), pour l'affichage.
+
+        Chaque ligne a sa propre longueur; les places désactivées valent None
+        et se distinguent des places vides par `topologie.masques[rangée]`.
+        """
+        lignes = []
+        for li, masque_ligne in enumerate(self.topologie.masques.get(rangée, ())):
+            lignes.append([self.place(rangée, li, ci) if utilisable else None
+                           for ci, utilisable in enumerate(masque_ligne)])
+        return lignes
+
+    def place_valide(self, rangée, ligne_idx, col_idx, epreuve):
+        """Vérifie si une place est valide pour un étudiant d'une épreuve donnée."""
+        i = self.topologie.index.get((rangée, ligne_idx, col_idx))
+        if i is None:
+            return False
+        return self._place_valide(i, self.registre.code_matiere(epreuve))
+
+    def _place_valide(self, i, code):
+        """Place libre sans voisin de même matière, au sens de la règle de voisinage de la salle."""
+        if self.codes[i] != -1:
+            return False
+        return code >= self.nb_codes or self.bloquees[i * self.nb_codes + code] == 0
+
+    def rangées_adj(self, rangée):
+        """Retourne les rangées adjacentes à une rangée donnée."""
+        return self.topologie.rangees_adj(rangée)
+
+    def placer_etudiant(self, id_etudiant):
+        """Place un étudiant en remplissant de manière compacte pour éviter les espaces vides."""
+        if self.occupees >= len(self.codes):
+            return False  # Salle pleine
+        
+        # Essayer d'abord le placement avec contraintes strictes
+        if self._placement_compact_sequentiel(id_etudiant):
+            return True
+        
+        # Si échec, essayer le placement sans contrainte d'adjacence de matière
+        if self._placement_force_sequentiel(id_etudiant):
+            self.placements_avec_contraintes_relachees += 1
+            return True
+        
+        return False
+
+    def placer_etudiant_a(self, id_etudiant, i, relache=False):
+        """Place un étudiant à la place numéro `i` imposée par un modèle (`relache` si le modèle l'a prévu relâché)."""
+        if self.codes[i] != -1:
+            return False
+        if relache:
+            self.placements_avec_contraintes_relachees += 1
+        self._occuper(i, id_etudiant)
+        return True
+
+    def _occuper(self, i, id_etudiant):
+        code = self.registre.matiere_de[id_etudiant]
+        if code >= self.nb_codes:
+            self._agrandir_bloquees(max(code + 1, len(self.registre.matieres)))
+        self.occupants[i] = id_etudiant
+        self.codes[i] = code
+        self.occupees += 1
+        nb_codes, bloquees = self.nb_codes, self.bloquees
+        for j in self.topologie.voisins[i]:
+            bloquees[j * nb_codes + code] += 1
+
+    def liberer(self, i):
+        """Libère la place numéro `i`."""
+        code = self.codes[i]
+        if code != -1:
+            self.occupants[i] = -1
+            self.codes[i] = -1
+            self.occupees -= 1
+            nb_codes, bloquees = self.nb_codes, self.bloquees
+            for j in self.topologie.voisins[i]:
+                bloquees[j * nb_codes + code] -= 1
+
+    def _agrandir_bloquees(self, nb_codes):
+        """Réserve des compteurs pour `nb_codes` matières en conservant les compteurs existants."""
+        ancien, anciennes = self.nb_codes, self.bloquees
+        self.bloquees = array('H', [0]) * (len(self.codes) * nb_codes)
+        if ancien:
+            for i in range(len(self.codes)):
+                self.bloquees[i * nb_codes:i * nb_codes + ancien] = anciennes[i * ancien:(i + 1) * ancien]
+        self.nb_codes = nb_codes
+    
+    def _placement_force_sequentiel(self, id_etudiant):
+        """Placement forcé sans contrainte d'adjacence de matière - garantit le placement si une place libre existe."""
+        # Les places sont numérotées gauche d'abord, puis milieu, puis droite, ligne par ligne
+        if self.occupees >= len(self.codes):
+            return False
+        self._occuper(self.codes.index(-1), id_etudiant)
+        return True
+    
+    def _placement_compact_sequentiel(self, id_etudiant):
+        """Algorithme de placement compact séquentiel pour éviter les espaces vides."""
+        code = self.registre.matiere_de[id_etudiant]
+        # Parcours dans l'ordre de numérotation: gauche, milieu, droite, ligne par ligne
+        for i in range(len(self.codes)):
+            if self._place_valide(i, code):
+                self._occuper(i, id_etudiant)
+                return True
+        
+        return False
@@ -0,0 +1,142 @@
+"""
+Comparaison de scénarios de répartition, évalués dans un pool de processus.
+
+Un scénario décrit une variante de la configuration validée::
+
+    {"nom": "AS1 au lieu d'ISE3",
+     "salles": [noms de STRUCTURES_SALLES],
+     "classes": [classes retenues],              # facultatif: toutes par défaut
+     "regroupements": [["ISE1", "ISE2"], ...],    # facultatif: classes composant ensemble
+     "matieres": {classe: matiere},              # facultatif: épreuves modifiées
+     "remplissage": "sequentiel" | "entrelace",  # facultatif
+     "modeles": true}                            # facultatif
+
+Les classes d'un regroupement sont placées comme une seule classe (nommée
+« ISE1 + ISE2 ») qui compose l'épreuve de la première. Les listes d'étudiants
+ne sont transmises qu'une fois à chaque processus du pool; chaque scénario
+n'envoie que sa description et ne renvoie que ses mesures.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .capacite import relachements_minimaux
+from .moteur import MoteurPlacement
+from .salles import STRUCTURES_SALLES, Salle
+
+# --- Données partagées par les scénarios d'un processus ---
+_etudiants_par_classe = {}
+_matieres_par_classe = {}
+_regle = None
+
+
+def _initialiser(etudiants_par_classe, matieres_par_classe, regle):
+    global _etudiants_par_classe, _matieres_par_classe, _regle
+    _etudiants_par_classe, _matieres_par_classe, _regle = etudiants_par_classe, matieres_par_classe, regle
+
+
+def _classes_du_scenario(scenario):
+    """Étudiants et matières par classe (ou regroupement) du scénario."""
+    matieres = {**_matieres_par_classe, **scenario.get("matieres", {})}
+    retenues = list(scenario.get("classes") or _etudiants_par_classe)
+    inconnues = [classe for classe in retenues if classe not in _etudiants_par_classe]
+    if inconnues:
+        raise ValueError(f"Classes inconnues: {', '.join(map(str, inconnues))}")
+
+    etudiants, matieres_par_classe = {}, {}
+    regroupees = set()
+    for groupe in scenario.get("regroupements", ()):
+        groupe = [classe for classe in groupe if classe in retenues and classe not in regroupees]
+        if len(groupe) < 2:
+            continue
+        nom = " + ".join(groupe)
+        etudiants[nom] = [etudiant for classe in groupe for etudiant in _etudiants_par_classe[classe]]
+        matieres_par_classe[nom] = matieres[groupe[0]]
+        regroupees.update(groupe)
+    for classe in retenues:
+        if classe not in regroupees:
+            etudiants[classe] = list(_etudiants_par_classe[classe])
+            matieres_par_classe[classe] = matieres[classe]
+    return etudiants, matieres_par_classe
+
+
+def evaluer_scenario(scenario):
+    """
+    Place les étudiants d'un scénario et mesure le résultat.
+
+    Args:
+        scenario (dict): Scénario au format décrit en tête du module.
+
+    Returns:
+        dict: "nom", "salles_utilisees", "salles", "capacite", "etudiants",
+        "utilisation" (%), "relachements_prevus" (minorant de `relachements_minimaux`),
+        "relachees", "non_places", "duree" (s) et "erreur" (None si le scénario a abouti).
+    """
+    debut = time.perf_counter()
+    mesure = {"nom": scenario.get("nom", ""), "erreur": None}
+    try:
+        etudiants, matieres_par_classe = _classes_du_scenario(scenario)
+        noms_salles = list(scenario["salles"])
+        inconnues = [nom for nom in noms_salles if nom not in STRUCTURES_SALLES]
+        if inconnues:  # Une faute de frappe ne doit pas passer pour un scénario à moins de salles
+            raise ValueError(f"salle(s) inconnue(s): {', '.join(map(str, inconnues))}")
+        regle = scenario.get("regle", _regle)
+        salles = sorted((Salle(nom, STRUCTURES_SALLES[nom], regle=regle) for nom in noms_salles),
+                        key=lambda salle: salle.capacite_totale(), reverse=True)
+
+        effectifs_par_matiere = {}
+        for classe, noms in etudiants.items():
+            matiere = matieres_par_classe[classe]
+            effectifs_par_matiere[matiere] = effectifs_par_matiere.get(matiere, 0) + len(noms)
+
+        bibliotheque = None
+        if scenario.get("modeles", True):
+            from .modeles import bibliotheque_modeles
+            bibliotheque = bibliotheque_modeles()
+        moteur = MoteurPlacement(salles, etudiants, matieres_par_classe, graine=scenario.get("graine", 0),
+                                 bibliotheque=bibliotheque, remplissage=scenario.get("remplissage", "sequentiel"))
+        moteur.executer_tout()
+
+        capacite = sum(salle.capacite_totale() for salle in salles)
+        nb_etudiants = sum(effectifs_par_matiere.values())
+        mesure.update(
+            salles_utilisees=sum(1 for salle in salles if salle.nombre_etudiants()),
+            salles=len(salles),
+            capacite=capacite,
+            etudiants=nb_etudiants,
+            utilisation=round(nb_etudiants / capacite * 100, 1) if capacite else 0.0,
+            relachements_prevus=relachements_minimaux(noms_salles, effectifs_par_matiere, regle),
+            relachees=sum(salle.placements_avec_contraintes_relachees for salle in salles),
+            non_places=len(moteur.non_places),
+        )
+    except (KeyError, ValueError) as e:
+        mesure["erreur"] = f"{type(e).__name__}: {e}"
+    mesure["duree"] = time.perf_counter() - debut
+    return mesure
+
+
+def comparer_scenarios(scenarios, etudiants_par_classe, matieres_par_classe, regle=None, travailleurs=None):
+    """
+    Évalue une liste de scénarios, en parallèle s'il y en a plusieurs.
+
+    Args:
+        scenarios (list): Scénarios au format décrit en tête du module.
+        etudiants_par_classe (dict): Classe -> liste des noms d'étudiants (toutes les classes utilisables).
+        matieres_par_classe (dict): Classe -> épreuve par défaut.
+        regle: Règle de voisinage par défaut des scénarios.
+        travailleurs (int): Processus du pool (nombre de cœurs par défaut); 1 pour tout évaluer sur place.
+
+    Returns:
+        list: Mesures de `evaluer_scenario`, dans l'ordre des scénarios.
+    """
+    donnees = ({classe: list(noms) for classe, noms in etudiants_par_classe.items()}, dict(matieres_par_classe), regle)
+    travailleurs = min(travailleurs or os.cpu_count() or 1, len(scenarios))
+    if travailleurs <= 1:
+        _initialiser(*donnees)
+        return [evaluer_scenario(scenario) for scenario in scenarios]
+
+    # forkserver, comme le service: les processus ne copient pas les threads du serveur Streamlit
+    with ProcessPoolExecutor(max_workers=travailleurs, mp_context=multiprocessing.get_context("forkserver"),
+                             initializer=_initialiser, initargs=donnees) as pool:
+        return list(pool.map(evaluer_scenario, scenarios))
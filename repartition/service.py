@@ -0,0 +1,313 @@
+"""
+Service HTTP local de placement: file de travaux et pool de processus.
+
+Lancement (hors ligne, une seule machine)::
+
+    python -m repartition.service --port 8765 --travailleurs 4
+
+Points d'accès (JSON):
+
+- ``POST /jobs``: soumet un travail, répond ``202`` avec son identifiant;
+- ``GET /jobs/<id>``: état, durées et résultat (plan) du travail;
+- ``GET /jobs/<id>/pdf``: PDF d'un travail de type ``"pdf"`` terminé;
+- ``GET /stats``: profondeur de la file, travaux en cours et durées.
+
+Un travail est un objet JSON::
+
+    {"type": "placement" | "pdf",
+     "matieres_par_classe": {classe: matiere},
+     "etudiants": {classe: [noms]}            # ou
+     "classeur_etudiants": "<xlsx en base64>", # une feuille par classe
+     "salles": [noms de STRUCTURES_SALLES] ou {nom: structure},
+     "regle": "orthogonale", "graine": null, "modeles": true,
+     "remplissage": "sequentiel" | "entrelace",
+     "plan": <point de reprise>                # pour un PDF d'un plan existant
+     "pdf": {"semestre": ..., "date": ..., "heure_debut": ..., "heure_fin": ..., "compact": bool}}
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import os
+import re
+import signal
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .moteur import MoteurPlacement
+from .salles import STRUCTURES_SALLES, Salle
+
+# --- Paramètres du service ---
+PORT_PAR_DEFAUT = int(os.environ.get("REPARTITION_PORT", "8765"))
+TAILLE_MAX_REQUETE = 64 * 1024 * 1024  # Classeurs encodés compris
+TRAVAUX_CONSERVES = 256  # Travaux terminés gardés pour consultation (les plus anciens sont oubliés)
+TYPES_TRAVAUX = ("placement", "pdf")
+
+
+# --- Exécution d'un travail (dans un processus du pool) ---
+def _salles_demandees(demande):
+    salles = demande["salles"]
+    regle = demande.get("regle")
+    if isinstance(salles, dict):
+        return [Salle(nom, structure, regle=regle) for nom, structure in salles.items()]
+    inconnues = [nom for nom in salles if nom not in STRUCTURES_SALLES]
+    if inconnues:
+        raise ValueError(f"Salles sans structure définie: {', '.join(map(str, inconnues))}")
+    return [Salle(nom, STRUCTURES_SALLES[nom], regle=regle) for nom in salles]
+
+
+def _etudiants_demandes(demande):
+    matieres_par_classe = demande["matieres_par_classe"]
+    if "etudiants" in demande:
+        etudiants = demande["etudiants"]
+    else:
+        from .chargement import colonnes_classeur
+        etudiants = colonnes_classeur(base64.b64decode(demande["classeur_etudiants"]))
+    manquantes = [classe for classe in matieres_par_classe if classe not in etudiants]
+    if manquantes:
+        raise ValueError(f"Classes absentes de la liste des étudiants: {', '.join(manquantes)}")
+    return {classe: list(etudiants[classe]) for classe in matieres_par_classe}
+
+
+def executer_travail(demande):
+    """
+    Exécute un travail de placement ou de PDF.
+
+    Args:
+        demande (dict): Travail au format décrit en tête du module.
+
+    Returns:
+        dict: "plan" (point de reprise), "resume" par salle, "non_places",
+        "avertissements" (échecs d'enregistrement des modèles), "debut" et
+        "fin" (horloge murale du processus), puis "pdf" (octets) et "pages" pour
+        un travail de type "pdf".
+    """
+    debut = time.time()
+    avertissements = []
+    if demande.get("plan") is not None:
+        moteur = MoteurPlacement.reprendre(demande["plan"])
+    else:
+        bibliotheque = None
+        if demande.get("modeles", True):
+            from .modeles import bibliotheque_modeles
+            bibliotheque = bibliotheque_modeles()
+        moteur = MoteurPlacement(_salles_demandees(demande), _etudiants_demandes(demande),
+                                 demande["matieres_par_classe"], graine=demande.get("graine"),
+                                 bibliotheque=bibliotheque, remplissage=demande.get("remplissage", "sequentiel"))
+        echecs_avant = bibliotheque.echecs_sauvegarde if bibliotheque else 0
+        moteur.executer_tout()
+        if bibliotheque and bibliotheque.echecs_sauvegarde > echecs_avant:
+            avertissements.append(bibliotheque.erreur_sauvegarde)
+
+    resultat = {
+        "plan": moteur.point_de_reprise(),
+        "resume": [{"salle": salle.nom, "capacite": salle.capacite_totale(), "occupees": salle.nombre_etudiants(),
+                    "relachees": salle.placements_avec_contraintes_relachees} for salle in moteur.salles],
+        "non_places": moteur.non_places_noms(),
+        "avertissements": avertissements,
+    }
+
+    if demande.get("type") == "pdf":
+        from .export_pdf import generer_pdf
+        options = demande.get("pdf", {})
+        descripteur, chemin_pdf = tempfile.mkstemp(suffix=".pdf")
+        os.close(descripteur)
+        try:
+            resultat["pages"] = generer_pdf(moteur.salles, options.get("semestre", ""), options.get("date", ""),
+                                            options.get("heure_debut", ""), options.get("heure_fin", ""),
+                                            demande["matieres_par_classe"], chemin_pdf,
+                                            compact=options.get("compact", False))["pages"]
+            with open(chemin_pdf, "rb") as f:
+                resultat["pdf"] = f.read()
+        finally:
+            os.remove(chemin_pdf)
+
+    resultat["debut"] = debut
+    resultat["fin"] = time.time()
+    return resultat
+
+
+# --- File de travaux ---
+class Travail:
+    """Travail soumis au service: demande en cours d'exécution ou résultat."""
+    __slots__ = ("id", "type", "soumis", "future")
+
+    def __init__(self, type_travail, future):
+        self.id = uuid.uuid4().hex
+        self.type = type_travail
+        self.soumis = time.time()
+        self.future = future
+
+    def etat(self):
+        if self.future.done():
+            return "echec" if self.future.exception() is not None else "termine"
+        return "en_cours" if self.future.running() else "en_attente"
+
+    def durees(self):
+        """Attente dans la file et durée d'exécution (secondes), une fois le travail terminé."""
+        if not self.future.done() or self.future.exception() is not None:
+            return {"attente": None, "execution": None}
+        resultat = self.future.result()
+        return {"attente": round(resultat["debut"] - self.soumis, 3),
+                "execution": round(resultat["fin"] - resultat["debut"], 3)}
+
+    def description(self, avec_resultat=False):
+        description = {"id": self.id, "type": self.type, "etat": self.etat(), "soumis": self.soumis, **self.durees()}
+        if self.future.done():
+            erreur = self.future.exception()
+            if erreur is not None:
+                description["erreur"] = f"{type(erreur).__name__}: {erreur}"
+            elif avec_resultat:
+                resultat = self.future.result()
+                description.update({cle: valeur for cle, valeur in resultat.items() if cle != "pdf"})
+        return description
+
+
+class FileTravaux:
+    """Pool de processus et registre des travaux soumis (partagé par les threads du serveur HTTP)."""
+
+    def __init__(self, travailleurs=None):
+        self.travailleurs = travailleurs or os.cpu_count() or 1
+        # forkserver: les processus ne copient ni les threads du serveur ni sa socket d'écoute
+        self.pool = ProcessPoolExecutor(max_workers=self.travailleurs,
+                                        mp_context=multiprocessing.get_context("forkserver"))
+        self.travaux = OrderedDict()
+        self.verrou = threading.Lock()
+
+    def soumettre(self, demande):
+        type_travail = demande.get("type", "placement")
+        if type_travail not in TYPES_TRAVAUX:
+            raise ValueError(f"Type de travail inconnu: '{type_travail}'")
+        if "matieres_par_classe" not in demande:
+            raise ValueError("Champ 'matieres_par_classe' manquant")
+        if demande.get("plan") is None and ("salles" not in demande or
+                                            not ("etudiants" in demande or "classeur_etudiants" in demande)):
+            raise ValueError("Champs 'salles' et 'etudiants' (ou 'classeur_etudiants') requis sans 'plan'")
+        travail = Travail(type_travail, self.pool.submit(executer_travail, demande))
+        with self.verrou:
+            self.travaux[travail.id] = travail
+            self._oublier_anciens()
+        return travail
+
+    def _oublier_anciens(self):
+        termines = [id_travail for id_travail, travail in self.travaux.items() if travail.future.done()]
+        for id_travail in termines[:max(0, len(termines) - TRAVAUX_CONSERVES)]:
+            del self.travaux[id_travail]
+
+    def travail(self, id_travail):
+        with self.verrou:
+            return self.travaux.get(id_travail)
+
+    def statistiques(self):
+        """Profondeur de la file, travaux en cours et durées des derniers travaux terminés."""
+        with self.verrou:
+            travaux = list(self.travaux.values())
+        etats = [travail.etat() for travail in travaux]
+        termines = [travail.durees() for travail, etat in zip(travaux, etats) if etat == "termine"]
+
+        def moyenne(cle):
+            valeurs = [d[cle] for d in termines]
+            return round(sum(valeurs) / len(valeurs), 3) if valeurs else None
+
+        # Le pool transmet d'avance quelques travaux à ses processus: au-delà du nombre de
+        # processus, un travail "en cours" attend encore dans la file
+        en_cours = min(etats.count("en_cours"), self.travailleurs)
+        return {
+            "travailleurs": self.travailleurs,
+            "en_attente": etats.count("en_attente") + etats.count("en_cours") - en_cours,
+            "en_cours": en_cours,
+            "termines": etats.count("termine"),
+            "echecs": etats.count("echec"),
+            "attente_moyenne": moyenne("attente"),
+            "execution_moyenne": moyenne("execution"),
+            "travaux": [travail.description() for travail in travaux[-50:]],
+        }
+
+    def arreter(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+# --- Serveur HTTP ---
+class GestionnaireRequetes(BaseHTTPRequestHandler):
+    """Traduit les requêtes HTTP en opérations sur la file de travaux (`self.server.file_travaux`)."""
+    server_version = "RepartitionService/1.0"
+
+    def _repondre(self, statut, contenu, type_contenu="application/json"):
+        if type_contenu == "application/json":
+            contenu = json.dumps(contenu, ensure_ascii=False).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(contenu)))
+        self.end_headers()
+        self.wfile.write(contenu)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._repondre(404, {"erreur": "Ressource inconnue"})
+        longueur = int(self.headers.get("Content-Length") or 0)
+        if longueur > TAILLE_MAX_REQUETE:
+            return self._repondre(413, {"erreur": "Requête trop volumineuse"})
+        try:
+            demande = json.loads(self.rfile.read(longueur) or b"{}")
+            travail = self.server.file_travaux.soumettre(demande)
+        except (ValueError, TypeError, AttributeError) as e:
+            return self._repondre(400, {"erreur": str(e)})
+        self._repondre(202, travail.description())
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            return self._repondre(200, self.server.file_travaux.statistiques())
+        correspondance = re.fullmatch(r"/jobs/([0-9a-f]+)(/pdf)?/?", self.path)
+        travail = self.server.file_travaux.travail(correspondance.group(1)) if correspondance else None
+        if travail is None:
+            return self._repondre(404, {"erreur": "Travail inconnu"})
+        if not correspondance.group(2):
+            return self._repondre(200, travail.description(avec_resultat=True))
+        if travail.etat() != "termine" or travail.type != "pdf":
+            return self._repondre(409, {"erreur": "PDF non disponible", "etat": travail.etat()})
+        self._repondre(200, travail.future.result()["pdf"], "application/pdf")
+
+    def log_message(self, format, *args):
+        pass  # Les durées sont exposées par /stats
+
+
+def creer_serveur(hote="127.0.0.1", port=PORT_PAR_DEFAUT, travailleurs=None):
+    """
+    Crée le serveur HTTP et son pool de processus (sans le démarrer).
+
+    Returns:
+        ThreadingHTTPServer: Serveur dont `file_travaux` est la `FileTravaux` associée.
+    """
+    serveur = ThreadingHTTPServer((hote, port), GestionnaireRequetes)
+    serveur.file_travaux = FileTravaux(travailleurs)
+    return serveur
+
+
+def main():
+    parseur = argparse.ArgumentParser(description="Service HTTP local de répartition des étudiants")
+    parseur.add_argument("--hote", default="127.0.0.1", help="Adresse d'écoute (127.0.0.1 par défaut)")
+    parseur.add_argument("--port", type=int, default=PORT_PAR_DEFAUT)
+    parseur.add_argument("--travailleurs", type=int, default=None, help="Processus de placement (nombre de CPU par défaut)")
+    arguments = parseur.parse_args()
+
+    serveur = creer_serveur(arguments.hote, arguments.port, arguments.travailleurs)
+    print(f"Service de répartition sur http://{arguments.hote}:{arguments.port} "
+          f"({serveur.file_travaux.travailleurs} processus)")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # Arrêt propre du pool sur `kill`
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        serveur.server_close()
+        serveur.file_travaux.arreter()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Compilation des structures de salles en places numérotées et graphe des voisinages."""
+from functools import lru_cache
+
+from .voisinage import compiler_regle, type_decalage
+
+# --- Topologie compilée des salles ---
+ORDRE_RANGEES = ['gauche', 'milieu', 'droite']
+
+
+def normaliser_structure(structure):
+    """
+    Forme canonique (hashable) d'une structure de salle.
+
+    Deux formats sont acceptés:
+
+    - historique: ``{"gauche": (lignes, colonnes), "milieu": ..., "droite": ...}``;
+      les rangées sont reliées dans l'ordre gauche, milieu, droite.
+    - généralisé: ``{"rangees": {nom: definition, ...}, "adjacence": [(a, b), ...]}``
+      où chaque définition est soit ``(lignes, colonnes)``, soit un dict avec
+      ``"dimensions": (lignes, colonnes)`` ou ``"longueurs": [colonnes de chaque ligne]``
+      et éventuellement ``"desactivees": [(ligne, colonne), ...]`` (places cassées
+      ou réservées). Sans ``"adjacence"``, les rangées sont reliées dans l'ordre
+      de déclaration; deux rangées non reliées sont séparées par une allée.
+
+    Args:
+        structure (dict): Structure de salle, dans l'un des deux formats.
+
+    Returns:
+        tuple: ((nom, longueurs, desactivees), ...), ((a, b), ...) avec les
+        longueurs par ligne, les places désactivées triées et les paires de
+        rangées adjacentes dans l'ordre des rangées.
+    """
+    if isinstance(structure, tuple):
+        return structure  # Déjà normalisée (clé de mémoïsation)
+
+    if "rangees" in structure:
+        definitions = list(structure["rangees"].items())
+        adjacence = structure.get("adjacence")
+    else:
+        noms = [r for r in ORDRE_RANGEES if r in structure]
+        noms += sorted(r for r in structure if r not in ORDRE_RANGEES)
+        definitions = [(r, structure[r]) for r in noms]
+        adjacence = None
+
+    rangees = []
+    for nom, definition in definitions:
+        desactivees = ()
+        if isinstance(definition, dict):
+            if "longueurs" in definition:
+                longueurs = tuple(int(n) for n in definition["longueurs"])
+            else:
+                lignes, cols = definition["dimensions"]
+                longueurs = (int(cols),) * int(lignes)
+            desactivees = tuple(sorted({(int(li), int(ci)) for li, ci in definition.get("desactivees", ())}))
+        else:
+            lignes, cols = definition
+            longueurs = (int(cols),) * int(lignes)
+        for li, ci in desactivees:
+            if not (0 <= li < len(longueurs) and 0 <= ci < longueurs[li]):
+                raise ValueError(f"Place désactivée ({li}, {ci}) hors de la rangée '{nom}'")
+        rangees.append((str(nom), longueurs, desactivees))
+
+    ordre = {nom: k for k, (nom, _, _) in enumerate(rangees)}
+    if adjacence is None:
+        # Rangées non vides reliées de proche en proche (gauche - milieu - droite)
+        presentes = [nom for nom, longueurs, _ in rangees if any(longueurs)]
+        paires = list(zip(presentes, presentes[1:]))
+    else:
+        paires = []
+        for a, b in adjacence:
+            if a not in ordre or b not in ordre:
+                raise ValueError(f"Adjacence ({a}, {b}) vers une rangée inconnue")
+            if a != b:
+                paires.append((a, b) if ordre[a] < ordre[b] else (b, a))
+    paires = tuple(sorted(set(paires), key=lambda p: (ordre[p[0]], ordre[p[1]])))
+    return tuple(rangees), paires
+
+
+def signature_structure(structure):
+    """
+    Signature textuelle stable d'une structure (clé de la bibliothèque de modèles).
+
+    Une rangée rectangulaire sans place désactivée s'écrit ``nom:LxC``; sinon les
+    longueurs des lignes sont séparées par ``/`` et les places désactivées suivent
+    un ``!``. L'adjacence n'est ajoutée que si elle diffère de l'ordre par défaut.
+    """
+    rangees, paires = normaliser_structure(structure)
+    morceaux = []
+    for nom, longueurs, desactivees in rangees:
+        if len(set(longueurs)) <= 1 and not desactivees:
+            morceau = f"{nom}:{len(longueurs)}x{longueurs[0] if longueurs else 0}"
+        else:
+            morceau = f"{nom}:{'/'.join(str(n) for n in longueurs)}"
+            if desactivees:
+                morceau += "!" + ";".join(f"{li}.{ci}" for li, ci in desactivees)
+        morceaux.append(morceau)
+    signature = ",".join(morceaux)
+    presentes = [nom for nom, longueurs, _ in rangees if any(longueurs)]
+    if paires != tuple(zip(presentes, presentes[1:])):
+        signature += "#" + ",".join(f"{a}-{b}" for a, b in paires)
+    return signature
+
+
+class TopologieSalle:
+    """
+    Structure de salle compilée: places numérotées et graphe des voisinages.
+
+    Les places utilisables sont numérotées dans l'ordre de remplissage du
+    moteur (rangée par rangée, ligne par ligne); les places désactivées et
+    celles au-delà de la longueur d'une ligne n'existent pas pour le moteur.
+    Deux places sont voisines si un étudiant de même matière sur l'une rendrait
+    l'autre invalide au sens de `Salle.place_valide`, selon la règle de
+    voisinage (par défaut: voisins horizontaux, verticaux et même position dans
+    une rangée adjacente; voir `REGLES_VOISINAGE`).
+    """
+
+    def __init__(self, structure, regle=None):
+        self.forme = normaliser_structure(structure)  # Forme canonique, réutilisable comme structure
+        rangees, paires = self.forme
+        self.regle = compiler_regle(regle)
+        decalages, decalages_inter = self.regle
+        self.rangees = [nom for nom, _, _ in rangees]
+        self.longueurs = {nom: longueurs for nom, longueurs, _ in rangees}
+        # Boîte englobante de chaque rangée, pour la mise en page
+        self.dimensions = {nom: (len(longueurs), max(longueurs, default=0)) for nom, longueurs, _ in rangees}
+        self.adjacence = {nom: [] for nom in self.rangees}
+        for a, b in paires:
+            self.adjacence[a].append(b)
+            self.adjacence[b].append(a)
+        # Masques des places utilisables, une ligne par ligne de la rangée
+        self.masques = {}
+        for nom, longueurs, desactivees in rangees:
+            exclues = set(desactivees)
+            self.masques[nom] = tuple(tuple((li, ci) not in exclues for ci in range(n))
+                                      for li, n in enumerate(longueurs))
+
+        self.places = []   # Liste de (rangée, ligne, colonne)
+        self.index = {}    # (rangée, ligne, colonne) -> numéro de place
+        for rangee in self.rangees:
+            for li, masque_ligne in enumerate(self.masques[rangee]):
+                for ci, utilisable in enumerate(masque_ligne):
+                    if utilisable:
+                        self.index[(rangee, li, ci)] = len(self.places)
+                        self.places.append((rangee, li, ci))
+
+        # Arêtes typées (i < j): 'horizontal', 'vertical', 'diagonale' ou 'inter_rangees'.
+        # Seuls les décalages « vers l'avant » sont parcourus, chaque paire n'est vue qu'une fois.
+        avant = [(dl, dc, type_decalage(dl, dc)) for dl, dc in decalages if (dl, dc) > (0, 0)]
+        self.aretes = []
+        for i, (rangee, li, ci) in enumerate(self.places):
+            for dl, dc, type_arete in avant:
+                j = self.index.get((rangee, li + dl, ci + dc))
+                if j is not None:
+                    self.aretes.append((i, j, type_arete))
+        for a, b in paires:
+            for li, masque_ligne in enumerate(self.masques[a]):
+                for ci, utilisable in enumerate(masque_ligne):
+                    if not utilisable:
+                        continue
+                    i = self.index[(a, li, ci)]
+                    for dl, dc in decalages_inter:
+                        j = self.index.get((b, li + dl, ci + dc))
+                        if j is not None:
+                            self.aretes.append((i, j, 'inter_rangees'))
+
+        voisins = [[] for _ in self.places]
+        for i, j, _ in self.aretes:
+            voisins[i].append(j)
+            voisins[j].append(i)
+        self.voisins = tuple(tuple(v) for v in voisins)
+        self._max_une_matiere = None
+
+    def rangees_adj(self, rangee):
+        """Rangées adjacentes (sans allée entre elles) à une rangée donnée."""
+        return list(self.adjacence.get(rangee, ()))
+
+    def description(self):
+        """Structure au format généralisé, sérialisable en JSON (points de reprise)."""
+        return {
+            "rangees": {
+                rangee: {
+                    "longueurs": list(self.longueurs[rangee]),
+                    "desactivees": [[li, ci] for li, masque_ligne in enumerate(self.masques[rangee])
+                                    for ci, utilisable in enumerate(masque_ligne) if not utilisable],
+                }
+                for rangee in self.rangees
+            },
+            "adjacence": [[a, b] for k, a in enumerate(self.rangees) for b in self.adjacence[a]
+                          if self.rangees.index(b) > k],
+        }
+
+    def capacite(self):
+        """Nombre total de places."""
+        return len(self.places)
+
+    def coloration_biparti(self):
+        """Retourne une 2-coloration des places (liste de 0/1) ou None si le graphe n'est pas biparti."""
+        couleur = [-1] * len(self.places)
+        for depart in range(len(self.places)):
+            if couleur[depart] != -1:
+                continue
+            couleur[depart] = 0
+            pile = [depart]
+            while pile:
+                i = pile.pop()
+                for j in self.voisins[i]:
+                    if couleur[j] == -1:
+                        couleur[j] = 1 - couleur[i]
+                        pile.append(j)
+                    elif couleur[j] == couleur[i]:
+                        return None
+        return couleur
+
+    def max_une_matiere(self):
+        """
+        Nombre maximal d'étudiants d'une même matière plaçables sans aucun voisin
+        de même matière (taille d'un stable maximum du graphe des voisinages).
+
+        Calcul exact par le théorème de König (stable = places - couplage maximum)
+        lorsque le graphe est biparti, ce qui est le cas de la règle orthogonale
+        dès que les rangées sont en enfilade; sinon estimation gloutonne.
+        """
+        if self._max_une_matiere is None:
+            couleur = self.coloration_biparti()
+            if couleur is not None:
+                self._max_une_matiere = len(self.places) - self._couplage_maximum(couleur)
+            else:
+                self._max_une_matiere = self._stable_glouton()
+        return self._max_une_matiere
+
+    def _couplage_maximum(self, couleur):
+        """Couplage maximum du graphe biparti (chemins augmentants, places ≤ quelques centaines)."""
+        partenaire = [-1] * len(self.places)
+
+        def augmenter(i, vus):
+            for j in self.voisins[i]:
+                if j in vus:
+                    continue
+                vus.add(j)
+                if partenaire[j] == -1 or augmenter(partenaire[j], vus):
+                    partenaire[j] = i
+                    return True
+            return False
+
+        return sum(1 for i in range(len(self.places)) if couleur[i] == 0 and augmenter(i, set()))
+
+    def _stable_glouton(self):
+        """Stable obtenu en retenant en priorité les places de plus faible degré."""
+        bloquees = set()
+        taille = 0
+        for i in sorted(range(len(self.places)), key=lambda i: len(self.voisins[i])):
+            if i not in bloquees:
+                taille += 1
+                bloquees.add(i)
+                bloquees.update(self.voisins[i])
+        return taille
+
+
+@lru_cache(maxsize=None)
+def _topologie_memoisee(forme_canonique, regle):
+    return TopologieSalle(forme_canonique, regle)
+
+
+def compiler_structure(structure, regle=None):
+    """
+    Retourne la topologie (mémoïsée) d'une structure de salle, quel que soit son
+    format, pour une règle de voisinage (nom, dict ou None pour la règle par défaut).
+    """
+    return _topologie_memoisee(normaliser_structure(structure), compiler_regle(regle))
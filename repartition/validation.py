@@ -0,0 +1,256 @@
+"""
+Validation vectorisée des classeurs téléversés (pandas).
+
+Chaque classeur est ouvert une seule fois (toutes ses feuilles en une lecture)
+et vérifié en une passe: colonnes attendues, noms vides, doublons dans une
+classe et entre classes, salles inconnues. Les rapports sont mis en cache par
+empreinte du contenu, comme `chargement.colonnes_classeur` qu'ils alimentent.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .chargement import empreinte_classeur, lire_classeur, memoriser_colonnes
+from .salles import STRUCTURES_SALLES
+
+# --- Cache des rapports ---
+TAILLE_CACHE_RAPPORTS = 32
+_rapports = OrderedDict()  # (type, empreinte) -> RapportClasseur
+_verrou = threading.Lock()
+EXEMPLES_MAX = 20  # Doublons et noms listés dans un rapport (les totaux restent exacts)
+
+
+class RapportClasseur:
+    """
+    Résultat de la validation d'un classeur.
+
+    Attributes:
+        type (str): "matieres", "etudiants" ou "salles".
+        feuilles (list): Noms des feuilles, dans l'ordre du classeur.
+        erreurs (list): Problèmes bloquants (messages).
+        avertissements (list): Problèmes non bloquants (messages).
+        contenu (dict): Informations propres au type de classeur (effectifs,
+            doublons, salles reconnues...), sérialisables.
+    """
+    __slots__ = ("type", "feuilles", "erreurs", "avertissements", "contenu")
+
+    def __init__(self, type_classeur, feuilles):
+        self.type = type_classeur
+        self.feuilles = list(feuilles)
+        self.erreurs = []
+        self.avertissements = []
+        self.contenu = {}
+
+    @property
+    def valide(self):
+        return not self.erreurs
+
+    def resume(self):
+        """Résumé sérialisable du rapport."""
+        return {"type": self.type, "feuilles": self.feuilles, "erreurs": self.erreurs,
+                "avertissements": self.avertissements, **self.contenu}
+
+
+def _memoise(type_classeur, valider):
+    """Applique `valider(feuilles)` au classeur, une seule fois par contenu."""
+    def valider_classeur(fichier):
+        donnees, empreinte = empreinte_classeur(fichier)
+        cle = (type_classeur, empreinte)
+        with _verrou:
+            rapport = _rapports.get(cle)
+            if rapport is not None:
+                _rapports.move_to_end(cle)
+                return rapport
+        feuilles = lire_classeur(donnees)
+        memoriser_colonnes(empreinte, feuilles)  # Lecture partagée avec l'onglet Configuration
+        rapport = valider(feuilles)
+        with _verrou:
+            _rapports[cle] = rapport
+            while len(_rapports) > TAILLE_CACHE_RAPPORTS:
+                _rapports.popitem(last=False)
+        return rapport
+    valider_classeur.__name__ = valider.__name__.lstrip("_")
+    valider_classeur.__doc__ = valider.__doc__
+    return valider_classeur
+
+
+def _texte(serie):
+    """Valeurs normalisées pour les comparaisons (espaces, casse); NaN et vides donnent ''."""
+    return serie.astype("string").fillna("").str.strip().str.casefold()
+
+
+# --- Validation par type de classeur ---
+def _valider_matieres(feuilles):
+    """
+    Valide le classeur des matières (une feuille par classe, épreuves en première colonne).
+
+    Returns:
+        RapportClasseur: contenu "matieres" (classe -> nombre d'épreuves).
+    """
+    rapport = RapportClasseur("matieres", feuilles)
+    if not feuilles:
+        rapport.erreurs.append("Le fichier des matières ne contient aucune feuille")
+        return rapport
+    premieres = pd.concat([df.iloc[:, 0] if len(df.columns) else pd.Series(dtype=object)
+                           for df in feuilles.values()], keys=list(feuilles), names=["classe", "ligne"])
+    nombre = (_texte(premieres) != "").groupby(level="classe", sort=False).sum()
+    matieres = {classe: int(nombre.get(classe, 0)) for classe in feuilles}
+    rapport.contenu["matieres"] = matieres
+    if not any(matieres.values()):
+        rapport.erreurs.append("Le fichier des matières semble vide ou mal formaté")
+    vides = [classe for classe, n in matieres.items() if n == 0]
+    if vides:
+        rapport.avertissements.append(f"Classes sans épreuve: {', '.join(vides)}")
+    return rapport
+
+
+def _valider_etudiants(feuilles):
+    """
+    Valide le classeur des étudiants (une feuille par classe, colonnes 'nom' et 'prenom').
+
+    Returns:
+        RapportClasseur: contenu "effectifs", "total", "colonnes_manquantes",
+        "noms_vides", "doublons" (dans une classe) et "doublons_entre_classes".
+    """
+    rapport = RapportClasseur("etudiants", feuilles)
+    non_vides = {classe: df for classe, df in feuilles.items() if not df.empty and len(df.columns)}
+    # Noms non vides de la première colonne, comme au chargement: ce sont les étudiants placés
+    effectifs = {classe: int(non_vides[classe].iloc[:, 0].notna().sum()) if classe in non_vides else 0
+                 for classe in feuilles}
+    rapport.contenu.update(effectifs=effectifs, total=sum(effectifs.values()), colonnes_manquantes={},
+                           noms_vides={}, doublons=[], doublons_entre_classes=[])
+    if not non_vides:
+        rapport.erreurs.append("Aucun étudiant trouvé dans le fichier")
+        return rapport
+
+    # Détection des colonnes de toutes les feuilles en une passe
+    colonnes = pd.DataFrame([(classe, position, str(nom)) for classe, df in non_vides.items()
+                             for position, nom in enumerate(df.columns)], columns=["classe", "position", "colonne"])
+    normalisees = colonnes["colonne"].str.lower().str.strip()
+    colonnes["prenom"] = normalisees.str.contains("prenom|prénom", regex=True)
+    colonnes["nom"] = normalisees.str.contains("nom", regex=False) & ~colonnes["prenom"]
+    detectees = colonnes.groupby("classe", sort=False)[["nom", "prenom"]].any()
+    manquantes = {}
+    for type_colonne in ("nom", "prenom"):
+        for classe in detectees.index[~detectees[type_colonne]]:
+            manquantes.setdefault(classe, []).append(type_colonne)
+    rapport.contenu["colonnes_manquantes"] = manquantes
+    if manquantes:
+        rapport.erreurs.append("Colonnes obligatoires manquantes: " +
+                               "; ".join(f"{classe}: {', '.join(cols)}" for classe, cols in manquantes.items()))
+
+    # Identité de chaque étudiant: première colonne (le nom placé par le moteur), plus le prénom s'il existe
+    position_prenom = colonnes[colonnes["prenom"]].groupby("classe", sort=False)["position"].first()
+
+    def prenoms(classe, df):
+        if classe in position_prenom.index:
+            return df.iloc[:, int(position_prenom[classe])].to_numpy(dtype=object)
+        return np.full(len(df), None, dtype=object)
+
+    lignes = pd.DataFrame({
+        "classe": np.repeat(list(non_vides), [len(df) for df in non_vides.values()]),
+        "nom": np.concatenate([df.iloc[:, 0].to_numpy(dtype=object) for df in non_vides.values()]),
+        "prenom": np.concatenate([prenoms(classe, df) for classe, df in non_vides.items()]),
+        "ligne": np.concatenate([np.arange(2, len(df) + 2) for df in non_vides.values()]),  # En-tête en ligne 1
+    })
+    nom, prenom = _texte(lignes["nom"]), _texte(lignes["prenom"])
+    lignes["identite"] = nom.str.cat(prenom, sep=" ").str.strip()
+
+    vides = nom == ""
+    if vides.any():
+        noms_vides = vides.groupby(lignes["classe"], sort=False).sum()
+        rapport.contenu["noms_vides"] = {classe: int(n) for classe, n in noms_vides.items() if n}
+        rapport.avertissements.append(f"{int(vides.sum())} ligne(s) sans nom (étudiants ignorés): " +
+                                      ", ".join(f"{c} ({n})" for c, n in rapport.contenu["noms_vides"].items()))
+
+    identifies = lignes[~vides]
+    dans_classe = identifies[identifies.duplicated(["classe", "identite"], keep=False)]
+    if len(dans_classe):
+        groupes = dans_classe.groupby(["classe", "identite"], sort=False)["ligne"].agg(list)
+        rapport.contenu["doublons"] = [{"classe": classe, "etudiant": identite, "lignes": lignes_excel}
+                                       for (classe, identite), lignes_excel in groupes.head(EXEMPLES_MAX).items()]
+        rapport.avertissements.append(f"{len(groupes)} étudiant(s) en double dans leur classe")
+
+    par_classe = identifies.drop_duplicates(["classe", "identite"])
+    entre_classes = par_classe[par_classe.duplicated("identite", keep=False)]
+    if len(entre_classes):
+        groupes = entre_classes.groupby("identite", sort=False)["classe"].agg(list)
+        rapport.contenu["doublons_entre_classes"] = [{"etudiant": identite, "classes": classes}
+                                                     for identite, classes in groupes.head(EXEMPLES_MAX).items()]
+        rapport.avertissements.append(f"{len(groupes)} étudiant(s) présent(s) dans plusieurs classes")
+    return rapport
+
+
+def _valider_salles(feuilles):
+    """
+    Valide le classeur des salles (première feuille, noms des salles).
+
+    Returns:
+        RapportClasseur: contenu "colonne" (colonne des noms), "reconnues"
+        (salles de STRUCTURES_SALLES, dans l'ordre du fichier, sans doublon),
+        "inconnues", "doublons" et "centres" (centre -> salles reconnues, si
+        le classeur a une colonne « centre »).
+    """
+    rapport = RapportClasseur("salles", feuilles)
+    df = next(iter(feuilles.values()), pd.DataFrame())
+    rapport.contenu.update(colonne=None, reconnues=[], inconnues=[], doublons=[], centres={})
+    if df.empty or not len(df.columns):
+        rapport.erreurs.append("Le fichier des salles est vide")
+        return rapport
+    colonne_centre = next((col for col in df.columns if "centre" in str(col).lower()), None)
+    colonne = next((col for col in df.columns if col != colonne_centre and
+                    ("nom" in str(col).lower() or "salle" in str(col).lower())), df.columns[0])
+    noms = df[colonne].dropna().astype(str).str.strip()
+    noms = noms[noms != ""]
+    connues = noms.isin(list(STRUCTURES_SALLES))
+    doublons = noms[noms.duplicated()].unique().tolist()
+    rapport.contenu.update(colonne=str(colonne), reconnues=noms[connues].drop_duplicates().tolist(),
+                           inconnues=noms[~connues].drop_duplicates().tolist(), doublons=doublons)
+    if colonne_centre is not None:
+        lignes = df.loc[noms.index[connues.to_numpy()], colonne_centre].fillna("").astype(str).str.strip()
+        centres = {}
+        for salle, centre in zip(noms[connues], lignes):
+            if salle not in centres.setdefault(centre, []):
+                centres[centre].append(salle)
+        rapport.contenu["centres"] = centres
+        if "" in centres:
+            rapport.avertissements.append(f"Salles sans centre: {', '.join(centres[''])}")
+    if not rapport.contenu["reconnues"]:
+        rapport.erreurs.append(f"Aucune salle reconnue dans le fichier (salles supportées: {', '.join(STRUCTURES_SALLES)})")
+    if rapport.contenu["inconnues"]:
+        rapport.avertissements.append(f"Salles sans structure définie (ignorées): {', '.join(rapport.contenu['inconnues'])}")
+    if doublons:
+        rapport.avertissements.append(f"Salles en double: {', '.join(doublons)}")
+    return rapport
+
+
+valider_matieres = _memoise("matieres", _valider_matieres)
+valider_etudiants = _memoise("etudiants", _valider_etudiants)
+valider_salles = _memoise("salles", _valider_salles)
+
+
+def valider_classeurs(fichier_matieres, fichier_etudiants, fichier_salles):
+    """
+    Valide les trois classeurs et leur cohérence (classes sans épreuve).
+
+    Args:
+        fichier_matieres, fichier_etudiants, fichier_salles: Chemins, contenus
+            (bytes) ou fichiers téléversés.
+
+    Returns:
+        dict: "matieres", "etudiants", "salles" -> RapportClasseur, et
+        "coherence" -> liste d'avertissements entre classeurs.
+    """
+    rapports = {
+        "matieres": valider_matieres(fichier_matieres),
+        "etudiants": valider_etudiants(fichier_etudiants),
+        "salles": valider_salles(fichier_salles),
+    }
+    matieres = rapports["matieres"].contenu.get("matieres", {})
+    sans_epreuve = [classe for classe, n in rapports["etudiants"].contenu["effectifs"].items()
+                    if n and not matieres.get(classe)]
+    rapports["coherence"] = ([f"Classes sans épreuve dans le fichier des matières: {', '.join(sans_epreuve)}"]
+                             if sans_epreuve else [])
+    return rapports
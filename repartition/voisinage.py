@@ -0,0 +1,105 @@
+"""Règles de distance anti-triche, compilées en noyaux de décalages."""
+
+# --- Règles de voisinage ---
+# Chaque règle donne les décalages (ligne, colonne) interdits à une même matière:
+# - "rayon" et "norme" ("manhattan" ou "chebyshev") décrivent le voisinage dans une
+#   rangée, ou bien "decalages" en donne la liste explicite;
+# - "inter_rangees" donne les décalages vers la même position d'une rangée adjacente.
+# Les décalages sont symétrisés à la compilation: (1, 0) interdit aussi (-1, 0).
+REGLES_VOISINAGE = {
+    "orthogonale": {
+        "libelle": "Voisins directs (gauche, droite, devant, derrière)",
+        "rayon": 1, "norme": "manhattan",
+        "inter_rangees": [(0, 0)],
+    },
+    "diagonale": {
+        "libelle": "Voisins directs et diagonaux",
+        "rayon": 1, "norme": "chebyshev",
+        "inter_rangees": [(-1, 0), (0, 0), (1, 0)],
+    },
+    "distance_2": {
+        "libelle": "Deux places d'écart (devant, derrière et sur le côté)",
+        "rayon": 2, "norme": "manhattan",
+        "inter_rangees": [(-1, 0), (0, 0), (1, 0)],
+    },
+    "rayon_2": {
+        "libelle": "Carré de rayon 2 (24 places autour)",
+        "rayon": 2, "norme": "chebyshev",
+        "inter_rangees": [(-2, 0), (-1, 0), (0, 0), (1, 0), (2, 0)],
+    },
+}
+REGLE_PAR_DEFAUT = "orthogonale"
+
+
+def _symetriser(decalages, garder_origine):
+    resultat = set()
+    for dl, dc in decalages:
+        resultat.add((int(dl), int(dc)))
+        resultat.add((-int(dl), -int(dc)))
+    if not garder_origine:
+        resultat.discard((0, 0))
+    return tuple(sorted(resultat))
+
+
+def compiler_regle(regle=None):
+    """
+    Forme canonique (hashable) d'une règle de voisinage.
+
+    Args:
+        regle: Nom d'une règle de REGLES_VOISINAGE, dict au même format, ou None
+            pour la règle par défaut (voisins orthogonaux).
+
+    Returns:
+        tuple: (décalages dans une rangée, décalages vers une rangée adjacente),
+        chacun trié et symétrique.
+    """
+    if regle is None:
+        regle = REGLE_PAR_DEFAUT
+    if isinstance(regle, tuple):
+        return regle  # Déjà compilée (clé de mémoïsation)
+    if isinstance(regle, str):
+        if regle not in REGLES_VOISINAGE:
+            raise ValueError(f"Règle de voisinage inconnue: '{regle}'")
+        regle = REGLES_VOISINAGE[regle]
+
+    if "decalages" in regle:
+        decalages = regle["decalages"]
+    else:
+        rayon = int(regle.get("rayon", 1))
+        norme = regle.get("norme", "manhattan")
+        if norme not in ("manhattan", "chebyshev"):
+            raise ValueError(f"Norme de voisinage inconnue: '{norme}'")
+        decalages = [(dl, dc) for dl in range(-rayon, rayon + 1) for dc in range(-rayon, rayon + 1)
+                     if (abs(dl) + abs(dc) if norme == "manhattan" else max(abs(dl), abs(dc))) <= rayon]
+    return (_symetriser(decalages, garder_origine=False),
+            _symetriser(regle.get("inter_rangees", [(0, 0)]), garder_origine=True))
+
+
+def nom_regle(regle):
+    """Nom de la règle prédéfinie équivalente, ou None pour une règle personnalisée."""
+    forme = compiler_regle(regle)
+    return next((nom for nom in REGLES_VOISINAGE if compiler_regle(nom) == forme), None)
+
+
+def description_regle(regle):
+    """Règle au format dict explicite, sérialisable en JSON (points de reprise)."""
+    decalages, inter = compiler_regle(regle)
+    return {"decalages": [list(d) for d in decalages], "inter_rangees": [list(d) for d in inter]}
+
+
+def signature_regle(regle):
+    """Signature textuelle stable d'une règle (clé de la bibliothèque de modèles)."""
+    nom = nom_regle(regle)
+    if nom is not None:
+        return nom
+    decalages, inter = compiler_regle(regle)
+    return ";".join(f"{dl}.{dc}" for dl, dc in decalages) + "/" + ";".join(f"{dl}.{dc}" for dl, dc in inter)
+
+
+def type_decalage(dl, dc):
+    """Type d'arête d'un décalage dans une rangée: 'horizontal', 'vertical' ou 'diagonale'."""
+    if dl == 0:
+        return 'horizontal'
+    if dc == 0:
+        return 'vertical'
+    return 'diagonale'
@@ -0,0 +1,78 @@
+"""Colonnes en mémoire partagée: format du segment, lecteurs d'autres processus et suppression."""
+import gc
+import multiprocessing
+import uuid
+
+import pytest
+
+from repartition import memoire_partagee
+from repartition.memoire_partagee import (ENTETE, MAGIQUE, attacher_colonnes, nom_segment, publier_colonnes,
+                                          supprimer_segment)
+
+pytestmark = pytest.mark.skipif(memoire_partagee.fcntl is None or not memoire_partagee.ACTIVE,
+                                reason="compteur de lecteurs inter-processus propre aux systèmes POSIX")
+
+COLONNES = {"ISE1": ("Ana Diop", "Łukasz Żółć", 17, 2.5, True), "Vide": (), "AS2": ("Moussa Ba",)}
+
+
+def _entete(empreinte):
+    """(magique, lecteurs, valeurs, taille de l'index) du segment, None s'il n'existe plus."""
+    try:
+        segment = memoire_partagee._ouvrir(nom_segment(empreinte))
+    except FileNotFoundError:
+        return None
+    try:
+        return ENTETE.unpack_from(segment.buf)
+    finally:
+        segment.close()
+
+
+def _lecteur(empreinte, sortie, fin):
+    """Processus lecteur: s'attache, renvoie ce qu'il lit, puis attend la fin du test."""
+    partagees = attacher_colonnes(empreinte)
+    sortie.put(None if partagees is None else {feuille: tuple(valeurs) for feuille, valeurs in partagees.items()})
+    fin.wait(30)
+
+
+@pytest.fixture
+def empreinte():
+    empreinte = uuid.uuid4().hex
+    yield empreinte
+    supprimer_segment(empreinte)  # Nettoyage si le test échoue avant le dernier détachement
+
+
+def test_segment_partage_entre_processus(empreinte):
+    partagees = publier_colonnes(empreinte, COLONNES)
+    if partagees is None:
+        pytest.skip("mémoire partagée indisponible")
+    magique, lecteurs, valeurs, _ = _entete(empreinte)
+    assert (magique, lecteurs, valeurs) == (MAGIQUE, 1, 6)
+    assert dict(partagees) == COLONNES
+    assert list(partagees) == list(COLONNES)
+
+    contexte = multiprocessing.get_context("spawn")
+    sortie, fin = contexte.Queue(), contexte.Event()
+    processus = contexte.Process(target=_lecteur, args=(empreinte, sortie, fin))
+    processus.start()
+    try:
+        assert sortie.get(timeout=60) == COLONNES
+        assert _entete(empreinte)[1] == 2
+    finally:
+        fin.set()
+        processus.join(60)
+    assert processus.exitcode == 0
+    # Le processus lecteur s'est détaché en se terminant
+    assert _entete(empreinte)[1] == 1
+
+    # Une seconde publication du même classeur s'attache au segment existant
+    autre = publier_colonnes(empreinte, COLONNES)
+    assert autre.nom == partagees.nom and _entete(empreinte)[1] == 2
+    del autre
+    gc.collect()
+    assert _entete(empreinte)[1] == 1
+
+    # Le dernier lecteur supprime le segment
+    del partagees
+    gc.collect()
+    assert _entete(empreinte) is None
+    assert attacher_colonnes(empreinte) is None
@@ -0,0 +1,61 @@
+"""Reprise du moteur de placement depuis un point de reprise sérialisé en JSON."""
+import json
+import time
+
+import pytest
+
+from repartition.moteur import MoteurPlacement
+from repartition.salles import STRUCTURES_SALLES, Salle
+
+
+def _moteur(remplissage):
+    # Deux salles qui se remplissent (événements 'salle_pleine') et des étudiants sans place
+    salles = [Salle("AS3", STRUCTURES_SALLES["AS3"]), Salle("AS2", STRUCTURES_SALLES["AS2"])]
+    etudiants = {"ISE1": [f"ISE1-{k}" for k in range(30)], "AS1": [f"AS1-{k}" for k in range(20)],
+                 "ISE3": [f"ISE3-{k}" for k in range(12)]}
+    matieres = {"ISE1": "Statistique", "AS1": "Économie", "ISE3": "Analyse"}
+    return MoteurPlacement(salles, etudiants, matieres, graine=7, remplissage=remplissage)
+
+
+def _repris(moteur):
+    return MoteurPlacement.reprendre(json.loads(json.dumps(moteur.point_de_reprise())))
+
+
+def _plan(moteur):
+    return [list(salle.occupants) for salle in moteur.plan()], list(moteur.non_places)
+
+
+@pytest.fixture(params=["sequentiel", "entrelace"])
+def reference(request):
+    moteur = _moteur(request.param)
+    return request.param, list(moteur.executer()), _plan(moteur)
+
+
+def test_reprise_apres_arret_de_l_appelant(reference):
+    remplissage, evenements, plan = reference
+    assert any(evenement.type == "salle_pleine" for evenement in evenements)
+    for arret in range(1, len(evenements)):
+        moteur = _moteur(remplissage)
+        generateur = moteur.executer()
+        debut = [next(generateur) for _ in range(arret)]
+        generateur.close()  # Appelant arrêté, par exemple juste après le placement qui remplit une salle
+        repris = _repris(moteur)
+        assert debut + list(repris.executer()) == evenements, arret
+        assert _plan(repris) == plan
+
+
+def test_reprise_apres_echeance(reference):
+    remplissage, evenements, plan = reference
+    for arret in range(1, len(evenements)):
+        moteur = _moteur(remplissage)
+        generateur = moteur.executer()
+        debut = [next(generateur) for _ in range(arret)]
+        generateur.close()
+        # Échéance atteinte à la reprise, avant le premier étudiant, puis nouvelle reprise
+        repris = _repris(moteur)
+        suite = list(repris.executer(echeance=time.monotonic() - 1))
+        if suite[-1].type == "echeance":  # Sinon le placement était déjà fini
+            repris = _repris(repris)
+            suite = suite[:-1] + list(repris.executer())
+        assert debut + suite == evenements, arret
+        assert _plan(repris) == plan
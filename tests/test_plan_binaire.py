@@ -0,0 +1,105 @@
+"""Plan binaire: écriture, relecture par projection mémoire et fusion."""
+import pytest
+
+from repartition.moteur import MoteurPlacement
+from repartition.plan import PlanCompact
+from repartition.plan_binaire import EcrivainPlanBinaire, PlanBinaire, fusionner_plans_binaires
+from repartition.salles import STRUCTURES_SALLES, Salle
+
+
+def _moteur(prefixe, graine):
+    """Deux petites salles (54 places) pour 60 étudiants: des étudiants restent sans place."""
+    salles = [Salle("AS3", STRUCTURES_SALLES["AS3"]), Salle("AS2", STRUCTURES_SALLES["AS2"])]
+    etudiants = {"ISE1": [f"{prefixe} Étudiant ISE1-{k}" for k in range(40)],
+                 "AS1": [f"{prefixe} Étudiant AS1-{k}" for k in range(20)]}
+    moteur = MoteurPlacement(salles, etudiants, {"ISE1": "Statistique", "AS1": "Économie"}, graine=graine)
+    moteur.executer_tout()
+    assert moteur.non_places
+    return moteur
+
+
+def _places_attendues(salles, centre):
+    """(nom, classe, matière) -> place, d'après les salles en mémoire."""
+    attendues = {}
+    for salle in salles:
+        for i, id_etudiant in enumerate(salle.occupants):
+            if id_etudiant >= 0:
+                rangee, ligne, colonne = salle.topologie.places[i]
+                registre = salle.registre
+                cle = (registre.nom(id_etudiant), registre.classe(id_etudiant), registre.matiere(id_etudiant))
+                attendues[cle] = {"centre": centre, "salle": salle.nom, "rangee": rangee, "ligne": ligne,
+                                  "colonne": colonne}
+    return attendues
+
+
+def _verifier(plan, attendues, non_places):
+    assert plan.nb_places == len(attendues)
+    assert plan.nb_etudiants == len(attendues) + len(non_places)
+    for (nom, classe, matiere), place in attendues.items():
+        [id_etudiant] = plan.chercher(nom)
+        assert plan.etudiant(id_etudiant) == (nom, classe, matiere)
+        assert plan.place(id_etudiant) == place
+    sans_place = [plan.etudiant(i) for i in plan.non_places()]
+    assert sans_place == non_places
+    for i in plan.non_places():
+        assert plan.place(i) is None
+        assert plan.chercher(plan.nom(i)) == [i]
+
+
+@pytest.fixture
+def moteur():
+    return _moteur("Nord", 1)
+
+
+def test_aller_retour_moteur(tmp_path, moteur):
+    chemin = tmp_path / "moteur.rpb"
+    with EcrivainPlanBinaire(chemin) as ecrivain:
+        ecrivain.ajouter_moteur(moteur, "Nord")
+    non_places = [(moteur.registre.nom(i), moteur.registre.classe(i), moteur.registre.matiere(i))
+                  for i in moteur.non_places]
+    with PlanBinaire(chemin) as plan:
+        _verifier(plan, _places_attendues(moteur.plan(), "Nord"), non_places)
+        assert [info["relachees"] for info in plan.infos_salles()] == \
+            [salle.placements_avec_contraintes_relachees for salle in moteur.plan()]
+
+
+def test_aller_retour_plan_compact(tmp_path, moteur):
+    poignee = PlanCompact(moteur.plan(), moteur.non_places)
+    chemin = tmp_path / "compact.rpb"
+    with EcrivainPlanBinaire(chemin) as ecrivain:
+        ecrivain.ajouter_moteur(poignee, "Sud")
+    non_places = [(poignee.registre.nom(i), poignee.registre.classe(i), poignee.registre.matiere(i))
+                  for i in poignee.non_places()]
+    with PlanBinaire(chemin) as plan:
+        _verifier(plan, _places_attendues(poignee.salles(), "Sud"), non_places)
+        # Salle reconstruite: mêmes occupants, place par place
+        for salle in poignee.salles():
+            relue = plan.salle((salle.nom, "Sud"))
+            assert [relue.registre.nom(i) if i >= 0 else None for i in relue.occupants] == \
+                [salle.registre.nom(i) if i >= 0 else None for i in salle.occupants]
+
+
+def test_fusion_decale_salles_et_etudiants(tmp_path):
+    chemins = []
+    for centre, graine in (("Nord", 1), ("Sud", 2)):
+        chemin = tmp_path / f"{centre}.rpb"
+        with EcrivainPlanBinaire(chemin) as ecrivain:
+            ecrivain.ajouter_moteur(_moteur(centre, graine), centre)
+        chemins.append(chemin)
+    destination = tmp_path / "global.rpb"
+    resume = fusionner_plans_binaires(chemins, destination)
+
+    with PlanBinaire(chemins[0]) as nord, PlanBinaire(chemins[1]) as sud, PlanBinaire(destination) as plan:
+        assert resume == {"salles": nord.nb_salles + sud.nb_salles, "places": nord.nb_places + sud.nb_places,
+                          "etudiants": nord.nb_etudiants + sud.nb_etudiants}
+        assert plan.infos_salles() == nord.infos_salles() + sud.infos_salles()
+        # Places: celles du second plan après toutes celles du premier
+        for source, decalage in ((nord, 0), (sud, nord.nb_places)):
+            for i in range(source.nb_places):
+                assert plan.etudiant(i + decalage) == source.etudiant(i)
+                assert plan.place(i + decalage) == source.place(i)
+        # Étudiants sans place: ceux du premier plan, puis ceux du second
+        assert [plan.etudiant(i) for i in plan.non_places()] == \
+            [nord.etudiant(i) for i in nord.non_places()] + [sud.etudiant(i) for i in sud.non_places()]
+        for k in range(sud.nb_salles):
+            assert plan.salle(nord.nb_salles + k).occupants == sud.salle(k).occupants
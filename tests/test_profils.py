@@ -0,0 +1,91 @@
+"""Programmation dynamique sur les profils: comparaison avec une énumération exhaustive."""
+import pytest
+
+from repartition import profils
+from repartition.profils import VIDE, nombre_conflits, resoudre_profils
+from repartition.topologie import compiler_structure
+
+# Salles de 2 à 3 lignes, assez petites pour énumérer tous les gabarits
+CAS = [
+    ({"gauche": (2, 2)}, (2, 2)),
+    ({"gauche": (3, 2)}, (4, 2)),
+    ({"gauche": (3, 3)}, (6, 3)),
+    ({"gauche": (3, 3)}, (3, 3, 3)),
+    ({"gauche": (2, 2), "droite": (2, 2)}, (5, 3)),
+    ({"gauche": (3, 2), "droite": (3, 2)}, (6, 4, 1)),
+    ({"gauche": (2, 2), "milieu": (2, 2), "droite": (2, 2)}, (7, 4)),
+    ({"gauche": (3, 4)}, (8, 3)),
+]
+
+
+def _gabarits(stock):
+    """Tous les gabarits distincts d'un multiensemble d'étiquettes (étiquette -> nombre)."""
+    if not any(stock.values()):
+        yield []
+        return
+    for etiquette, nombre in stock.items():
+        if nombre:
+            stock[etiquette] -= 1
+            for suite in _gabarits(stock):
+                yield [etiquette] + suite
+            stock[etiquette] += 1
+
+
+def _stock(topologie, effectifs):
+    stock, reste = {}, topologie.capacite()
+    for rang, effectif in enumerate(effectifs):
+        stock[rang] = min(effectif, reste)
+        reste -= stock[rang]
+    stock[VIDE] = reste
+    return stock
+
+
+def _optimum(topologie, effectifs):
+    """Gabarit au moins de voisinages de même matière, par énumération."""
+    return min(_gabarits(_stock(topologie, effectifs)), key=lambda gabarit: nombre_conflits(topologie, gabarit))
+
+
+def _effectifs_respectes(topologie, effectifs, etiquettes):
+    stock = _stock(topologie, effectifs)
+    return all(etiquettes.count(etiquette) == nombre for etiquette, nombre in stock.items())
+
+
+@pytest.mark.parametrize("structure,effectifs", CAS)
+def test_optimum_sans_depart(structure, effectifs):
+    topologie = compiler_structure(structure)
+    etiquettes, optimal = resoudre_profils(topologie, effectifs)
+    assert optimal
+    assert _effectifs_respectes(topologie, effectifs, etiquettes)
+    assert nombre_conflits(topologie, etiquettes) == nombre_conflits(topologie, _optimum(topologie, effectifs))
+
+
+@pytest.mark.parametrize("structure,effectifs", CAS)
+def test_optimum_depuis_un_mauvais_depart(structure, effectifs):
+    topologie = compiler_structure(structure)
+    # Matières regroupées place après place: le plus de voisinages possible
+    depart = [etiquette for etiquette, nombre in sorted(_stock(topologie, effectifs).items(), reverse=True)
+              for _ in range(nombre)]
+    etiquettes, optimal = resoudre_profils(topologie, effectifs, depart)
+    assert optimal
+    assert _effectifs_respectes(topologie, effectifs, etiquettes)
+    assert nombre_conflits(topologie, etiquettes) == nombre_conflits(topologie, _optimum(topologie, effectifs))
+
+
+@pytest.mark.parametrize("structure,effectifs", CAS)
+def test_depart_optimal_garde(structure, effectifs):
+    topologie = compiler_structure(structure)
+    depart = _optimum(topologie, effectifs)
+    etiquettes, optimal = resoudre_profils(topologie, effectifs, depart)
+    assert optimal
+    assert nombre_conflits(topologie, etiquettes) == nombre_conflits(topologie, depart)
+
+
+@pytest.mark.parametrize("limite", ["LIMITE_PROFILS", "LIMITE_TRANSITIONS"])
+def test_depassement_des_limites(monkeypatch, limite):
+    topologie = compiler_structure({"gauche": (3, 3)})
+    effectifs = (6, 3)
+    depart = [0, 0, 0, 0, 0, 0, 1, 1, 1]
+    monkeypatch.setattr(profils, limite, 1)
+    # Départ gardé sans preuve d'optimalité, ou rien sans départ
+    assert resoudre_profils(topologie, effectifs, depart) == (depart, False)
+    assert resoudre_profils(topologie, effectifs) is None